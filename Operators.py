@@ -138,9 +138,17 @@ class PivotPainter_OT_CreateSelectOrder(bpy.types.Operator):
 class PivotPainter_OT_CreateTextures(bpy.types.Operator):
     bl_label = "Create Textures"
     bl_idname = "pivot_painter.create_textures"
-    bl_description = "Save before use is advised.\n\nProgress report in system console. "
+    bl_description = "Save before use is advised.\n\nProgress is shown in the status bar, press ESC to cancel. "
     bl_options = {'REGISTER', 'UNDO'}
 
+    # Seconds of work done between two redraws
+    time_budget = 0.05
+
+    timer = None
+    steps = None
+    creation = None
+    start_time = 0.0
+
     @classmethod
     def poll(cls, context):
         # Check that you are ready to rumble.
@@ -151,11 +159,135 @@ class PivotPainter_OT_CreateTextures(bpy.types.Operator):
         from .core.CreateTextures import create_textures
         start_time = time.time()
 
-        if not create_textures(self, context):
+        if create_textures(self, context) is None:
             return {'CANCELLED'}
         self.report({'INFO'}, "Textures created, total time: %.2fs" % (time.time() - start_time))
         return {'FINISHED'}
 
+    def invoke(self, context, event):
+        import time
+        from .core.CreateTextures import validate_textures, create_textures_steps, TextureCreation
+
+        selection = validate_textures(self, context)
+        if selection is None:
+            return {'CANCELLED'}
+
+        self.start_time = time.time()
+        self.creation = TextureCreation()
+        self.steps = create_textures_steps(self, context, selection, self.creation)
+
+        window_manager = context.window_manager
+        window_manager.progress_begin(0, 100)
+        self.timer = window_manager.event_timer_add(0.01, window=context.window)
+        window_manager.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        import time
+
+        if event.type == 'ESC':
+            self.steps.close()
+            self.creation.rollback()
+            self.stop(context)
+            self.report({'WARNING'}, "Texture creation cancelled")
+            return {'CANCELLED'}
+
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+
+        deadline = time.time() + self.time_budget
+        try:
+            while time.time() < deadline:
+                description, fraction = next(self.steps)
+        except StopIteration:
+            self.creation.finish(context)
+            self.stop(context)
+            self.report({'INFO'}, "Textures created, total time: %.2fs" % (time.time() - self.start_time))
+            return {'FINISHED'}
+        except Exception:
+            self.creation.rollback()
+            self.stop(context)
+            raise
+
+        context.window_manager.progress_update(fraction * 100)
+        context.workspace.status_text_set("%s: %.0f%%, press ESC to cancel" % (description, fraction * 100))
+        return {'RUNNING_MODAL'}
+
+    def stop(self, context):
+        window_manager = context.window_manager
+        window_manager.event_timer_remove(self.timer)
+        window_manager.progress_end()
+        context.workspace.status_text_set(None)
+
+
+# noinspection PyPep8Naming
+class PivotPainter_OT_VerifyTextures(bpy.types.Operator):
+    bl_label = "Verify Textures"
+    bl_idname = "pivot_painter.verify_textures"
+    bl_description = "Decodes created textures, or vertex attributes, and compares them with the selected objects.\nSaved texture files are read when saving is enabled.\n\nErrors of every channel are listed in the Info editor"
+    bl_options = {'REGISTER'}
+
+    @classmethod
+    def poll(cls, context):
+        return context.mode == 'OBJECT'
+
+    def execute(self, context):
+        import time
+        from .core.VerifyTextures import verify_textures
+        start_time = time.time()
+
+        rows = verify_textures(self, context)
+        if rows is None:
+            return {'CANCELLED'}
+        if len(rows) == 0:
+            self.report({'WARNING'}, "No channel can be verified against the scene")
+            return {'CANCELLED'}
+
+        for label, max_error, mean_error, _ in rows:
+            self.report({'INFO'}, "%s: max error %.6g, mean error %.6g" % (label, max_error, mean_error))
+
+        # Indices must decode exactly, anything else is off by its storage precision
+        broken = [label for label, max_error, _, exact in rows if exact and max_error > 0]
+        if len(broken) > 0:
+            self.report({'WARNING'}, "Indices do not decode back in " + ", ".join(broken))
+
+        label, max_error, _, _ = max(rows, key=lambda row: row[1])
+        self.report({'INFO'}, "Verified %d channels, largest error %.6g in %s, total time: %.2fs" % (len(rows), max_error, label, time.time() - start_time))
+        return {'FINISHED'}
+
+
+# noinspection PyPep8Naming
+class PivotPainter_OT_MeasureTexelLayout(bpy.types.Operator):
+    bl_label = "Measure Layouts"
+    bl_idname = "pivot_painter.measure_texel_layout"
+    bl_description = "Reports mean distance in texels between texel of every selected object and texel of its selected parent, for every texel layout"
+    bl_options = {'REGISTER'}
+
+    @classmethod
+    def poll(cls, context):
+        return context.mode == 'OBJECT'
+
+    def execute(self, context):
+        import numpy as np
+        from .core.CreateTextures import find_texture_dimensions, layout_order, selection_parents
+        from .kernels.TexelOrder import parent_texel_distances
+
+        selection = [obj for obj in context.selected_objects if obj.type == 'MESH']
+        parents = selection_parents(selection)
+        if not np.any(parents >= 0):
+            self.report({'ERROR'}, "No selected object has a selected parent")
+            return {'CANCELLED'}
+
+        width = find_texture_dimensions(selection)[0]
+        measures = []
+        for layout, name, _ in PivotPainterTextureProperties.texel_layout_options:
+            slots = np.empty(len(selection), dtype=np.int64)
+            slots[layout_order(selection, layout)] = np.arange(len(selection))
+            measures.append("%s %.1f" % (name, parent_texel_distances(parents, slots, width).mean()))
+
+        self.report({'INFO'}, "Mean parent texel distance: " + ", ".join(measures))
+        return {'FINISHED'}
+
 
 ###########################################################
 ###########################################################
@@ -187,9 +319,71 @@ class PivotPainter_OT_PrepareMesh(bpy.types.Operator):
         start_time = time.time()
 
         from .Utils import reorder_selection_by_parents
-        prepare_mesh(context, reorder_selection_by_parents(selection))
+        from .core.ObjectHierarchy import ObjectHierarchy
+        hierarchy = ObjectHierarchy(selection)
+        num_cache_hits = prepare_mesh(context, reorder_selection_by_parents(selection, hierarchy), hierarchy, self)
+
+        self.report({'INFO'}, "Prepared %d meshes (%d from cache), total time: %.2fs" % (len(selection), num_cache_hits, time.time() - start_time))
+
+        return {'FINISHED'}
+
+
+# noinspection PyPep8Naming
+class PivotPainter_OT_AnalyzeMesh(bpy.types.Operator):
+    bl_label = "Analyze"
+    bl_idname = "pivot_painter.analyze_pivots_and_rotations"
+    bl_description = "Will calculate meshes pivots and rotations without changing them, results are stored in object properties for review"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        return context.mode == 'OBJECT'
+
+    def execute(self, context):
+        import time
+        from .core.PivotAndRotation import analyze_mesh
+
+        if len(context.selected_objects) < 1:
+            self.report({'ERROR'}, "No objects selected!")
+            return {'CANCELLED'}
+
+        selection = context.selected_objects
+
+        start_time = time.time()
+
+        from .Utils import reorder_selection_by_parents
+        from .core.ObjectHierarchy import ObjectHierarchy
+        hierarchy = ObjectHierarchy(selection)
+        num_analyzed, num_cache_hits = analyze_mesh(context, reorder_selection_by_parents(selection, hierarchy), hierarchy, self)
+
+        self.report({'INFO'}, "Analyzed %d meshes (%d from cache), total time: %.2fs" % (num_analyzed, num_cache_hits, time.time() - start_time))
+
+        return {'FINISHED'}
+
+
+# noinspection PyPep8Naming
+class PivotPainter_OT_CommitMesh(bpy.types.Operator):
+    bl_label = "Commit"
+    bl_idname = "pivot_painter.commit_pivots_and_rotations"
+    bl_description = "Will apply analyzed pivots and rotations of selected meshes"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        return context.mode == 'OBJECT'
+
+    def execute(self, context):
+        import time
+        from .core.PivotAndRotation import commit_mesh
+
+        start_time = time.time()
+
+        num_committed = commit_mesh(context, context.selected_objects, self)
+        if num_committed == 0:
+            self.report({'ERROR'}, "No analyzed objects selected!")
+            return {'CANCELLED'}
 
-        self.report({'INFO'}, "Prepared %d meshes, total time: %.2fs" % (len(selection), time.time() - start_time))
+        self.report({'INFO'}, "Committed %d meshes, total time: %.2fs" % (num_committed, time.time() - start_time))
 
         return {'FINISHED'}
 
@@ -199,6 +393,39 @@ class PivotPainter_OT_PrepareMesh(bpy.types.Operator):
 ###########################################################
 
 
+# noinspection PyPep8Naming
+class PivotPainter_OT_CreateIslandUVs(bpy.types.Operator):
+    bl_label = "Create Island UVs"
+    bl_idname = "pivot_painter.create_island_uvs"
+    bl_description = "Will give every loose part of the mesh its own texel in place, same UVs as splitting mesh and copying UVs back"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        return context.mode == 'OBJECT'
+
+    def execute(self, context):
+        if len(context.selected_objects) < 1:
+            self.report({'ERROR'}, "Atleast one object needs to be selected")
+            return {'CANCELLED'}
+
+        selection: list[bpy.types.Object] = []
+        for obj in context.selected_objects:
+            if obj is None or obj.type != 'MESH':
+                continue
+            selection.append(obj)
+
+        import time
+        from .core.MeshOperations import create_island_uvs
+
+        start_time = time.time()
+        num_islands = create_island_uvs(self, context, selection)
+
+        self.report({'INFO'}, "Created UVs for %d islands, total time: %.2fs" % (num_islands, time.time() - start_time))
+
+        return {'FINISHED'}
+
+
 # noinspection PyPep8Naming
 class PivotPainter_OT_CopyUVs(bpy.types.Operator):
     bl_label = "Copy UVs"
@@ -261,7 +488,7 @@ class PivotPainter_OT_SplitMesh(bpy.types.Operator):
             selection.append(obj)
 
         from .core.MeshOperations import split_mesh
-        split_mesh(selection)
+        split_mesh(selection, self)
 
         if len(selection) == 1:
             properties = get_mesh_operations_settings(context)
@@ -448,6 +675,40 @@ class PivotPainter_OT_GenerateDistantHierarchy(bpy.types.Operator):
 ###########################################################
 
 
+# noinspection PyPep8Naming
+class PivotPainter_OT_RunPipeline(bpy.types.Operator):
+    bl_label = "Run Pipeline"
+    bl_idname = "pivot_painter.run_pipeline"
+    bl_description = "Will run enabled steps in order: Split Mesh, Generate Hierarchy, Generate Pivots and Rotations, Create Textures and Copy UVs.\nSteps which settings and inputs did not change since the last run are reused"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        return context.mode == 'OBJECT'
+
+    def execute(self, context):
+        if len(context.selected_objects) < 1:
+            self.report({'ERROR'}, "Atleast one object needs to be selected")
+            return {'CANCELLED'}
+
+        import time
+        from .core.Pipeline import run_pipeline
+
+        start_time = time.time()
+        result = run_pipeline(self, context, list(context.selected_objects))
+        if result is None:
+            return {'CANCELLED'}
+
+        ran, reused = result
+        self.report({'INFO'}, "Pipeline finished, ran: %s, reused: %s, total time: %.2fs" % (', '.join(ran) or 'none', ', '.join(reused) or 'none', time.time() - start_time))
+        return {'FINISHED'}
+
+
+###########################################################
+###########################################################
+###########################################################
+
+
 # noinspection PyPep8Naming
 class PivotPainter_OT_SelectEmptyAxisMeshes(bpy.types.Operator):
     bl_label = "Fill No Wind Meshes"
@@ -35,6 +35,17 @@ class PivotPainterTextureOptionProperties(PivotPainterPropertyGroup):
         description="Generate HDR textures",
         default=True)
 
+    index_encoding_options = [
+        ("auto", "Auto", 'Half float while every index fits in it, otherwise full float'),
+        ("half", "Half Float", 'Index bits stored as half float pattern, saved as 16-bit OpenEXR.\nHolds indices up to 30719'),
+        ("float", "Full Float", 'Index stored as its value, saved as 32-bit OpenEXR.\nHolds indices up to 16777216, shader must read the value as it is')
+    ]
+    index_encoding: bpy.props.EnumProperty(
+        items=index_encoding_options,
+        name="Index Encoding",
+        description="How integer indices are stored in HDR textures",
+        default="auto")
+
     def get_rgb_option(self) -> 'TextureOptions.PivotPainterTextureTypeData':
         return texture_rgb_options[self.rgb]
 
@@ -91,6 +102,37 @@ class PivotPainterTextureProperties(PivotPainterPropertyGroup):
         default=True,
         description="Should it create a new texture or use the first one?")
 
+    output_mode_options = [
+        ("texture", "Textures", 'Values are written to textures, every object gets UVs of its pixel'),
+        ("attributes", "Vertex Attributes", 'Values are written to every vertex of their object, engines read them without texture lookups')
+    ]
+    output_mode: bpy.props.EnumProperty(
+        items=output_mode_options,
+        name="Output",
+        description="Where packed values are written",
+        default="texture")
+
+    attribute_type_options = [
+        ("color", "Color Attribute", 'One float color attribute per texture, holding RGBA'),
+        ("uv", "UV Maps", 'Two UV maps per texture, holding RG and BA.\nMeshes can hold at most 8 UV maps')
+    ]
+    attribute_type: bpy.props.EnumProperty(
+        items=attribute_type_options,
+        name="Attribute Type",
+        description="How values are stored on vertices",
+        default="color")
+
+    texel_layout_options = [
+        ("selection", "Selection Order", 'Objects get texels in the order they are selected'),
+        ("morton", "Spatial", 'Objects close to each other get texels close to each other, ordered along a Z-order curve of their pivots'),
+        ("hierarchy", "Hierarchy Chains", 'Every parent is followed by its whole hierarchy, so parent lookups stay near in texture.\nRoots and siblings are ordered spatially')
+    ]
+    texel_layout: bpy.props.EnumProperty(
+        items=texel_layout_options,
+        name="Texel Layout",
+        description="Order in which objects get texture pixels",
+        default="selection")
+
 
 class PivotPainterCalculatePivotProperties(PivotPainterPropertyGroup):
     def get_group_name(self):
@@ -167,6 +209,28 @@ class PivotPainterCalculatePivotProperties(PivotPainterPropertyGroup):
         unit="LENGTH",
         description="Maximum distance from closest face/vertex to include into mean calculation.")
 
+    use_cache: BoolProperty(
+        name="Use Cache",
+        default=True,
+        description="Store results in objects custom properties and reuse them for objects which geometry, transforms, parent and settings did not change")
+
+    reuse_shapes: BoolProperty(
+        name="Reuse Identical Shapes",
+        default=True,
+        description="Search rotation once for objects of the same level with identical geometry, up to a rigid transform, and identical pivot on it.\nOther objects get the found direction rotated into their placement.\nOnly used with vertex rotations, without parallel processing")
+
+    parallel: BoolProperty(
+        name="Parallel Processing",
+        default=False,
+        description="Solve pivots and rotations of each hierarchy level in background processes.\nOverlap pivots still use Blender and run on the main thread, vertex searches and rotations run in parallel.\nStarting the processes takes time, so use it for large selections")
+
+    num_workers: IntProperty(
+        name="Workers",
+        default=0,
+        min=0,
+        soft_max=64,
+        description="Number of background processes, 0 uses all CPU cores")
+
 
 class PivotPainterCalculateRotationsProperties(PivotPainterPropertyGroup):
     def get_group_name(self):
@@ -193,7 +257,8 @@ class PivotPainterCalculateRotationsProperties(PivotPainterPropertyGroup):
 
     calculation_type_options = [
         ("closest_item", "Closest Item", 'Will use only the closest face/vertex to the parent mesh'),
-        ("mean", "Mean of closest items", 'Will use distance, to find multiple closest face/vertices and calculate their mean.\nIf no items will be found by minimum distance, closest face/vertex will be used.')
+        ("mean", "Mean of closest items", 'Will use distance, to find multiple closest face/vertices and calculate their mean.\nIf no items will be found by minimum distance, closest face/vertex will be used.'),
+        ("principal_axis", "Principal Axis", 'Will use the longest axis of the face/vertex cloud, pointing from pivot towards its furthest side.\nLess sensitive to noise than the mean of furthest items.')
     ]
     calculation_type: bpy.props.EnumProperty(
         items=calculation_type_options,
@@ -221,6 +286,11 @@ class PivotPainterDefaultMeshOperationsProperties(PivotPainterPropertyGroup):
     def get_group_name(self):
         return 'pp_default_mesh_operations'
 
+    instance_aware: BoolProperty(
+        name="Instance Aware",
+        default=True,
+        description="Objects sharing one mesh read it once. Pivots are applied to a shared mesh only when all of its objects need the same change, and per object UVs are refused for shared meshes, instead of overwriting them")
+
     show_split_mesh: BoolProperty(
         name="Show Split Mesh",
         default=True)
@@ -256,6 +326,30 @@ class PivotPainterDefaultMeshOperationsProperties(PivotPainterPropertyGroup):
         name='Base Mesh Index',
     )
 
+    hierarchy_use_cache: BoolProperty(
+        name="Use Overlaps Cache",
+        default=True,
+        description="Store tested object pairs in objects custom properties and reuse them while both objects keep their geometry and world transform")
+
+    hierarchy_parallel: BoolProperty(
+        name="Parallel Overlaps",
+        default=False,
+        description="Test triangles of overlapping candidates in background processes, instead of Blender BVH trees on the main thread.\nStarting the processes takes time, so use it for large selections")
+
+    hierarchy_num_workers: IntProperty(
+        name="Workers",
+        default=0,
+        min=0,
+        soft_max=64,
+        description="Number of background processes, 0 uses all CPU cores")
+
+    hierarchy_bvh_budget: IntProperty(
+        name="BVH Memory (MB)",
+        default=1024,
+        min=0,
+        soft_max=16384,
+        description="Estimated memory BVH trees of overlap tests may take, least recently used trees are dropped and built again when needed.\n0 keeps every tree")
+
     show_generate_distant_hierarchy: BoolProperty(
         name="Show Generate Distant Hierarchy",
         default=True)
@@ -284,6 +378,37 @@ class PivotPainterDefaultMeshOperationsProperties(PivotPainterPropertyGroup):
         name='No Wind Mesh Index',
     )
 
+    show_pipeline: BoolProperty(
+        name="Show Pipeline",
+        default=True)
+
+    pipeline_split: BoolProperty(
+        name="Split Mesh",
+        default=True,
+        description="Split selected meshes by loose parts, later runs reuse the parts")
+
+    pipeline_hierarchy: bpy.props.EnumProperty(
+        items=[
+            ("none", "None", "Keep current hierarchy"),
+            ("overlaps", "Overlaps", "Generate hierarchy from base meshes by overlaps"),
+            ("distant", "Distant", "Generate hierarchy from base distant meshes by closest distance"),
+        ],
+        name="Hierarchy",
+        default="overlaps")
+
+    pipeline_pivots: BoolProperty(
+        name="Pivots and Rotations",
+        default=True)
+
+    pipeline_textures: BoolProperty(
+        name="Create Textures",
+        default=True)
+
+    pipeline_copy_uvs: BoolProperty(
+        name="Copy UVs",
+        default=False,
+        description="Copy generated UVs into Copy UVs Target")
+
 
 property_classes = [
     (PivotPainterTextureProperties, 'pp_texture_properties'),
@@ -71,35 +71,17 @@ def compact_normalized_rgba(rgba):
         (rgba[3] + 1.0) / 2.0]
 
 
-def reorder_selection_by_parents(selection) -> list['bpy.types.Object']:
-    import bpy
-
-    selection_order: dict[int, list[bpy.types.Object]] = {}
-    num_max_parents = 0
-
-    obj: bpy.types.Object
-    for obj in selection:
-        if obj is None or obj.type != 'MESH':
-            continue
+def reorder_selection_by_parents(selection, hierarchy=None) -> list['bpy.types.Object']:
+    """ Mesh objects of selection, deepest in hierarchy first """
+    from .core.ObjectHierarchy import ObjectHierarchy
 
-        obj_parent = obj.parent
-        num_parents = 0
-        while obj_parent:
-            num_parents += 1
-            obj_parent = obj_parent.parent
-
-        if num_max_parents < num_parents:
-            num_max_parents = num_parents
-
-        if num_parents in selection_order:
-            selection_order[num_parents].append(obj)
-        else:
-            selection_order[num_parents] = [obj]
+    meshes = [obj for obj in selection if obj is not None and obj.type == 'MESH']
+    if hierarchy is None:
+        hierarchy = ObjectHierarchy(meshes)
 
-    result_order: list[bpy.types.Object] = []
-    for idx in reversed(range(num_max_parents + 1)):
-        if idx in selection_order:
-            result_order.extend(selection_order[idx])
+    result_order = []
+    for level in reversed(hierarchy.levels(meshes)):
+        result_order.extend(level)
 
     return result_order
 
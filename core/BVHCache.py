@@ -0,0 +1,59 @@
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+from mathutils.bvhtree import BVHTree
+
+# BVHTree does not report its size, it is estimated from its input: copied vertices, triangles and tree nodes over them
+BYTES_PER_VERTEX = 12
+BYTES_PER_TRIANGLE = 96
+
+
+def estimate_tree_bytes(num_vertices: int, num_triangles: int) -> int:
+    return num_vertices * BYTES_PER_VERTEX + num_triangles * BYTES_PER_TRIANGLE
+
+
+class BVHCache:
+    """
+    BVH trees kept within a byte budget, least recently used trees are dropped first and built again when needed.
+    A tree in use stays alive through its caller even when evicted, so budget can be smaller than two trees.
+    Budget 0 keeps every tree.
+    """
+    budget: int
+    num_bytes: int = 0
+    peak_bytes: int = 0
+    num_builds: int = 0
+    num_rebuilds: int = 0
+    num_hits: int = 0
+    __trees: OrderedDict[Hashable, tuple[BVHTree, int]]
+    __built: set[Hashable]
+
+    def __init__(self, budget: int = 0):
+        self.budget = budget
+        self.__trees = OrderedDict()
+        self.__built = set()
+
+    def get(self, key: Hashable, build: Callable[[Hashable], tuple[BVHTree, int]]) -> BVHTree:
+        """ Tree of key, build returns a new tree with its estimated size when it is not cached """
+        if key in self.__trees:
+            self.__trees.move_to_end(key)
+            self.num_hits += 1
+            return self.__trees[key][0]
+
+        tree, num_bytes = build(key)
+        self.num_builds += 1
+        if key in self.__built:
+            self.num_rebuilds += 1
+        self.__built.add(key)
+
+        self.__trees[key] = tree, num_bytes
+        self.num_bytes += num_bytes
+        self.peak_bytes = max(self.peak_bytes, self.num_bytes)
+
+        while self.budget > 0 and self.num_bytes > self.budget and len(self.__trees) > 1:
+            _, (_, evicted_bytes) = self.__trees.popitem(last=False)
+            self.num_bytes -= evicted_bytes
+        return tree
+
+    def clear(self):
+        self.__trees.clear()
+        self.num_bytes = 0
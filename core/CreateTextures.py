@@ -1,6 +1,7 @@
 import os
 import time
 from math import ceil, floor, sqrt
+from typing import Generator
 
 import numpy
 
@@ -8,10 +9,15 @@ from ..Utils import *
 from ..Properties import *
 from ..data.TexturePackingFunctions import TexturePacking
 
+# Objects or pixels processed between two progress updates
+CHUNK_SIZE = 256
+
 
 def find_texture_dimensions(selection: list[bpy.types.Object]) -> list[int]:
-    num_objects = len(selection)
+    return find_texture_dimensions_for_count(len(selection))
+
 
+def find_texture_dimensions_for_count(num_objects: int) -> list[int]:
     decrement_total = 256
 
     half_even_number = ((num_objects / 2) % 2)
@@ -47,45 +53,202 @@ def find_texture_dimensions(selection: list[bpy.types.Object]) -> list[int]:
     return size
 
 
-def create_uv_map(context: bpy.types.Context, selection: list[bpy.types.Object], size: list[int]):
-    properties = get_texture_settings(context)
+def selection_parents(selection: list[bpy.types.Object]) -> numpy.ndarray:
+    """ Selection index of parent of every object, -1 when parent is not selected """
+    indices: dict[bpy.types.Object, int] = {}
+    for idx, obj in enumerate(selection):
+        indices.setdefault(obj, idx)
+    return numpy.array([indices.get(obj.parent, -1) for obj in selection], dtype=numpy.int64)
+
+
+def layout_order(selection: list[bpy.types.Object], layout: str) -> numpy.ndarray:
+    """ Object index for every texel, in texel order """
+    from ..kernels.TexelOrder import morton_order, hierarchy_order
+
+    if layout == 'selection':
+        return numpy.arange(len(selection))
+
+    pivots = numpy.array([obj.matrix_world.to_translation() for obj in selection], dtype=float).reshape(-1, 3)
+    if layout == 'morton':
+        return morton_order(pivots)
+    return hierarchy_order(selection_parents(selection), pivots)
+
 
-    num = 0
+def texel_order(context: bpy.types.Context, selection: list[bpy.types.Object]) -> list[bpy.types.Object]:
+    """
+    Selection in the order objects get texels. Packed parent indices are positions in this order,
+    so they keep pointing at parent texels whatever the layout.
+    """
+    return [selection[idx] for idx in layout_order(selection, get_texture_settings(context).texel_layout)]
+
+
+def texel_indices(size: list[int], count: int) -> numpy.ndarray:
+    """ Pixel index of first count objects, same as get_xy_from_index for every object """
+    indices = numpy.arange(count)
+    return indices % size[0] + (size[1] - indices // size[0] - 1) * size[0]
+
+
+def channels_name(rgb_option: 'PivotPainterTextureTypeData', alpha_option: 'PivotPainterTextureTypeData', is_hdr: bool) -> str:
+    name = rgb_option.suffix()
+    if not rgb_option.rgba():
+        name += '_' + alpha_option.suffix()
+    if is_hdr:
+        name += '_HDR'
+    return name
+
+
+def attribute_name(rgb_option: 'PivotPainterTextureTypeData', alpha_option: 'PivotPainterTextureTypeData', is_hdr: bool) -> str:
+    return 'PivotPainter_' + channels_name(rgb_option, alpha_option, is_hdr)
+
+
+def texture_max_index(rgb_packer: TexturePacking, alpha_packer: TexturePacking, rgba: bool) -> int:
+    if rgba:
+        return rgb_packer.max_index()
+    return max(rgb_packer.max_index(), alpha_packer.max_index())
+
+
+class TextureCreation:
+    """
+    Images, UV maps and attributes created by one run. Images replace older images of the same name and are saved to
+    disk only when the whole run finishes, UV maps and attributes which already existed are written in place, so their
+    values are kept before the first write. A cancelled run is rolled back by removing what it created and restoring
+    what it overwrote, files on disk are left untouched.
+    """
+    images: list[tuple[bpy.types.Image, str]]
+    saves: list[tuple[bpy.types.Image, str, str, str]]
+    uv_layers: list[tuple[bpy.types.Mesh, str]]
+    attributes: list[tuple[bpy.types.Mesh, str]]
+    uv_values: dict[tuple[bpy.types.Mesh, str], numpy.ndarray]
+    attribute_values: dict[tuple[bpy.types.Mesh, str], tuple[str, str, numpy.ndarray]]
+
+    def __init__(self):
+        self.images = []
+        self.saves = []
+        self.uv_layers = []
+        self.attributes = []
+        self.uv_values = {}
+        self.attribute_values = {}
+
+    def save_image(self, image: bpy.types.Image, image_path: str, file_format: str, color_depth: str):
+        """ Remembers image to be saved with given format once the run finishes """
+        self.saves.append((image, image_path, file_format, color_depth))
+
+    def keep_uv_layer(self, mesh: bpy.types.Mesh, uv_layer: bpy.types.MeshUVLoopLayer):
+        """ Remembers values of UV layer which existed before the run, before it is overwritten """
+        if (mesh, uv_layer.name) in self.uv_values or (mesh, uv_layer.name) in self.uv_layers:
+            return
+        values = numpy.empty(len(uv_layer.data) * 2, dtype=numpy.float32)
+        uv_layer.data.foreach_get('uv', values)
+        self.uv_values[(mesh, uv_layer.name)] = values
+
+    def keep_color_attribute(self, mesh: bpy.types.Mesh, attribute: bpy.types.Attribute):
+        """ Remembers type, domain and values of color attribute which existed before the run, before it is overwritten or replaced """
+        if (mesh, attribute.name) in self.attribute_values or (mesh, attribute.name) in self.attributes:
+            return
+        values = numpy.empty(len(attribute.data) * 4, dtype=numpy.float32)
+        attribute.data.foreach_get('color', values)
+        self.attribute_values[(mesh, attribute.name)] = attribute.data_type, attribute.domain, values
+
+    def finish(self, context: bpy.types.Context) -> list[str]:
+        """ Returns names of created images """
+        properties = get_texture_settings(context)
+        names = [texture_name for _, texture_name in self.images]
+        for image, texture_name in self.images:
+            if not properties.create_new:
+                for img in list(bpy.data.images):
+                    if img.name == texture_name and img != image:
+                        bpy.data.images.remove(img)
+            image.name = texture_name
+
+        image_settings = bpy.context.scene.render.image_settings
+        image_settings.color_mode = 'RGBA'
+        for image, image_path, file_format, color_depth in self.saves:
+            image_settings.file_format = file_format
+            image_settings.color_depth = color_depth
+            image.save_render(image_path)
+        self.__clear()
+        return names
+
+    def rollback(self):
+        for image, _ in self.images:
+            bpy.data.images.remove(image)
+        for mesh, uv_map_name in self.uv_layers:
+            uv_layer = mesh.uv_layers.get(uv_map_name)
+            if uv_layer is not None:
+                mesh.uv_layers.remove(uv_layer)
+        for mesh, attribute_name in self.attributes:
+            attribute = mesh.color_attributes.get(attribute_name)
+            if attribute is not None:
+                mesh.color_attributes.remove(attribute)
+
+        for (mesh, uv_map_name), values in self.uv_values.items():
+            uv_layer = mesh.uv_layers.get(uv_map_name)
+            if uv_layer is not None:
+                uv_layer.data.foreach_set('uv', values)
+        # Replaced attributes were removed above, they are created again with their old type
+        for (mesh, attribute_name), (data_type, domain, values) in self.attribute_values.items():
+            attribute = mesh.color_attributes.get(attribute_name)
+            if attribute is None:
+                attribute = mesh.color_attributes.new(name=attribute_name, type=data_type, domain=domain)
+            attribute.data.foreach_set('color', values)
+        self.__clear()
+
+    def __clear(self):
+        self.images = []
+        self.saves = []
+        self.uv_layers = []
+        self.attributes = []
+        self.uv_values = {}
+        self.attribute_values = {}
+
+
+def create_uv_map(context: bpy.types.Context, selection: list[bpy.types.Object], size: list[int]):
+    progress = ProgressBar('Creating UV Maps', len(selection))
+    done = 0
+    # Same texels as create_textures gives to the same selection
+    for done_now in create_uv_map_steps(context, texel_order(context, selection), size):
+        progress += done_now - done
+        done = done_now
+    progress.finish()
 
     bpy.ops.object.select_all(action='DESELECT')
+    for obj in selection:
+        obj.select_set(True)
+
+
+def create_uv_map_steps(context: bpy.types.Context, selection: list[bpy.types.Object], size: list[int], creation: TextureCreation = None) -> Generator[int, None, None]:
+    """ Writes UV of every object pixel, selection is in texel order, yields number of processed objects after every chunk """
+    properties = get_texture_settings(context)
+
+    # Instances would overwrite each other pixel, their shared meshes are left as they are
+    shared_meshes = set()
+    if get_mesh_operations_settings(context).instance_aware:
+        from .MeshInstances import shared_mesh_conflicts
+        shared_meshes = set(shared_mesh_conflicts(selection).keys())
 
     half_pixel_x = 1.0 / size[0]
     half_pixel_y = 1.0 / size[1]
 
-    progress = ProgressBar('Creating UV Maps', len(selection))
-
-    step = ceil(len(selection) * 0.01)
     for idx, obj in enumerate(selection):
-        if obj is None or obj.data is None or obj.type != 'MESH':
-            if idx % step == step - 1:
-                progress += step
+        if idx % CHUNK_SIZE == CHUNK_SIZE - 1:
+            yield idx
+        if obj is None or obj.data is None or obj.type != 'MESH' or obj.data in shared_meshes:
             continue
 
-        obj.select_set(True)
-
         obj_mesh: bpy.types.Mesh = obj.data
 
-        # print("Create UV Map for object %i of %i" % (idx, len(selection)))
-
-        uv_layer: bpy.types.MeshUVLoopLayer | None = None
-        for uv in obj_mesh.uv_layers:
-            if uv.name == properties.uv_map_name:
-                uv_layer = uv
-
+        uv_layer: bpy.types.MeshUVLoopLayer | None = obj_mesh.uv_layers.get(properties.uv_map_name)
+        if uv_layer is not None and creation is not None:
+            creation.keep_uv_layer(obj_mesh, uv_layer)
         if uv_layer is None:
             uv_layer = obj_mesh.uv_layers.new(name=properties.uv_map_name)
+            if uv_layer is not None and creation is not None:
+                creation.uv_layers.append((obj_mesh, properties.uv_map_name))
 
-        obj_mesh.uv_layers.active = uv_layer
-
-        if not uv_layer.active:
-            obj.select_set(False)
+        if uv_layer is None:
             return
 
+        obj_mesh.uv_layers.active = uv_layer
         uv_layer.active_render = True
 
         x, y = get_xy_from_index(size, idx)
@@ -96,21 +259,14 @@ def create_uv_map(context: bpy.types.Context, selection: list[bpy.types.Object],
         x *= half_pixel_x
         y *= half_pixel_y
 
-        for poly in obj_mesh.polygons:
-            for loopId in poly.loop_indices:
-                uv_layer.data[loopId].uv = (x, y)
-
-        num += 1
-        obj.select_set(False)
-        if idx % step == step - 1:
-            progress += step
+        # Every loop of the object gets the same pixel center
+        uv_layer.data.foreach_set('uv', numpy.tile(numpy.array((x, y), dtype=numpy.float32), len(obj_mesh.loops)))
 
-    bpy.ops.object.select_all(action='DESELECT')
-    for idx, obj in enumerate(selection):
-        obj.select_set(True)
+    yield len(selection)
 
 
-def create_texture(operator: bpy.types.Operator, context: bpy.types.Context, selection: list[bpy.types.Object], progress_bar: ProgressBar, size: list[int], texture_idx: int):
+def create_texture_steps(operator: bpy.types.Operator, context: bpy.types.Context, selection: list[bpy.types.Object], size: list[int], texture_idx: int, creation: TextureCreation, hierarchy: 'ObjectHierarchy' = None, name_prefix: str = None) -> Generator[float, None, None]:
+    """ Packs and creates one texture, marks it for saving, yields finished fraction of it after every chunk. Texture is named after name_prefix, first object by default """
     properties = get_texture_settings(context)
     textures_list = get_textures_list_settings(context)
 
@@ -120,57 +276,62 @@ def create_texture(operator: bpy.types.Operator, context: bpy.types.Context, sel
     rgb_option = textures_list[texture_idx].get_rgb_option()
     alpha_option = textures_list[texture_idx].get_alpha_option()
 
-    from ..data.TexturePackingFunctions import TexturePacking
-    rgb_packer: TexturePacking = rgb_option.packer(context, selection, is_hdr)
-    alpha_packer: TexturePacking = alpha_option.packer(context, selection, is_hdr)
+    rgb_packer: TexturePacking = rgb_option.packer(context, selection, is_hdr, hierarchy)
+    alpha_packer: TexturePacking = alpha_option.packer(context, selection, is_hdr, hierarchy)
 
     if not rgb_packer.support_type(is_hdr) or (not rgb_option.rgba() and not alpha_packer.support_type(is_hdr)):
         operator.report({'ERROR'}, 'Texture ' + str(texture_idx) + ' has HDR mismatches.')
         return
 
-    texture_name = selection[0].name + '_' + rgb_option.suffix()
-    if not rgb_option.rgba():
-        texture_name += '_' + alpha_option.suffix()
-    if is_hdr:
-        texture_name += '_HDR'
+    from ..kernels.TextureEncoding import select_index_encoding
+    index_encoding = select_index_encoding(textures_list[texture_idx].index_encoding, texture_max_index(rgb_packer, alpha_packer, rgb_option.rgba()))
+    rgb_packer.set_index_encoding(index_encoding)
+    alpha_packer.set_index_encoding(index_encoding)
+
+    pixels: list[float] = []
+    for fraction in set_pixels_steps(selection, rgb_packer, alpha_packer, rgb_option.rgba(), size, pixels):
+        yield fraction * 0.9
 
-    # Check if there is already the texture, else create new.
-    if not properties.create_new:
-        for img in bpy.data.images:
-            if img.name == texture_name:
-                bpy.data.images.remove(img)
+    if properties.output_mode == 'attributes':
+        from .VertexAttributes import write_attributes_steps
+
+        # Every object gets the values of its texture pixel
+        values = numpy.array(pixels, dtype=numpy.float32).reshape(-1, 4)[texel_indices(size, len(selection))]
+        name = attribute_name(rgb_option, alpha_option, is_hdr)
+        for num_done in write_attributes_steps(selection, values, name, properties.attribute_type, creation):
+            yield 0.9 + 0.1 * num_done / max(len(selection), 1)
+        return
 
+    texture_name = (selection[0].name if name_prefix is None else name_prefix) + '_' + channels_name(rgb_option, alpha_option, is_hdr)
+
+    # Named after the run finishes, older texture with the same name is kept until then
     image = bpy.data.images.new(name=texture_name, width=size[0], height=size[1], float_buffer=is_hdr, is_data=True)
-    image.pixels = set_pixels(selection, rgb_packer, alpha_packer, rgb_option.rgba(), progress_bar, size)
+    creation.images.append((image, texture_name))
+    image.pixels = pixels
 
     if not properties.save_textures:
         return
 
-    image_settings = bpy.context.scene.render.image_settings
-    image_settings.color_mode = 'RGBA'
+    # Saved once the run finishes, a cancelled run leaves older files on disk as they were
     if is_hdr:
-        image_path = bpy.path.abspath(properties.folder_path) + image.name + '.exr'
-        image_settings.file_format = 'OPEN_EXR'
-        image_settings.color_depth = '16'
+        # Full float indices would lose their lower bits in half floats
+        creation.save_image(image, bpy.path.abspath(properties.folder_path) + texture_name + '.exr', 'OPEN_EXR', '32' if index_encoding == 'float' else '16')
     else:
-        image_path = bpy.path.abspath(properties.folder_path) + image.name + '.png'
-        image_settings.file_format = 'PNG'
-        image_settings.color_depth = '8'
-
-    image.save_render(image_path)
+        creation.save_image(image, bpy.path.abspath(properties.folder_path) + texture_name + '.png', 'PNG', '8')
 
 
-def set_pixels(selection: list[bpy.types.Object], rgb_packer: TexturePacking, alpha_packer: TexturePacking, rgba: bool, progress_bar: ProgressBar, size: list[int]) -> list[float]:
-    pixels: list[float] = numpy.ones(size[0] * size[1] * 4, dtype=float).tolist()
+def set_pixels_steps(selection: list[bpy.types.Object], rgb_packer: TexturePacking, alpha_packer: TexturePacking, rgba: bool, size: list[int], pixels: list[float]) -> Generator[float, None, None]:
+    """ Fills pixels list with packed values, yields finished fraction after every chunk """
+    pixels.extend(numpy.ones(size[0] * size[1] * 4, dtype=float).tolist())
 
     if rgba:
         has_post_process = rgb_packer.has_post_process()
     else:
         has_post_process = rgb_packer.has_post_process() or alpha_packer.has_post_process()
 
-    local_progress_bar = progress_bar.new_sub_progress('Preparing pixel data {1} of {0} pixels', len(selection) + ((size[0] * size[1] / 4) if has_post_process else 0))
+    num_post_process = size[0] * size[1] // 4 if has_post_process else 0
+    total = max(len(selection) + num_post_process, 1)
 
-    step = ceil(len(selection) * 0.01)
     for idx in range(len(selection)):
         obj = selection[idx]
 
@@ -187,14 +348,11 @@ def set_pixels(selection: list[bpy.types.Object], rgb_packer: TexturePacking, al
         pixels[pixel_index * 4 + 1] = rgb_values[1]
         pixels[pixel_index * 4 + 2] = rgb_values[2]
         pixels[pixel_index * 4 + 3] = alpha_value
-        if idx % step == step - 1:
-            local_progress_bar += step
-
-    step = ceil((size[0] * size[1] / 4) * 0.01)
-    step_idx = 0
+        if idx % CHUNK_SIZE == CHUNK_SIZE - 1:
+            yield idx / total
 
     if has_post_process:
-        for idx in range(0, size[0] * size[1], 4):
+        for step_idx, idx in enumerate(range(0, size[0] * size[1], 4)):
             if rgba:
                 if rgb_packer.has_post_process():
                     pixels[idx:idx + 3] = rgb_packer.post_process(pixels[idx:idx + 3])
@@ -203,31 +361,36 @@ def set_pixels(selection: list[bpy.types.Object], rgb_packer: TexturePacking, al
                     pixels[idx:idx + 2] = rgb_packer.post_process(pixels[idx:idx + 2])
                 if alpha_packer.has_post_process():
                     pixels[idx + 3] = alpha_packer.post_process(pixels[idx + 3])
-            step_idx += 1
-            if step_idx % step == step - 1:
-                local_progress_bar += step
-
-    local_progress_bar.finish()
+            if step_idx % CHUNK_SIZE == CHUNK_SIZE - 1:
+                yield (len(selection) + step_idx) / total
 
-    return pixels
+    yield 1.0
 
 
-def create_textures(operator: bpy.types.Operator, context: bpy.types.Context):
+def validate_textures(operator: bpy.types.Operator, context: bpy.types.Context, objects: list[bpy.types.Object] = None) -> list[bpy.types.Object] | None:
+    """ Reports the first problem and returns None, or returns mesh objects textures are created for, selected objects by default """
     properties = get_texture_settings(context)
     textures_list = get_textures_list_settings(context)
     units = context.scene.unit_settings
 
     selection: list[bpy.types.Object] = []
-    for obj in context.selected_objects:
+    for obj in (context.selected_objects if objects is None else objects):
         if obj is None or obj.type != 'MESH':
             continue
         selection.append(obj)
 
+    if get_mesh_operations_settings(context).instance_aware:
+        from .MeshInstances import shared_mesh_conflicts, report_conflicts
+        conflicts = [obj for users in shared_mesh_conflicts(selection).values() for obj in users]
+        if len(conflicts) > 0:
+            report_conflicts(operator, conflicts, "%d objects share meshes, but every object needs its own texture pixel UVs")
+            return None
+
     # Check that saving texture to file is possible
-    if properties.save_textures:
+    if properties.save_textures and properties.output_mode == 'texture':
         if not os.path.exists(bpy.path.abspath(properties.folder_path)):
             operator.report({'ERROR'}, 'Incorrect Save location ' + str(properties.folder_path))
-            return False
+            return None
 
     not_supported_texture = -1
     test_selection_order = False
@@ -236,26 +399,14 @@ def create_textures(operator: bpy.types.Operator, context: bpy.types.Context):
         if textures_list[idx].rgb == 'None' and textures_list[idx].alpha == 'None':
             continue
 
-        # Find if rgb and alpha use HDR and what the alpha channel is set to store
+        # Find if rgb and alpha use HDR and what the alpha channel is set to store, packers are not needed for it
         rgb_option = textures_list[idx].get_rgb_option()
-        rgb_packer = rgb_option.packer(context, selection, textures_list[idx].generate_hdr)
         alpha_option = textures_list[idx].get_alpha_option()
-        alpha_packer = alpha_option.packer(context, selection, textures_list[idx].generate_hdr)
-
-        if textures_list[idx].generate_hdr:
-            if not rgb_packer.support_hdr:
-                not_supported_texture = idx
-                break
-            if not rgb_option.rgba() and not alpha_packer.support_hdr:
-                not_supported_texture = idx
-                break
-        else:
-            if not rgb_packer.support_ldr:
-                not_supported_texture = idx
-                break
-            if not rgb_option.rgba() and not alpha_packer.support_ldr:
-                not_supported_texture = idx
-                break
+
+        is_hdr = textures_list[idx].generate_hdr
+        if not rgb_option.support_type(is_hdr) or (not rgb_option.rgba() and not alpha_option.support_type(is_hdr)):
+            not_supported_texture = idx
+            break
 
         if rgb_option.test_selection_order() or (not rgb_option.rgba() and alpha_option.test_selection_order()):
             test_selection_order = True
@@ -274,45 +425,113 @@ def create_textures(operator: bpy.types.Operator, context: bpy.types.Context):
             else:
                 operator.report({'INFO'}, " Objects missing 'SelectionOrder' property : " + str(objects_without_order))
                 operator.report({'ERROR'}, str(len(objects_without_order)) + " Objects missing 'SelectionOrder' property\nList of the objects in the console. ")
-            return False
+            return None
+
+    # Only HDR textures store indices, their packers are created once just for the largest index
+    from ..kernels.TextureEncoding import select_index_encoding, INDEX_LIMITS
+    for idx in range(len(textures_list)):
+        if not textures_list[idx].generate_hdr:
+            continue
+        rgb_option = textures_list[idx].get_rgb_option()
+        rgb_packer = rgb_option.packer(context, selection, True)
+        alpha_packer = textures_list[idx].get_alpha_option().packer(context, selection, True)
+        max_index = texture_max_index(rgb_packer, alpha_packer, rgb_option.rgba())
+        mode = textures_list[idx].index_encoding
+        if select_index_encoding(mode, max_index) is None:
+            limit = INDEX_LIMITS['float' if mode == 'auto' else mode]
+            operator.report({'ERROR'}, "Texture " + str(idx + 1) + " stores indices up to " + str(max_index) + ", but its index encoding holds only up to " + str(limit))
+            return None
 
     # Numerous checks that everything is fine
     if units.system != 'METRIC' or units.scale_length != 1.0:
         operator.report({'ERROR'}, "Scene units must be Metric with a Unit Scale of 1.0, now its " + str(units.scale_length) + "!")
-        return False
+        return None
     if len(selection) < 2:
         operator.report({'ERROR'}, "2 or more object must be selected!")
-        return False
-    if properties.save_textures and properties.folder_path == '':
+        return None
+    if properties.save_textures and properties.output_mode == 'texture' and properties.folder_path == '':
         operator.report({'ERROR'}, "No specified folder path")
-        return False
+        return None
     if not_supported_texture != -1:
         operator.report({'ERROR'}, "Texture " + str(not_supported_texture + 1) + " has errors")
-        return False
+        return None
 
     textures_list = get_textures_list_settings(context)
 
     if len(textures_list) == 0:
         operator.report({'ERROR'}, "No textures configured for export")
-        return
+        return None
+
+    if properties.output_mode == 'attributes' and properties.attribute_type == 'uv':
+        from .VertexAttributes import objects_without_uv_room
+
+        names = []
+        for texture in textures_list:
+            if texture.rgb == 'none' and texture.alpha == 'none':
+                continue
+            name = attribute_name(texture.get_rgb_option(), texture.get_alpha_option(), texture.generate_hdr)
+            names += [name + '_RG', name + '_BA']
+        objects = objects_without_uv_room(selection, names)
+        if len(objects) > 0:
+            operator.report({'ERROR'}, str(len(objects)) + " objects have no room for " + str(len(names)) + " more UV maps, for example \"" + objects[0].name + "\"")
+            return None
+
+    return selection
+
+
+def create_textures_steps(operator: bpy.types.Operator, context: bpy.types.Context, selection: list[bpy.types.Object], creation: TextureCreation, hierarchy: 'ObjectHierarchy' = None) -> Generator[tuple[str, float], None, None]:
+    """
+    Creates UV map and every texture in small chunks, yields description of current stage and finished fraction
+    of the whole run after every chunk. Nothing is replaced until creation is finished.
+    """
+    textures_list = get_textures_list_settings(context)
+    texture_indices = [idx for idx in range(len(textures_list)) if not (textures_list[idx].rgb == 'none' and textures_list[idx].alpha == 'none')]
+    num_stages = len(texture_indices) + 1
 
-    size = find_texture_dimensions(selection)
-    create_uv_map(context, selection, size)
+    writes_attributes = get_texture_settings(context).output_mode == 'attributes'
 
-    progress = ProgressBar('Creating textures {1} of {0}', len(textures_list))
+    # Textures keep their name whatever the layout
+    name_prefix = selection[0].name
+    selection = texel_order(context, selection)
 
-    # Start the texture creation for each one set
-    for idx in range(len(textures_list)):
-        if textures_list[idx].rgb == 'none' and textures_list[idx].alpha == 'none':
-            progress += 1
-            continue
-        create_texture(operator, context, selection, progress, size, idx)
+    # Attributes carry the values themselves, objects need no texture pixel UVs
+    size = find_texture_dimensions(selection)
+    if not writes_attributes:
+        for num_done in create_uv_map_steps(context, selection, size, creation):
+            yield 'Creating UV Maps', num_done / max(len(selection), 1) / num_stages
 
-    progress.finish()
+    # Every packer of every texture reads the same hierarchy
+    if hierarchy is None:
+        from .ObjectHierarchy import ObjectHierarchy
+        hierarchy = ObjectHierarchy(selection)
 
-    bpy.ops.object.select_all(action='DESELECT')
+    for stage, idx in enumerate(texture_indices):
+        description = ('Writing attributes %d of %d' if writes_attributes else 'Creating texture %d of %d') % (stage + 1, len(texture_indices))
+        for fraction in create_texture_steps(operator, context, selection, size, idx, creation, hierarchy, name_prefix):
+            yield description, (stage + 1 + fraction) / num_stages
+        yield description, (stage + 2) / num_stages
 
+    bpy.ops.object.select_all(action='DESELECT')
     for obj in selection:
         obj.select_set(True)
 
-    return True
+
+def create_textures(operator: bpy.types.Operator, context: bpy.types.Context, objects: list[bpy.types.Object] = None, hierarchy: 'ObjectHierarchy' = None) -> list[str] | None:
+    """ Returns names of created images, None when nothing could be created """
+    selection = validate_textures(operator, context, objects)
+    if selection is None:
+        return None
+
+    creation = TextureCreation()
+    progress = ProgressBar('Creating textures', 100)
+    done = 0
+    try:
+        for _, fraction in create_textures_steps(operator, context, selection, creation, hierarchy):
+            progress += fraction * 100 - done
+            done = fraction * 100
+    except Exception:
+        creation.rollback()
+        raise
+    progress.finish()
+
+    return creation.finish(context)
@@ -0,0 +1,114 @@
+import bpy
+import numpy as np
+
+
+def read_local_coords(mesh: bpy.types.Mesh) -> np.ndarray:
+    coords = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get('co', coords)
+    return coords.reshape(-1, 3).astype(float)
+
+
+def matrix_to_array(matrix) -> np.ndarray:
+    return np.array(matrix, dtype=float)
+
+
+def transform_coords(coords: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+    return coords @ matrix[:3, :3].T + matrix[:3, 3]
+
+
+def read_world_coords(obj: bpy.types.Object) -> np.ndarray:
+    return transform_coords(read_local_coords(obj.data), matrix_to_array(obj.matrix_world))
+
+
+class WorldCoordsCache:
+    """
+    World coordinates read once per object and shared between operations, valid while objects keep their world placement.
+    Instances of one mesh read it once and only transform it by their own world matrix.
+    """
+    __coords: dict[bpy.types.Object, np.ndarray]
+    __mesh_coords: dict[bpy.types.Mesh, np.ndarray]
+    __mesh_triangles: dict[bpy.types.Mesh, np.ndarray]
+
+    def __init__(self):
+        self.__coords = {}
+        self.__mesh_coords = {}
+        self.__mesh_triangles = {}
+
+    def get(self, obj: bpy.types.Object) -> np.ndarray:
+        if obj not in self.__coords:
+            if obj.data not in self.__mesh_coords:
+                self.__mesh_coords[obj.data] = read_local_coords(obj.data)
+            self.__coords[obj] = transform_coords(self.__mesh_coords[obj.data], matrix_to_array(obj.matrix_world))
+        return self.__coords[obj]
+
+    def triangles(self, obj: bpy.types.Object) -> np.ndarray:
+        """ Loop triangles of object mesh """
+        if obj.data not in self.__mesh_triangles:
+            self.__mesh_triangles[obj.data] = read_loop_triangles(obj.data)[0]
+        return self.__mesh_triangles[obj.data]
+
+    def forget_meshes(self):
+        """ Must be called after mesh data was changed, world coordinates of objects already read stay """
+        self.__mesh_coords = {}
+        self.__mesh_triangles = {}
+
+
+def write_local_coords(mesh: bpy.types.Mesh, coords: np.ndarray):
+    mesh.vertices.foreach_set('co', np.ascontiguousarray(coords, dtype=np.float32).ravel())
+
+
+def read_loop_vertex_indices(mesh: bpy.types.Mesh) -> np.ndarray:
+    indices = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get('vertex_index', indices)
+    return indices
+
+
+def read_edge_vertex_indices(mesh: bpy.types.Mesh) -> np.ndarray:
+    indices = np.empty(len(mesh.edges) * 2, dtype=np.int32)
+    mesh.edges.foreach_get('vertices', indices)
+    return indices.reshape(-1, 2)
+
+
+def read_polygon_loop_starts(mesh: bpy.types.Mesh) -> np.ndarray:
+    starts = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get('loop_start', starts)
+    return starts
+
+
+def mesh_hash(mesh: bpy.types.Mesh) -> bytes:
+    """ Exact hash of mesh vertex coordinates and face topology """
+    import hashlib
+
+    coords = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get('co', coords)
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(coords.tobytes())
+    digest.update(read_loop_vertex_indices(mesh).tobytes())
+    digest.update(read_polygon_loop_starts(mesh).tobytes())
+    return digest.digest()
+
+
+def read_loop_triangles(mesh: bpy.types.Mesh) -> tuple[np.ndarray, np.ndarray]:
+    """ Vertex indices of every loop triangle and index of polygon it belongs to """
+    mesh.calc_loop_triangles()
+    triangles = np.empty(len(mesh.loop_triangles) * 3, dtype=np.int32)
+    mesh.loop_triangles.foreach_get('vertices', triangles)
+    polygon_indices = np.empty(len(mesh.loop_triangles), dtype=np.int32)
+    mesh.loop_triangles.foreach_get('polygon_index', polygon_indices)
+    return triangles.reshape(-1, 3), polygon_indices
+
+
+def polygon_centers(mesh: bpy.types.Mesh, coords: np.ndarray) -> np.ndarray:
+    """ Median center of every polygon, same as BMFace.calc_center_median, from given vertex coordinates """
+    if len(mesh.polygons) == 0:
+        return np.zeros((0, 3))
+    loop_starts = read_polygon_loop_starts(mesh)
+    loop_totals = np.diff(np.append(loop_starts, len(mesh.loops)))
+    return np.add.reduceat(coords[read_loop_vertex_indices(mesh)], loop_starts, axis=0) / loop_totals[:, None]
+
+
+def create_bvh_tree(coords: np.ndarray, triangles: np.ndarray, epsilon: float = 0.0):
+    """ BVH tree of triangles, overlap and ray cast results index given triangles """
+    from mathutils.bvhtree import BVHTree
+    return BVHTree.FromPolygons(coords.tolist(), triangles.tolist(), all_triangles=True, epsilon=epsilon)
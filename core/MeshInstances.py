@@ -0,0 +1,35 @@
+import bpy
+
+
+def group_by_mesh(objects: list[bpy.types.Object]) -> dict[bpy.types.Mesh, list[bpy.types.Object]]:
+    """ Objects grouped by the mesh datablock they use, in given order """
+    by_mesh: dict[bpy.types.Mesh, list[bpy.types.Object]] = {}
+    for obj in objects:
+        by_mesh.setdefault(obj.data, []).append(obj)
+    return by_mesh
+
+
+def mesh_users(meshes: list[bpy.types.Mesh]) -> dict[bpy.types.Mesh, list[bpy.types.Object]]:
+    """ Every object in blend file using one of meshes, found in one pass over objects """
+    if len(meshes) == 0:
+        return {}
+
+    meshes = set(meshes)
+    users: dict[bpy.types.Mesh, list[bpy.types.Object]] = {}
+    for obj in bpy.data.objects:
+        if obj.data in meshes:
+            users.setdefault(obj.data, []).append(obj)
+    return users
+
+
+def shared_mesh_conflicts(objects: list[bpy.types.Object]) -> dict[bpy.types.Mesh, list[bpy.types.Object]]:
+    """ Meshes used by more than one of objects, where per object mesh data can not be written without clobbering others """
+    return {mesh: users for mesh, users in group_by_mesh([obj for obj in objects if obj.type == 'MESH']).items() if len(users) > 1}
+
+
+def report_conflicts(operator: bpy.types.Operator, objects: list[bpy.types.Object], message: str, level: str = 'ERROR'):
+    """ Reports objects sharing a mesh, listing first names """
+    if len(objects) == 0:
+        return
+    names = ', '.join(obj.name for obj in objects[:4]) + (', ...' if len(objects) > 4 else '')
+    operator.report({level}, message % len(objects) + ' (' + names + '). Make them single user to process them separately.')
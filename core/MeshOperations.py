@@ -1,12 +1,13 @@
 import time
 
 import bpy
-import mathutils.kdtree
+import numpy as np
 
 
-def split_mesh(selection: list[bpy.types.Object]):
-    from math import ceil
+def split_mesh(selection: list[bpy.types.Object], operator: bpy.types.Operator = None) -> list[bpy.types.Object]:
+    """ Returns created split parts. Objects with data the bulk split can not carry over are separated with operators """
     from ..Utils import ProgressBar
+    from .MeshSplit import split_object, unsupported_data, separate_objects
 
     collection: bpy.types.Collection = None
     new_collection_name: str = None
@@ -19,38 +20,49 @@ def split_mesh(selection: list[bpy.types.Object]):
         break
 
     if new_collection_name is None:
-        return False
+        return []
 
     new_collection = bpy.data.collections.new("PivotPainter_" + new_collection_name)
 
     if new_collection is not None:
         collection.children.link(new_collection)
 
-    bpy.ops.object.duplicate(linked=False)
+    progress_bar = ProgressBar("Split {1} of {0} objects", len(selection))
 
-    bpy.ops.mesh.separate(type='LOOSE')
+    new_selection: list[bpy.types.Object] = []
+    separated: list[bpy.types.Object] = []
+    for obj in selection:
+        unsupported = unsupported_data(obj)
+        if len(unsupported) > 0:
+            separated.append(obj)
+            if operator is not None:
+                operator.report({'INFO'}, "\"" + obj.name + "\" has " + ", ".join(unsupported) + ", it is separated with operators")
+        else:
+            new_selection += split_object(obj, new_collection)
+        progress_bar += 1
 
-    new_selection = bpy.context.selected_objects
+    progress_bar.finish()
 
-    progress_bar = ProgressBar("Move {1} of {0} objects to collection", len(new_selection))
-    step = ceil(len(new_selection) * 0.01)
+    if len(separated) > 0:
+        new_selection += separate_objects(separated, new_collection)
+        if operator is not None:
+            operator.report({'WARNING'}, "%d objects were separated with slower operators to keep their vertex groups, shape keys, modifiers or attributes, list of the objects in the console" % len(separated))
 
-    idx = 0
+    # Same selection as after separating, split parts selected and originals hidden
+    for obj in selection:
+        obj.select_set(False)
     for obj in new_selection:
-        if obj.users_collection is not None:
-            for obj_collection in obj.users_collection:
-                if obj_collection is not None:
-                    obj_collection.objects.unlink(obj)
-        new_collection.objects.link(obj)
-        idx += 1
-        if idx % step == step - 1:
-            progress_bar += step
+        obj.select_set(True)
+    if len(new_selection) > 0:
+        bpy.context.view_layer.objects.active = new_selection[0]
 
     for obj in selection:
         obj.hide_set(True)
 
+    return new_selection
 
-def generate_hierarchy(operator: bpy.types.Operator, context: bpy.types.Context, selection: list[bpy.types.Object]):
+
+def generate_hierarchy(operator: bpy.types.Operator, context: bpy.types.Context, selection: list[bpy.types.Object], world_coords: 'WorldCoordsCache' = None):
     from ..Properties import get_mesh_operations_settings
 
     properties = get_mesh_operations_settings(context)
@@ -79,14 +91,14 @@ def generate_hierarchy(operator: bpy.types.Operator, context: bpy.types.Context,
         operator.report({'ERROR'}, "Only base mesh objects selected. Possible children objects must be selected.")
         return False
 
-    return generate_hierarchy_from_base_meshes(operator, base_mesh_objects, leaves_selection)
+    return generate_hierarchy_from_base_meshes(operator, base_mesh_objects, leaves_selection, properties.hierarchy_parallel, properties.hierarchy_num_workers, properties.hierarchy_use_cache, world_coords, properties.hierarchy_bvh_budget * 1024 * 1024)
 
 
-def generate_hierarchy_from_base_meshes(operator: bpy.types.Operator, base_mesh_objects: set[bpy.types.Object], leaves_selection: list[bpy.types.Object]):
+def generate_hierarchy_from_base_meshes(operator: bpy.types.Operator, base_mesh_objects: set[bpy.types.Object], leaves_selection: list[bpy.types.Object], parallel: bool = False, num_workers: int = 0, use_cache: bool = False, world_coords: 'WorldCoordsCache' = None, bvh_budget: int = 0):
     from math import ceil
     from ..Utils import ProgressBar
 
-    obj_to_overlaps: dict[bpy.types.Object, set[bpy.types.Object]] = create_overlaps_dict(list(base_mesh_objects) + leaves_selection)
+    obj_to_overlaps: dict[bpy.types.Object, set[bpy.types.Object]] = create_overlaps_dict(list(base_mesh_objects) + leaves_selection, operator, parallel, num_workers, use_cache, world_coords, bvh_budget)
 
     def remove_overlap(obj: bpy.types.Object, obj2: bpy.types.Object):
         nonlocal obj_to_overlaps
@@ -158,79 +170,171 @@ def generate_hierarchy_from_base_meshes(operator: bpy.types.Operator, base_mesh_
     return True
 
 
-def create_overlaps_dict(objects: list[bpy.types.Object]) -> dict[bpy.types.Object, set[bpy.types.Object]]:
-    import bmesh
+def __find_overlaps_parallel(objects: list[bpy.types.Object], coords: list[np.ndarray], world_coords: 'WorldCoordsCache', candidates: np.ndarray, firsts: np.ndarray, seconds: np.ndarray, num_workers: int) -> np.ndarray:
+    """ Tests candidate pairs triangles in worker processes, returns which pairs overlap """
+    from ..kernels.WorkerPool import share_arrays, release_arrays, kernel_module, create_pool, split_ranges, worker_count
+
+    candidate_coords: list[np.ndarray] = []
+    triangles: list[np.ndarray] = []
+    triangle_offsets = np.zeros(len(objects) + 1, dtype=np.int64)
+    num_coords = 0
+    is_candidate = np.zeros(len(objects), dtype=bool)
+    is_candidate[candidates] = True
+    for obj_idx, obj in enumerate(objects):
+        num_triangles = 0
+        if is_candidate[obj_idx]:
+            obj_triangles = world_coords.triangles(obj).astype(np.int64) + num_coords
+            candidate_coords.append(coords[obj_idx])
+            triangles.append(obj_triangles)
+            num_coords += len(coords[obj_idx])
+            num_triangles = len(obj_triangles)
+        triangle_offsets[obj_idx + 1] = triangle_offsets[obj_idx] + num_triangles
+
+    blocks, descriptors = share_arrays({
+        'coords': np.concatenate(candidate_coords),
+        'triangles': np.concatenate(triangles) if len(triangles) > 0 else np.zeros((0, 3), dtype=np.int64),
+        'triangle_offsets': triangle_offsets,
+        'firsts': firsts,
+        'seconds': seconds,
+    })
+
+    solver = kernel_module('TriangleIntersection')
+    pool = create_pool(num_workers)
+    try:
+        ranges = split_ranges(len(firsts), worker_count(num_workers) * 4)
+        futures = [pool.submit(solver.overlapping_pairs, descriptors, start, stop) for start, stop in ranges]
+        return np.concatenate([future.result() for future in futures])
+    finally:
+        pool.shutdown()
+        release_arrays(blocks, unlink=True)
+
+
+def create_overlaps_dict(objects: list[bpy.types.Object], operator: bpy.types.Operator | None = None, parallel: bool = False, num_workers: int = 0, use_cache: bool = False, world_coords: 'WorldCoordsCache' = None, bvh_budget: int = 0) -> dict[bpy.types.Object, set[bpy.types.Object]]:
+    """ Objects every object overlaps. BVH trees are kept within bvh_budget bytes, 0 keeps all of them """
     from math import ceil
-    from mathutils.bvhtree import BVHTree
     from ..Utils import ProgressBar
+    from .MeshArrays import WorldCoordsCache, create_bvh_tree
+    from .BVHCache import BVHCache, estimate_tree_bytes
+    from ..kernels.BroadPhase import bounding_boxes, sweep_and_prune, spatial_pair_order
+    from .OverlapCache import OverlapCache
+
+    # BVH trees are built with this epsilon, bounding boxes are grown by it to never miss their overlaps
+    epsilon = 0.1
+
+    start_time = time.time()
+
+    if world_coords is None:
+        world_coords = WorldCoordsCache()
+
+    coords: list[np.ndarray] = []
+    offsets = np.zeros(len(objects) + 1, dtype=np.int64)
+    for idx, obj in enumerate(objects):
+        coords.append(world_coords.get(obj))
+        offsets[idx + 1] = offsets[idx] + len(coords[-1])
+
+    minimum, maximum = bounding_boxes(np.concatenate(coords) if len(coords) > 0 else np.zeros((0, 3)), offsets, epsilon)
+    firsts, seconds = sweep_and_prune(minimum, maximum)
+
+    cache = OverlapCache() if use_cache else None
+
+    broad_phase_time = time.time() - start_time
+    start_time = time.time()
+
+    overlaps = np.zeros(len(firsts), dtype=bool)
+    known = np.zeros(len(firsts), dtype=bool)
+    if cache is not None:
+        for idx in range(len(firsts)):
+            result = cache.lookup(objects[firsts[idx]], objects[seconds[idx]])
+            if result is not None:
+                overlaps[idx] = result
+                known[idx] = True
+
+    to_test = np.nonzero(~known)[0]
+    test_firsts = firsts[to_test]
+    test_seconds = seconds[to_test]
+
+    # Only objects with candidate pairs need BVH trees
+    candidates = np.unique(np.concatenate([test_firsts, test_seconds]))
+
+    bvh_cache = None
+    if parallel and len(to_test) > 0:
+        overlaps[to_test] = __find_overlaps_parallel(objects, coords, world_coords, candidates, test_firsts, test_seconds, num_workers)
+    else:
+        def build(obj_idx: int):
+            triangles = world_coords.triangles(objects[obj_idx])
+            return create_bvh_tree(coords[obj_idx], triangles, epsilon), estimate_tree_bytes(len(coords[obj_idx]), len(triangles))
+
+        # Trees are built when a pair first needs them, pairs of one region follow each other so trees are reused before eviction
+        bvh_cache = BVHCache(bvh_budget)
+        pair_order = spatial_pair_order(test_firsts, test_seconds, minimum, maximum)
+
+        progress_bar = ProgressBar("Evaluate overlaps {1} of {0}", max(len(to_test), 1))
+        step = ceil(len(to_test) * 0.01)
+
+        for idx, pair in enumerate(pair_order):
+            first_tree = bvh_cache.get(int(test_firsts[pair]), build)
+            second_tree = bvh_cache.get(int(test_seconds[pair]), build)
+            overlaps[to_test[pair]] = len(first_tree.overlap(second_tree)) > 0
+            if idx % step == step - 1:
+                progress_bar += step
 
-    def create_bvh_tree_from_object(obj_to_read: bpy.types.Object) -> BVHTree:
-        bm: bmesh.types.BMesh = bmesh.new()
-        bm.from_mesh(obj_to_read.data)
-        bm.transform(obj_to_read.matrix_world)
-        bm.faces.ensure_lookup_table()
-        bvh = BVHTree.FromBMesh(bmesh=bm, epsilon=0.1)
-        bm.free()
-        return bvh
-
-    progress_bar = ProgressBar("Create BVH trees for overlaps", len(objects))
-    step = ceil(len(objects) * 0.01)
+        progress_bar.finish()
+        bvh_cache.clear()
 
-    obj_to_bvh_tree: dict[bpy.types.Object, BVHTree] = {}
-    idx = 0
-    for obj in objects:
-        obj_to_bvh_tree[obj] = create_bvh_tree_from_object(obj)
-        idx += 1
-        if idx % step == step - 1:
-            progress_bar += step
-
-    progress_bar.finish()
-    progress_bar = ProgressBar("Evaluate overlaps {1} of {0}", len(objects))
+    if cache is not None:
+        for idx in to_test:
+            cache.store(objects[firsts[idx]], objects[seconds[idx]], bool(overlaps[idx]))
+        cache.write()
 
     obj_to_overlaps: dict[bpy.types.Object, set[bpy.types.Object]] = {}
 
-    idx = 0
-    for i in range(0, len(objects)):
-        obj = objects[i]
-        first_bvh = obj_to_bvh_tree[obj]
-        for j in range(i + 1, len(objects)):
-            obj2 = objects[j]
-            if obj == obj2:
-                continue
+    for first, second in zip(firsts[overlaps], seconds[overlaps]):
+        obj = objects[first]
+        obj2 = objects[second]
+        if obj == obj2:
+            continue
 
-            second_bvh = obj_to_bvh_tree[obj2]
-            if len(first_bvh.overlap(second_bvh)) == 0:
-                continue
+        if obj not in obj_to_overlaps:
+            obj_to_overlaps[obj] = {obj2}
+        else:
+            obj_to_overlaps[obj].add(obj2)
 
-            if obj not in obj_to_overlaps:
-                obj_to_overlaps[obj] = {obj2}
-            else:
-                if obj2 not in obj_to_overlaps[obj]:
-                    obj_to_overlaps[obj].add(obj2)
-
-            if obj2 not in obj_to_overlaps:
-                obj_to_overlaps[obj2] = {obj}
-            else:
-                if obj not in obj_to_overlaps[obj2]:
-                    obj_to_overlaps[obj2].add(obj)
-        idx += 1
-        if idx % step == step - 1:
-            progress_bar += step
+        if obj2 not in obj_to_overlaps:
+            obj_to_overlaps[obj2] = {obj}
+        else:
+            obj_to_overlaps[obj2].add(obj)
+
+    if operator is not None:
+        num_pairs = len(objects) * (len(objects) - 1) // 2
+        num_hits = len(firsts) - len(to_test)
+        hit_rate = 100.0 * num_hits / max(len(firsts), 1)
+        operator.report({'INFO'}, "Overlaps: %d candidate pairs of %d, %d (%.1f%%) from cache, broad phase %.2fs, narrow phase %.2fs" % (len(firsts), num_pairs, num_hits, hit_rate, broad_phase_time, time.time() - start_time))
+        if bvh_cache is not None:
+            operator.report({'INFO'}, "BVH trees: %d built for %d objects, %d rebuilt after eviction, estimated peak %.1f MB" % (bvh_cache.num_builds, len(candidates), bvh_cache.num_rebuilds, bvh_cache.peak_bytes / (1024 * 1024)))
 
     return obj_to_overlaps
 
 
-def copy_uvs(operator: bpy.types.Operator, context: bpy.types.Context, selection: list[bpy.types.Object]):
+def copy_uvs(operator: bpy.types.Operator, context: bpy.types.Context, selection: list[bpy.types.Object], world_coords: 'WorldCoordsCache' = None):
     from ..core.CreateTextures import find_texture_dimensions, create_uv_map
-    from math import ceil
     from ..Properties import get_mesh_operations_settings, get_texture_settings
     from ..Utils import ProgressBar
-
-    size = find_texture_dimensions(selection)
-    create_uv_map(context, selection, size)
+    from .MeshArrays import WorldCoordsCache, read_loop_vertex_indices
+    from ..kernels.VertexMatch import match_vertices
+    from ..kernels.BroadPhase import range_pairs
 
     texture_properties = get_texture_settings(context)
     properties = get_mesh_operations_settings(context)
+
+    if properties.instance_aware:
+        from .MeshInstances import shared_mesh_conflicts, report_conflicts
+        conflicts = [obj for users in shared_mesh_conflicts(selection).values() for obj in users]
+        if len(conflicts) > 0:
+            report_conflicts(operator, conflicts, "%d objects share meshes, but every object needs its own texture pixel UVs")
+            return False
+
+    size = find_texture_dimensions(selection)
+    create_uv_map(context, selection, size)
     if bpy.data.objects.find(properties.copy_uvs_target) == -1:
         operator.report({'ERROR'}, 'Object ' + properties.copy_uvs_target + ' does not exist. Failed to copy UVs!')
         return
@@ -247,73 +351,78 @@ def copy_uvs(operator: bpy.types.Operator, context: bpy.types.Context, selection
     target_obj.select_set(True)
 
     bpy.ops.object.select_all(action='DESELECT')
-    num_loops = 0
     for obj in selection:
         obj.select_set(True)
-        num_loops += len(obj.data.loops)
 
     if uv_map not in target_obj_data.uv_layers:
         target_obj_data.uv_layers.new(name=uv_map, do_init=False)
 
-    progress = ProgressBar('Copying UVs {1} of {0}', num_loops)
-
     tolerance = pow(10, -(properties.copy_uvs_uv_precision_lookup))
 
-    target_obj_data.uv_layers[texture_properties.uv_map_name].active = True
+    if world_coords is None:
+        world_coords = WorldCoordsCache()
 
-    kd = mathutils.kdtree.KDTree(len(target_obj_data.vertices))
-    for idx, vertex in enumerate(target_obj_data.vertices):
-        kd.insert(target_obj.matrix_world @ vertex.co, idx)
-    kd.balance()
+    target_obj_data.uv_layers[uv_map].active = True
 
-    vertex_index_to_loops: dict[int, list[int]] = {}
-    for loop in target_obj_data.loops:
-        if loop.vertex_index in vertex_index_to_loops:
-            vertex_index_to_loops[loop.vertex_index].append(loop.index)
-        else:
-            vertex_index_to_loops[loop.vertex_index] = [loop.index]
+    progress = ProgressBar('Reading UVs {1} of {0}', len(selection))
 
-    num_found_none = 0
-    num_missing = 0
-    passed = 0
-    idx = 0
-    step = ceil(len(selection) * 0.01)
+    # World positions, loop vertices and UVs of all split objects, concatenated
+    coords: list[np.ndarray] = []
+    loop_vertices: list[np.ndarray] = []
+    uvs: list[np.ndarray] = []
+    num_vertices = 0
     for obj in selection:
         obj_data: bpy.types.Mesh = obj.data
+        uv_layer = obj_data.uv_layers[uv_map]
 
-        for loop in obj_data.loops:
-            vertex = obj.matrix_world @ obj_data.vertices[loop.vertex_index].co
-            uv = obj_data.uv_layers[texture_properties.uv_map_name].data[loop.index].uv
-            found_vertices = kd.find_range(vertex, tolerance)
-            if len(found_vertices) == 0:
-                num_found_none += 1
-            elif len(found_vertices) > 1:
-                for found_vertex in found_vertices:
-                    vertex_index = found_vertex[1]
-                    if vertex_index in vertex_index_to_loops:
-                        for loop_index in vertex_index_to_loops[vertex_index]:
-                            target_obj_data.uv_layers[texture_properties.uv_map_name].data[loop_index].uv = uv
-                    else:
-                        num_missing += 1
-            else:
-                vertex_index = found_vertices[0][1]
-                if vertex_index in vertex_index_to_loops:
-                    for loop_index in vertex_index_to_loops[vertex_index]:
-                        target_obj_data.uv_layers[texture_properties.uv_map_name].data[loop_index].uv = uv
-                else:
-                    num_missing += 1
-
-        obj_data.uv_layers[texture_properties.uv_map_name].active = False
+        obj_uvs = np.empty(len(obj_data.loops) * 2, dtype=np.float32)
+        uv_layer.data.foreach_get('uv', obj_uvs)
 
-        idx += 1
-        passed += len(obj_data.loops)
-        if idx % step == step - 1:
-            progress += passed
-            passed = 0
+        coords.append(world_coords.get(obj))
+        loop_vertices.append(read_loop_vertex_indices(obj_data).astype(np.int64) + num_vertices)
+        uvs.append(obj_uvs.reshape(-1, 2))
+        num_vertices += len(obj_data.vertices)
+
+        uv_layer.active = False
+        progress += 1
 
     progress.finish()
 
-    target_obj_data.uv_layers[texture_properties.uv_map_name].active = True
+    coords: np.ndarray = np.concatenate(coords) if len(coords) > 0 else np.zeros((0, 3))
+    loop_vertices: np.ndarray = np.concatenate(loop_vertices) if len(loop_vertices) > 0 else np.zeros(0, dtype=np.int64)
+    uvs: np.ndarray = np.concatenate(uvs) if len(uvs) > 0 else np.zeros((0, 2), dtype=np.float32)
+
+    target_loop_vertices = read_loop_vertex_indices(target_obj_data)
+
+    # Quantized join first, positions not found are compared with 10 times bigger difference
+    source_indices, target_indices = match_vertices(coords, world_coords.get(target_obj), tolerance, tolerance * 10)
+    match_starts = np.searchsorted(source_indices, np.arange(num_vertices + 1))
+    num_matches = np.diff(match_starts)
+
+    # Target vertices without loops can not receive UVs, they are counted for every source loop matching them
+    has_loops = np.zeros(len(target_obj_data.vertices), dtype=bool)
+    has_loops[target_loop_vertices] = True
+    num_missing_per_vertex = np.bincount(source_indices[~has_loops[target_indices]], minlength=num_vertices)
+
+    num_found_none = int(np.count_nonzero(num_matches[loop_vertices] == 0))
+    num_missing = int(num_missing_per_vertex[loop_vertices].sum())
+
+    # Every source loop writes its UV to all loops of matched target vertices, later loops overwrite earlier ones
+    last_assignment = np.full(len(target_obj_data.vertices), -1, dtype=np.int64)
+    for loop_indices, match_indices in range_pairs(match_starts[loop_vertices], match_starts[loop_vertices + 1]):
+        np.maximum.at(last_assignment, target_indices[match_indices], loop_indices)
+
+    target_uv_layer = target_obj_data.uv_layers[uv_map]
+    target_uvs = np.empty(len(target_obj_data.loops) * 2, dtype=np.float32)
+    target_uv_layer.data.foreach_get('uv', target_uvs)
+    target_uvs = target_uvs.reshape(-1, 2)
+
+    assigned_loops = last_assignment[target_loop_vertices]
+    assigned = assigned_loops >= 0
+    target_uvs[assigned] = uvs[assigned_loops[assigned]]
+    target_uv_layer.data.foreach_set('uv', target_uvs.ravel())
+
+    target_uv_layer.active = True
 
     success: bool = num_missing + num_found_none == 0
     if not success:
@@ -322,7 +431,64 @@ def copy_uvs(operator: bpy.types.Operator, context: bpy.types.Context, selection
     return success
 
 
-def generate_distant_hierarchy(operator: bpy.types.Operator, context: bpy.types.Context, selection: list[bpy.types.Object]):
+def create_island_uvs(operator: bpy.types.Operator, context: bpy.types.Context, selection: list[bpy.types.Object]) -> int:
+    """
+    Same UVs as splitting by loose parts, creating UV map on the parts and copying it back, without the round trip.
+    Every loose part of the mesh gets the texel of its index, in the order split_mesh creates the parts.
+    UVs only depend on the mesh, so instances sharing one are written once. Returns number of islands.
+    """
+    from .CreateTextures import find_texture_dimensions_for_count
+    from ..Properties import get_texture_settings
+    from ..Utils import ProgressBar
+    from .MeshArrays import read_edge_vertex_indices, read_loop_vertex_indices
+    from .MeshInstances import group_by_mesh
+    from ..kernels.IslandLabels import island_labels
+
+    texture_properties = get_texture_settings(context)
+    uv_map = texture_properties.uv_map_name
+
+    meshes = list(group_by_mesh(selection).keys())
+    progress = ProgressBar('Creating island UVs {1} of {0}', len(meshes))
+
+    num_islands_total = 0
+    empty_meshes: list[bpy.types.Mesh] = []
+    for obj_data in meshes:
+        if len(obj_data.vertices) == 0:
+            empty_meshes.append(obj_data)
+            progress += 1
+            continue
+
+        labels, num_islands = island_labels(len(obj_data.vertices), read_edge_vertex_indices(obj_data))
+        size = find_texture_dimensions_for_count(num_islands)
+
+        # Vectorized get_xy_from_index, texel centers of every island
+        islands = np.arange(num_islands)
+        island_uvs = np.stack([
+            (islands % size[0] + 0.5) / size[0],
+            (size[1] - islands // size[0] - 1 + 0.5) / size[1],
+        ], axis=1).astype(np.float32)
+
+        if uv_map not in obj_data.uv_layers:
+            obj_data.uv_layers.new(name=uv_map)
+        uv_layer = obj_data.uv_layers[uv_map]
+        obj_data.uv_layers.active = uv_layer
+        uv_layer.active_render = True
+
+        uv_layer.data.foreach_set('uv', island_uvs[labels[read_loop_vertex_indices(obj_data)]].ravel())
+
+        num_islands_total += num_islands
+        progress += 1
+
+    progress.finish()
+
+    if len(empty_meshes) > 0:
+        names = ', '.join(mesh.name for mesh in empty_meshes[:4]) + (', ...' if len(empty_meshes) > 4 else '')
+        operator.report({'WARNING'}, "%d meshes have no vertices, they were skipped (%s)" % (len(empty_meshes), names))
+
+    return num_islands_total
+
+
+def generate_distant_hierarchy(operator: bpy.types.Operator, context: bpy.types.Context, selection: list[bpy.types.Object], world_coords: 'WorldCoordsCache' = None):
     from ..Properties import get_mesh_operations_settings
 
     properties = get_mesh_operations_settings(context)
@@ -351,36 +517,48 @@ def generate_distant_hierarchy(operator: bpy.types.Operator, context: bpy.types.
         operator.report({'ERROR'}, "Only base mesh objects selected. Possible children objects must be selected.")
         return False
 
-    return generate_hierarchy_from_base_distant_meshes(operator, base_mesh_objects, leaves_selection)
+    return generate_hierarchy_from_base_distant_meshes(operator, base_mesh_objects, leaves_selection, world_coords)
 
 
-def generate_hierarchy_from_base_distant_meshes(operator: bpy.types.Operator, base_mesh_objects: set[bpy.types.Object], leaves_selection: list[bpy.types.Object]):
+def generate_hierarchy_from_base_distant_meshes(operator: bpy.types.Operator, base_mesh_objects: set[bpy.types.Object], leaves_selection: list[bpy.types.Object], world_coords: 'WorldCoordsCache' = None):
     from math import ceil
     from ..Utils import ProgressBar
 
-    mesh_to_kd: dict[bpy.types.Object, mathutils.kdtree.KDTree] = {}
-    for obj in base_mesh_objects:
-        kd = mathutils.kdtree.KDTree(len(obj.data.vertices))
-        for idx, vertex in enumerate(obj.data.vertices):
-            kd.insert(obj.matrix_world @ vertex.co, idx)
-        kd.balance()
-        mesh_to_kd[obj] = kd
+    from .MeshArrays import WorldCoordsCache
+    from ..kernels.NearestLabel import LabeledPointIndex, bounding_spheres, trivially_closest
+
+    base_meshes = list(base_mesh_objects)
+
+    if world_coords is None:
+        world_coords = WorldCoordsCache()
+
+    base_coords = [world_coords.get(obj) for obj in base_meshes]
+    base_offsets = np.zeros(len(base_meshes) + 1, dtype=np.int64)
+    base_offsets[1:] = np.cumsum([len(coords) for coords in base_coords])
+    base_coords = np.concatenate(base_coords) if len(base_coords) > 0 else np.zeros((0, 3))
+    base_centers, base_radii = bounding_spheres(base_coords, base_offsets)
+
+    # All base meshes vertices in one index, labeled by base mesh
+    index = LabeledPointIndex(base_coords, np.repeat(np.arange(len(base_meshes)), np.diff(base_offsets)))
+
+    leaves_coords = [world_coords.get(leaf) for leaf in leaves_selection]
+    leaves_offsets = np.zeros(len(leaves_selection) + 1, dtype=np.int64)
+    leaves_offsets[1:] = np.cumsum([len(coords) for coords in leaves_coords])
+    leaves_centers, leaves_radii = bounding_spheres(np.concatenate(leaves_coords) if len(leaves_coords) > 0 else np.zeros((0, 3)), leaves_offsets)
+
+    # Leaves which can not be closer to any other base mesh skip the search
+    trivial_labels = trivially_closest(leaves_centers, leaves_radii, base_centers, base_radii)
 
     progress_bar = ProgressBar("Looking for parents on {1} of {0} objects", len(leaves_selection))
 
     idx = 0
     step = ceil(len(leaves_selection) * 0.01)
-    for leaf in leaves_selection:
-        closest_distance = 1e9
-        closest_mesh = None
-        for vertex in leaf.data.vertices:
-            world_vertex = leaf.matrix_world @ vertex.co
-            for base_mesh, kd in mesh_to_kd.items():
-                data = kd.find_n(world_vertex, 1)
-                if closest_distance > data[0][2]:
-                    closest_distance = data[0][2]
-                    closest_mesh = base_mesh
-        if closest_mesh is not None:
+    for leaf_idx, leaf in enumerate(leaves_selection):
+        label = int(trivial_labels[leaf_idx])
+        if label < 0:
+            label = index.closest(leaves_coords[leaf_idx])[1]
+        if label >= 0:
+            closest_mesh = base_meshes[label]
             leaf.parent = closest_mesh
             leaf.matrix_parent_inverse = closest_mesh.matrix_world.inverted()
         if idx % step == step - 1:
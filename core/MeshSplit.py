@@ -0,0 +1,175 @@
+import bpy
+import numpy as np
+
+# Attribute data type to foreach key, number of components and numpy type
+ATTRIBUTE_LAYOUTS = {
+    'FLOAT': ('value', 1, np.float32),
+    'INT': ('value', 1, np.int32),
+    'INT8': ('value', 1, np.int32),
+    'BOOLEAN': ('value', 1, bool),
+    'FLOAT_VECTOR': ('vector', 3, np.float32),
+    'FLOAT2': ('vector', 2, np.float32),
+    'FLOAT_COLOR': ('color', 4, np.float32),
+    'BYTE_COLOR': ('color', 4, np.float32),
+    'INT32_2D': ('value', 2, np.int32),
+    'QUATERNION': ('value', 4, np.float32),
+}
+
+
+def __read_array(collection, key: str, num_components: int, dtype) -> np.ndarray:
+    values = np.empty(len(collection) * num_components, dtype=dtype)
+    collection.foreach_get(key, values)
+    return values.reshape(len(collection), num_components)
+
+
+def __read_attributes(mesh: bpy.types.Mesh) -> list[tuple[str, str, str, np.ndarray]]:
+    """ Name, data type, domain and values of every user attribute, positions and internal attributes are skipped """
+    attributes = []
+    for attribute in mesh.attributes:
+        if attribute.name.startswith('.') or attribute.name == 'position' or attribute.data_type not in ATTRIBUTE_LAYOUTS:
+            continue
+        key, num_components, dtype = ATTRIBUTE_LAYOUTS[attribute.data_type]
+        attributes.append((attribute.name, attribute.data_type, attribute.domain, __read_array(attribute.data, key, num_components, dtype)))
+    return attributes
+
+
+def unsupported_data(obj: bpy.types.Object) -> list[str]:
+    """ Object and mesh data split_object can not carry over to the parts, empty when it gives the same parts as separating """
+    mesh: bpy.types.Mesh = obj.data
+    unsupported = []
+    if len(obj.vertex_groups) > 0:
+        unsupported.append('vertex groups')
+    if mesh.shape_keys is not None:
+        unsupported.append('shape keys')
+    if len(obj.modifiers) > 0:
+        unsupported.append('modifiers')
+    for attribute in mesh.attributes:
+        if not attribute.name.startswith('.') and attribute.data_type not in ATTRIBUTE_LAYOUTS:
+            unsupported.append(attribute.data_type + " attribute \"" + attribute.name + "\"")
+    return unsupported
+
+
+def __copy_custom_properties(source: bpy.types.ID, target: bpy.types.ID):
+    for key in source.keys():
+        value = source[key]
+        # Groups and arrays are views into source, they are copied as plain values
+        if hasattr(value, 'to_dict'):
+            value = value.to_dict()
+        elif hasattr(value, 'to_list'):
+            value = value.to_list()
+        target[key] = value
+
+
+def separate_objects(objects: list[bpy.types.Object], collection: bpy.types.Collection) -> list[bpy.types.Object]:
+    """ Duplicates objects and separates them by loose parts with operators, parts are moved to collection """
+    bpy.ops.object.select_all(action='DESELECT')
+    for obj in objects:
+        obj.select_set(True)
+    bpy.context.view_layer.objects.active = objects[0]
+
+    bpy.ops.object.duplicate(linked=False)
+    bpy.ops.mesh.separate(type='LOOSE')
+
+    parts = list(bpy.context.selected_objects)
+    for part in parts:
+        for part_collection in list(part.users_collection):
+            part_collection.objects.unlink(part)
+        collection.objects.link(part)
+    return parts
+
+
+def split_object(obj: bpy.types.Object, collection: bpy.types.Collection) -> list[bpy.types.Object]:
+    """
+    Same result as duplicating object and separating it by loose parts, without operators or edit mode, for objects
+    unsupported_data finds nothing in. Islands come from vertex connectivity through edges, every island mesh is
+    written with bulk foreach_set and its object is created directly in collection, keeping transform, parent,
+    custom properties and object material slots of source object.
+    """
+    from ..kernels.IslandLabels import island_labels, island_order
+
+    mesh: bpy.types.Mesh = obj.data
+
+    coords = __read_array(mesh.vertices, 'co', 3, np.float32)
+    edges = __read_array(mesh.edges, 'vertices', 2, np.int32)
+    loop_vertices = __read_array(mesh.loops, 'vertex_index', 1, np.int32).ravel()
+    loop_edges = __read_array(mesh.loops, 'edge_index', 1, np.int32).ravel()
+    loop_starts = __read_array(mesh.polygons, 'loop_start', 1, np.int32).ravel()
+    loop_totals = np.diff(np.append(loop_starts, len(mesh.loops)))
+    attributes = __read_attributes(mesh)
+
+    vertex_labels, num_islands = island_labels(len(coords), edges)
+    edge_labels = vertex_labels[edges[:, 0]] if len(edges) > 0 else np.zeros(0, dtype=np.int64)
+    polygon_labels = vertex_labels[loop_vertices[loop_starts]] if len(loop_starts) > 0 else np.zeros(0, dtype=np.int64)
+    loop_labels = np.repeat(polygon_labels, loop_totals)
+
+    vertex_order, vertex_offsets, vertex_local = island_order(vertex_labels, num_islands)
+    edge_order, edge_offsets, edge_local = island_order(edge_labels, num_islands)
+    polygon_order, polygon_offsets, _ = island_order(polygon_labels, num_islands)
+    loop_order, loop_offsets, loop_local = island_order(loop_labels, num_islands)
+
+    # Everything is grouped by island once, islands are then contiguous slices
+    coords = coords[vertex_order]
+    edges = vertex_local[edges[edge_order]].astype(np.int32)
+    loop_vertices = vertex_local[loop_vertices[loop_order]].astype(np.int32)
+    loop_edges = edge_local[loop_edges[loop_order]].astype(np.int32)
+    loop_starts = loop_local[loop_starts[polygon_order]].astype(np.int32)
+    domain_orders = {'POINT': vertex_order, 'EDGE': edge_order, 'FACE': polygon_order, 'CORNER': loop_order}
+    domain_offsets = {'POINT': vertex_offsets, 'EDGE': edge_offsets, 'FACE': polygon_offsets, 'CORNER': loop_offsets}
+    attributes = [(name, data_type, domain, values[domain_orders[domain]]) for name, data_type, domain, values in attributes]
+
+    active_uv = mesh.uv_layers.active.name if mesh.uv_layers.active is not None else None
+    render_uv = next((uv_layer.name for uv_layer in mesh.uv_layers if uv_layer.active_render), None)
+
+    new_objects: list[bpy.types.Object] = []
+    for island in range(num_islands):
+        vertex_slice = slice(vertex_offsets[island], vertex_offsets[island + 1])
+        edge_slice = slice(edge_offsets[island], edge_offsets[island + 1])
+        polygon_slice = slice(polygon_offsets[island], polygon_offsets[island + 1])
+        loop_slice = slice(loop_offsets[island], loop_offsets[island + 1])
+
+        new_mesh = bpy.data.meshes.new(mesh.name)
+        new_mesh.vertices.add(vertex_slice.stop - vertex_slice.start)
+        new_mesh.edges.add(edge_slice.stop - edge_slice.start)
+        new_mesh.loops.add(loop_slice.stop - loop_slice.start)
+        new_mesh.polygons.add(polygon_slice.stop - polygon_slice.start)
+
+        new_mesh.vertices.foreach_set('co', coords[vertex_slice].ravel())
+        new_mesh.edges.foreach_set('vertices', edges[edge_slice].ravel())
+        new_mesh.loops.foreach_set('vertex_index', loop_vertices[loop_slice])
+        new_mesh.loops.foreach_set('edge_index', loop_edges[loop_slice])
+        new_mesh.polygons.foreach_set('loop_start', loop_starts[polygon_slice])
+
+        for name, data_type, domain, values in attributes:
+            attribute = new_mesh.attributes.get(name)
+            if attribute is None:
+                attribute = new_mesh.attributes.new(name, data_type, domain)
+            key = ATTRIBUTE_LAYOUTS[data_type][0]
+            attribute.data.foreach_set(key, values[domain_offsets[domain][island]:domain_offsets[domain][island + 1]].ravel())
+
+        if active_uv is not None and active_uv in new_mesh.uv_layers:
+            new_mesh.uv_layers.active = new_mesh.uv_layers[active_uv]
+        if render_uv is not None and render_uv in new_mesh.uv_layers:
+            new_mesh.uv_layers[render_uv].active_render = True
+
+        for material in mesh.materials:
+            new_mesh.materials.append(material)
+
+        new_mesh.update()
+
+        new_obj = bpy.data.objects.new(obj.name, new_mesh)
+        new_obj.parent = obj.parent
+        new_obj.matrix_parent_inverse = obj.matrix_parent_inverse.copy()
+        # Basis is decomposed into rotation of object rotation mode
+        new_obj.rotation_mode = obj.rotation_mode
+        new_obj.matrix_basis = obj.matrix_basis.copy()
+        __copy_custom_properties(obj, new_obj)
+
+        for slot, new_slot in zip(obj.material_slots, new_obj.material_slots):
+            if slot.link == 'OBJECT':
+                new_slot.link = 'OBJECT'
+                new_slot.material = slot.material
+
+        collection.objects.link(new_obj)
+        new_objects.append(new_obj)
+
+    return new_objects
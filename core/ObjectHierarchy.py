@@ -0,0 +1,57 @@
+import bpy
+import numpy as np
+
+
+class ObjectHierarchy:
+    """
+    Hierarchy index over objects and all of their ancestors, built once per operation.
+    Depth counts every ancestor, mesh depth only the unbroken chain of mesh parents above an object.
+    """
+    objects: list[bpy.types.Object]
+    index: 'HierarchyIndex'
+    mesh_index: 'HierarchyIndex'
+    __indices: dict[bpy.types.Object, int]
+
+    def __init__(self, objects: list[bpy.types.Object]):
+        from ..kernels.HierarchyIndex import HierarchyIndex
+
+        self.objects = []
+        self.__indices = {}
+
+        obj: bpy.types.Object
+        for obj in objects:
+            # Every object is visited once, walks stop at the first known ancestor
+            while obj is not None and obj not in self.__indices:
+                self.__indices[obj] = len(self.objects)
+                self.objects.append(obj)
+                obj = obj.parent
+
+        parents = np.full(len(self.objects), -1, dtype=np.int64)
+        is_mesh = np.zeros(len(self.objects), dtype=bool)
+        for idx, obj in enumerate(self.objects):
+            if obj.parent is not None:
+                parents[idx] = self.__indices[obj.parent]
+            is_mesh[idx] = obj.type == 'MESH'
+
+        self.index = HierarchyIndex(parents)
+        self.mesh_index = HierarchyIndex(np.where((parents >= 0) & is_mesh[np.maximum(parents, 0)], parents, -1))
+
+    def index_of(self, obj: bpy.types.Object) -> int:
+        return self.__indices[obj]
+
+    def depth(self, obj: bpy.types.Object) -> int:
+        return int(self.index.depths[self.__indices[obj]])
+
+    def mesh_depth(self, obj: bpy.types.Object) -> int:
+        return int(self.mesh_index.depths[self.__indices[obj]])
+
+    def levels(self, objects: list[bpy.types.Object]) -> list[list[bpy.types.Object]]:
+        """ Objects grouped by depth, from roots down to the deepest level, keeping their order inside a level """
+        if len(objects) == 0:
+            return []
+
+        depths = self.index.depths[[self.__indices[obj] for obj in objects]]
+        order = np.argsort(depths, kind='stable')
+        offsets = np.zeros(depths.max() + 2, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.bincount(depths))
+        return [[objects[idx] for idx in order[offsets[level]:offsets[level + 1]]] for level in range(len(offsets) - 1)]
@@ -0,0 +1,70 @@
+import hashlib
+
+import bpy
+import numpy as np
+
+from .MeshArrays import mesh_hash
+
+CACHE_PROPERTY = 'PivotPainterOverlaps'
+
+# World matrices are rounded before hashing, so parenting (which rebuilds them from parent inverse) keeps the state
+MATRIX_DECIMALS = 5
+
+
+class OverlapCache:
+    """
+    Narrow phase results of object pairs, stored in object custom properties. Every object keeps a hash of
+    its geometry and world transform, with states of neighbours it was tested against, split by result.
+    A pair result is reused while both objects keep the state they were tested with.
+    """
+    __states: dict[bpy.types.Object, str]
+    __entries: dict[bpy.types.Object, dict]
+    __changed: set[bpy.types.Object]
+
+    def __init__(self):
+        self.__states = {}
+        self.__entries = {}
+        self.__changed = set()
+
+    def state(self, obj: bpy.types.Object) -> str:
+        if obj not in self.__states:
+            digest = hashlib.blake2b(digest_size=16)
+            digest.update(mesh_hash(obj.data))
+            digest.update(np.round(np.array(obj.matrix_world, dtype=float), MATRIX_DECIMALS).tobytes())
+            self.__states[obj] = digest.hexdigest()
+        return self.__states[obj]
+
+    def lookup(self, obj: bpy.types.Object, other: bpy.types.Object) -> bool | None:
+        """ Whether objects overlap, None if the pair was not tested in these states """
+        entry = self.__entry(obj)
+        other_state = self.state(other)
+        if entry['overlaps'].get(other.name) == other_state:
+            return True
+        if entry['separate'].get(other.name) == other_state:
+            return False
+        return None
+
+    def store(self, obj: bpy.types.Object, other: bpy.types.Object, overlaps: bool):
+        for first, second in ((obj, other), (other, obj)):
+            entry = self.__entry(first)
+            entry['overlaps' if overlaps else 'separate'][second.name] = self.state(second)
+            entry['separate' if overlaps else 'overlaps'].pop(second.name, None)
+            self.__changed.add(first)
+
+    def write(self):
+        """ Writes changed entries to objects, once per object """
+        for obj in self.__changed:
+            obj[CACHE_PROPERTY] = self.__entries[obj]
+        self.__changed = set()
+
+    def __entry(self, obj: bpy.types.Object) -> dict:
+        if obj not in self.__entries:
+            stored = obj.get(CACHE_PROPERTY)
+            entry = stored.to_dict() if stored is not None else None
+            # Results of an older state are dropped, its neighbours were tested against other geometry
+            if entry is None or entry.get('state') != self.state(obj):
+                entry = {'state': self.state(obj), 'overlaps': {}, 'separate': {}}
+                if stored is not None:
+                    self.__changed.add(obj)
+            self.__entries[obj] = entry
+        return self.__entries[obj]
@@ -0,0 +1,330 @@
+import hashlib
+import json
+
+import bpy
+import numpy as np
+
+from ..Properties import *
+from .MeshArrays import WorldCoordsCache, mesh_hash
+
+PIPELINE_PROPERTY = 'PivotPainterPipeline'
+
+# Interface and performance settings, they do not change what a stage produces
+IGNORED_SETTINGS = {'show', 'display_textures', 'extra_options', 'selecting_objects', 'use_cache', 'reuse_shapes', 'parallel', 'num_workers', 'hierarchy_bvh_budget'}
+
+# World matrices are rounded before hashing, same as in overlaps cache
+MATRIX_DECIMALS = 5
+
+
+def property_values(group: bpy.types.PropertyGroup) -> dict:
+    """ Settings of property group as plain values, collections are converted item by item """
+    values = {}
+    for prop in group.bl_rna.properties:
+        name = prop.identifier
+        if name == 'rna_type' or name in IGNORED_SETTINGS or name.startswith('show_'):
+            continue
+        value = getattr(group, name)
+        if prop.type == 'COLLECTION':
+            value = [property_values(item) for item in value]
+        elif prop.type == 'POINTER':
+            continue
+        elif isinstance(value, set):
+            value = sorted(value)
+        elif not isinstance(value, (str, int, float, bool)):
+            value = list(value)
+        values[name] = value
+    return values
+
+
+def __digest(value) -> str:
+    return hashlib.blake2b(json.dumps(value, sort_keys=True).encode(), digest_size=16).hexdigest()
+
+
+def placement_hash(objects: list[bpy.types.Object]) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for obj in objects:
+        digest.update(obj.name.encode())
+        digest.update(np.round(np.array(obj.matrix_world, dtype=float), MATRIX_DECIMALS).tobytes())
+    return digest.hexdigest()
+
+
+def geometry_hash(objects: list[bpy.types.Object]) -> str:
+    """ Hash of vertex coordinates and topology of object meshes, mesh shared by instances is read once """
+    digest = hashlib.blake2b(digest_size=16)
+    mesh_hashes: dict[bpy.types.Mesh, bytes] = {}
+    for obj in objects:
+        digest.update(obj.name.encode())
+        if obj.type != 'MESH':
+            continue
+        if obj.data not in mesh_hashes:
+            mesh_hashes[obj.data] = mesh_hash(obj.data)
+        digest.update(mesh_hashes[obj.data])
+    return digest.hexdigest()
+
+
+class PipelineState:
+    """ Data shared in memory between stages of one run """
+    operator: bpy.types.Operator
+    context: bpy.types.Context
+    objects: list[bpy.types.Object]
+    world_coords: WorldCoordsCache
+    __hierarchy: 'ObjectHierarchy' = None
+
+    def __init__(self, operator: bpy.types.Operator, context: bpy.types.Context, objects: list[bpy.types.Object]):
+        self.operator = operator
+        self.context = context
+        self.objects = objects
+        # Stages keep world positions of vertices, so coordinates read by one stage stay valid for the next ones
+        self.world_coords = WorldCoordsCache()
+
+    def hierarchy(self) -> 'ObjectHierarchy':
+        if self.__hierarchy is None:
+            from .ObjectHierarchy import ObjectHierarchy
+            self.__hierarchy = ObjectHierarchy(self.objects)
+        return self.__hierarchy
+
+    def invalidate_hierarchy(self):
+        self.__hierarchy = None
+
+
+class PipelineStage:
+    name: str = ''
+    dependencies: tuple[str, ...] = ()
+
+    def enabled(self, context: bpy.types.Context) -> bool:
+        return True
+
+    def settings(self, context: bpy.types.Context) -> dict:
+        return {}
+
+    def run(self, state: PipelineState) -> dict | None:
+        """ Runs stage on state objects, returns its output or None when it failed """
+        pass
+
+    def restore(self, state: PipelineState, output: dict) -> bool:
+        """ Whether scene still holds output of an earlier run, which is then passed on through state """
+        return True
+
+
+class SplitStage(PipelineStage):
+    name = 'split'
+
+    def enabled(self, context: bpy.types.Context) -> bool:
+        return get_mesh_operations_settings(context).pipeline_split
+
+    def run(self, state: PipelineState) -> dict | None:
+        from .MeshOperations import split_mesh
+
+        sources = state.objects
+        parts = split_mesh(sources, state.operator)
+        if len(parts) == 0:
+            state.operator.report({'ERROR'}, "Split Mesh did not create any objects")
+            return None
+
+        if len(sources) == 1:
+            get_mesh_operations_settings(state.context).copy_uvs_target = sources[0].name
+
+        state.objects = parts
+        return {'sources': [obj.name for obj in sources], 'parts': [obj.name for obj in parts]}
+
+    def restore(self, state: PipelineState, output: dict) -> bool:
+        # Either the split objects or their parts can be selected for a rerun
+        known_names = set(output['sources']) | set(output['parts'])
+        if any(obj.name not in known_names for obj in state.objects):
+            return False
+        if any(bpy.data.objects.get(name) is None for name in output['parts']):
+            return False
+
+        state.objects = [bpy.data.objects[name] for name in output['parts']]
+        return True
+
+
+class HierarchyStage(PipelineStage):
+    name = 'hierarchy'
+    dependencies = ('split',)
+
+    def enabled(self, context: bpy.types.Context) -> bool:
+        return get_mesh_operations_settings(context).pipeline_hierarchy != 'none'
+
+    def settings(self, context: bpy.types.Context) -> dict:
+        properties = get_mesh_operations_settings(context)
+        return {'mode': properties.pipeline_hierarchy, 'base_meshes': [base_mesh.name for base_mesh in self.__base_mesh_list(context)]}
+
+    def run(self, state: PipelineState) -> dict | None:
+        from .MeshOperations import generate_hierarchy, generate_distant_hierarchy
+
+        if get_mesh_operations_settings(state.context).pipeline_hierarchy == 'distant':
+            generate = generate_distant_hierarchy
+        else:
+            generate = generate_hierarchy
+
+        state.invalidate_hierarchy()
+        if not generate(state.operator, state.context, list(state.objects), state.world_coords):
+            return None
+        return self.__output(state)
+
+    def restore(self, state: PipelineState, output: dict) -> bool:
+        # Parents are found from shapes and placement of objects and base meshes, moving or editing any of them
+        # can change the hierarchy even when parents still look the same
+        return self.__output(state) == output
+
+    def __output(self, state: PipelineState) -> dict:
+        base_meshes = [bpy.data.objects[base_mesh.name] for base_mesh in self.__base_mesh_list(state.context) if bpy.data.objects.get(base_mesh.name) is not None]
+        return {
+            'parents': self.__parents(state),
+            'placement': placement_hash(state.objects),
+            'geometry': geometry_hash(state.objects),
+            'base_placement': placement_hash(base_meshes),
+            'base_geometry': geometry_hash(base_meshes),
+        }
+
+    @staticmethod
+    def __base_mesh_list(context: bpy.types.Context):
+        properties = get_mesh_operations_settings(context)
+        return properties.base_distant_meshes if properties.pipeline_hierarchy == 'distant' else properties.base_meshes
+
+    @staticmethod
+    def __parents(state: PipelineState) -> dict[str, str]:
+        return {obj.name: obj.parent.name if obj.parent is not None else '' for obj in state.objects}
+
+
+class PivotsStage(PipelineStage):
+    name = 'pivots'
+    dependencies = ('hierarchy',)
+
+    def enabled(self, context: bpy.types.Context) -> bool:
+        return get_mesh_operations_settings(context).pipeline_pivots
+
+    def settings(self, context: bpy.types.Context) -> dict:
+        return {'pivot': property_values(get_calculate_pivot_settings(context)), 'rotation': property_values(get_calculate_rotation_settings(context))}
+
+    def run(self, state: PipelineState) -> dict | None:
+        from ..Utils import reorder_selection_by_parents
+        from .PivotAndRotation import prepare_mesh
+
+        hierarchy = state.hierarchy()
+        prepare_mesh(state.context, reorder_selection_by_parents(state.objects, hierarchy), hierarchy, state.operator)
+        # Meshes were moved under their new origins, world coordinates read so far are still valid
+        state.world_coords.forget_meshes()
+        return {'placement': placement_hash(state.objects)}
+
+    def restore(self, state: PipelineState, output: dict) -> bool:
+        return placement_hash(state.objects) == output['placement']
+
+
+class TexturesStage(PipelineStage):
+    name = 'textures'
+    dependencies = ('hierarchy', 'pivots')
+
+    def enabled(self, context: bpy.types.Context) -> bool:
+        return get_mesh_operations_settings(context).pipeline_textures
+
+    def settings(self, context: bpy.types.Context) -> dict:
+        return {'textures': property_values(get_texture_settings(context)), 'list': [property_values(texture) for texture in get_textures_list_settings(context)]}
+
+    def run(self, state: PipelineState) -> dict | None:
+        from .CreateTextures import create_textures
+
+        images = create_textures(state.operator, state.context, state.objects, state.hierarchy())
+        if images is None:
+            return None
+        return {'images': images}
+
+    def restore(self, state: PipelineState, output: dict) -> bool:
+        return all(bpy.data.images.get(name) is not None for name in output['images'])
+
+
+class CopyUVsStage(PipelineStage):
+    name = 'copy_uvs'
+    # UVs are matched by world positions, which only split changes, but texel of every object follows texel layout,
+    # which reads hierarchy and pivots
+    dependencies = ('split', 'hierarchy', 'pivots', 'textures')
+
+    def enabled(self, context: bpy.types.Context) -> bool:
+        return get_mesh_operations_settings(context).pipeline_copy_uvs
+
+    def settings(self, context: bpy.types.Context) -> dict:
+        properties = get_mesh_operations_settings(context)
+        texture_properties = get_texture_settings(context)
+        return {'target': properties.copy_uvs_target, 'precision': properties.copy_uvs_uv_precision_lookup, 'uv_map': texture_properties.uv_map_name, 'texel_layout': texture_properties.texel_layout}
+
+    def run(self, state: PipelineState) -> dict | None:
+        from .MeshOperations import copy_uvs
+
+        properties = get_mesh_operations_settings(state.context)
+        if not copy_uvs(state.operator, state.context, list(state.objects), state.world_coords):
+            return None
+        return {'target': properties.copy_uvs_target}
+
+    def restore(self, state: PipelineState, output: dict) -> bool:
+        return bpy.data.objects.get(output['target']) is not None
+
+
+STAGES: list[PipelineStage] = [SplitStage(), HierarchyStage(), PivotsStage(), TexturesStage(), CopyUVsStage()]
+
+
+def stage_order(stages: list[PipelineStage]) -> list[PipelineStage]:
+    """ Stages sorted so that dependencies come first, otherwise in given order """
+    by_name = {stage.name: stage for stage in stages}
+    ordered: list[PipelineStage] = []
+    visiting: set[str] = set()
+
+    def visit(stage: PipelineStage):
+        if stage in ordered:
+            return
+        if stage.name in visiting:
+            raise ValueError("Pipeline stage '" + stage.name + "' depends on itself")
+        visiting.add(stage.name)
+        for dependency in stage.dependencies:
+            visit(by_name[dependency])
+        visiting.remove(stage.name)
+        ordered.append(stage)
+
+    for stage in stages:
+        visit(stage)
+    return ordered
+
+
+def run_pipeline(operator: bpy.types.Operator, context: bpy.types.Context, selection: list[bpy.types.Object]) -> tuple[list[str], list[str]] | None:
+    """
+    Runs enabled stages in dependency order. A stage is reused without running when its settings and outputs of its
+    dependencies match the stored run, and the scene still holds its output.
+    Returns names of stages which ran and which were reused, None when a stage failed.
+    """
+    state = PipelineState(operator, context, [obj for obj in selection if obj is not None and obj.type == 'MESH'])
+    records: dict = json.loads(context.scene.get(PIPELINE_PROPERTY, '{}'))
+
+    fingerprints: dict[str, str] = {}
+    ran: list[str] = []
+    reused: list[str] = []
+    failed = False
+    for stage in stage_order(STAGES):
+        if not stage.enabled(context):
+            fingerprints[stage.name] = ''
+            continue
+
+        key = __digest({'settings': stage.settings(context), 'inputs': [fingerprints[dependency] for dependency in stage.dependencies]})
+        record = records.get(stage.name)
+        if record is not None and record['key'] == key and stage.restore(state, record['output']):
+            output = record['output']
+            reused.append(stage.name)
+        else:
+            output = stage.run(state)
+            if output is None:
+                records.pop(stage.name, None)
+                failed = True
+                break
+            records[stage.name] = {'key': key, 'output': output}
+            ran.append(stage.name)
+
+        fingerprints[stage.name] = __digest({'key': key, 'output': output})
+
+    context.scene[PIPELINE_PROPERTY] = json.dumps(records)
+
+    bpy.ops.object.select_all(action='DESELECT')
+    for obj in state.objects:
+        obj.select_set(True)
+
+    if failed:
+        return None
+    return ran, reused
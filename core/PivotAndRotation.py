@@ -1,158 +1,268 @@
-import bmesh
 import mathutils
-import numpy
 import numpy as np
 
 from ..Properties import *
+from .ObjectHierarchy import ObjectHierarchy
+from .TransformEngine import TransformEngine
 
+ANALYSIS_PROPERTY = 'PivotPainterAnalysis'
 
-def __set_origin(obj: bpy.types.Object, global_origin=mathutils.Vector((0, 0, 0))):
-    bpy.context.scene.cursor.location = global_origin
+# Largest coordinate difference, in local units, for two objects to count as the same shape
+SHAPE_TOLERANCE = 1e-5
 
-    with bpy.context.temp_override(selected_editable_objects=[obj]):
-        bpy.ops.object.origin_set(type='ORIGIN_CURSOR')
 
+def __set_origin(engine: TransformEngine, obj: bpy.types.Object, origin=mathutils.Vector((0, 0, 0))):
+    """ Moves object origin to local position, without moving the mesh """
+    engine.transform(obj, mathutils.Matrix.Translation(origin))
 
-def __find_pivot(context, obj, obj_structs: tuple[mathutils.kdtree.KDTree, mathutils.bvhtree.BVHTree, bmesh.types.BMesh], parent_structs: tuple[mathutils.kdtree.KDTree, mathutils.bvhtree.BVHTree, bmesh.types.BMesh]):
+
+def __find_overlap_pivot(obj_structs: tuple[mathutils.bvhtree.BVHTree, np.ndarray, np.ndarray], parent_structs: tuple[mathutils.bvhtree.BVHTree, np.ndarray, np.ndarray]) -> mathutils.Vector | None:
+    from ..kernels.PivotSolver import overlap_pivot
+
+    overlapping_triangles = np.array(obj_structs[0].overlap(parent_structs[0]), dtype=np.int64).reshape(-1, 2)
+    pivot = overlap_pivot(overlapping_triangles, obj_structs[1], parent_structs[1], obj_structs[2])
+    if pivot is None:
+        return None
+    return mathutils.Vector(pivot)
+
+
+def __find_pivot(context, engine: TransformEngine, obj, obj_structs: tuple[mathutils.bvhtree.BVHTree, np.ndarray, np.ndarray] | None, parent_structs: tuple[mathutils.bvhtree.BVHTree, np.ndarray, np.ndarray] | None):
+    """ Mesh structures are only needed for overlap pivots, vertex search runs on coordinate arrays """
     pivot_properties = get_calculate_pivot_settings(context)
     item_type = pivot_properties.item_type
 
     if item_type == 'overlap':
-        def check_bvh_intersection(obj_1: tuple[mathutils.kdtree.KDTree, mathutils.bvhtree.BVHTree, bmesh.types.BMesh], obj_2: tuple[mathutils.kdtree.KDTree, mathutils.bvhtree.BVHTree, bmesh.types.BMesh]) -> tuple[bool, mathutils.Vector]:
-            overlapping_faces: list[tuple[int, int]] = obj_1[1].overlap(obj_2[1])
+        result = __find_overlap_pivot(obj_structs, parent_structs)
+        if result is not None:
+            return result
 
-            if len(overlapping_faces) == 0:
-                return False, mathutils.Vector((0, 0, 0))
+    from .MeshArrays import matrix_to_array, transform_coords
+    from ..kernels.PivotSolver import find_pivot
 
-            overlapping_face_positions = np.array([])
-            overlapping_face_positions.shape = (0, 3)
-            for face in overlapping_faces:
-                face_position = obj_1[2].faces[face[0]].calc_center_median()
-                overlapping_face_positions = numpy.append(overlapping_face_positions, [[face_position[0], face_position[1], face_position[2]]], axis=0)
+    # Same kernel workers run, closest vertex and mean are vectorized instead of a tree query per vertex
+    local_coords = engine.local_coords(obj)
+    if len(local_coords) == 0:
+        return mathutils.Vector()
+    world_coords = transform_coords(local_coords, matrix_to_array(engine.world_matrix(obj)))
+    parent_world_coords = transform_coords(engine.local_coords(obj.parent), matrix_to_array(engine.world_matrix(obj.parent)))
+    return mathutils.Vector(find_pivot(local_coords, world_coords, parent_world_coords, pivot_properties.calculation_type, pivot_properties.max_distance))
 
-            result = mathutils.Vector((overlapping_face_positions.mean(axis=0)))
 
-            return True, result
+def __find_parentless_pivot(context, engine: TransformEngine, obj):
+    from .MeshArrays import matrix_to_array, transform_coords
+    from ..kernels.PivotSolver import find_parentless_pivot
 
-        success, result = check_bvh_intersection(obj_structs, parent_structs)
-        if success:
-            return result
+    pivot_properties = get_calculate_pivot_settings(context)
+    if pivot_properties.no_parent_pivot_type == 'origin':
+        return mathutils.Vector((0, 0, 0))
 
-    closest_distance = 1e9
-    closest_vertex = mathutils.Vector()
-    for vertex in obj.data.vertices:
-        world_vertex = obj.matrix_world @ vertex.co
-        data = parent_structs[0].find_n(world_vertex, 1)
-        if closest_distance > data[0][2]:
-            closest_distance = data[0][2]
-            closest_vertex = vertex.co
+    local_coords = engine.local_coords(obj)
+    world_coords = transform_coords(local_coords, matrix_to_array(engine.world_matrix(obj)))
+    pivot = find_parentless_pivot(local_coords, world_coords, pivot_properties.no_parent_pivot_type, pivot_properties.no_parent_axis, pivot_properties.no_parent_max_axis_difference)
+    return mathutils.Vector(pivot)
 
-    if pivot_properties.calculation_type == 'mean':
-        closest_included_positions: numpy.array = np.array([])
-        closest_included_positions.shape = (0, 3)
 
-        for vertex in obj.parent.data.vertices:
-            world_vertex = obj.parent.matrix_world @ vertex.co
-            data = obj_structs[0].find_range(world_vertex, closest_distance + pivot_properties.max_distance)
-            for x in data:
-                closest_included_positions = numpy.append(closest_included_positions, [[x[0][0], x[0][1], x[0][2]]], axis=0)
-        closest_vertex = mathutils.Vector((closest_included_positions.mean(axis=0)))
+def __set_rotation(engine: TransformEngine, obj: bpy.types.Object, axis=mathutils.Vector((0, 0, 1))):
+    """ Rotates object so its X axis points to world axis, without moving the mesh """
+    axis = axis.normalized()
 
-    return closest_vertex
+    quat = engine.world_matrix(obj).to_quaternion().inverted() @ axis.to_track_quat('X', 'Z')
 
+    engine.transform(obj, quat.to_matrix().to_4x4())
 
-def __find_parentless_pivot(context, obj):
-    pivot_properties = get_calculate_pivot_settings(context)
-    if pivot_properties.no_parent_pivot_type == 'origin':
-        return mathutils.Vector((0, 0, 0))
 
-    obj_data: bpy.types.Mesh = obj.data
-
-    dtype = [('axis', float), ('x', float), ('y', float), ('z', float)]
-    lowest_items: numpy.array = np.array([], dtype=dtype)
-
-    vertex: bpy.types.MeshVertex
-    for vertex in obj_data.vertices:
-        vertex_position = vertex.co
-        world_position = obj.matrix_world @ vertex_position
-        axis_value = 0.0
-        if pivot_properties.no_parent_axis == 'x_pos':
-            axis_value = -world_position[0]
-        elif pivot_properties.no_parent_axis == 'x_neg':
-            axis_value = world_position[0]
-        elif pivot_properties.no_parent_axis == 'y_pos':
-            axis_value = -world_position[1]
-        elif pivot_properties.no_parent_axis == 'y_neg':
-            axis_value = world_position[1]
-        elif pivot_properties.no_parent_axis == 'z_pos':
-            axis_value = -world_position[2]
-        elif pivot_properties.no_parent_axis == 'z_neg':
-            axis_value = world_position[2]
-        lowest_items = numpy.append(lowest_items, np.array([(axis_value, vertex_position[0], vertex_position[1], vertex_position[2])], dtype=dtype), axis=0)
-
-    lowest_items = np.sort(lowest_items, axis=0, order="axis")
-
-    closest_included_positions: numpy.array = np.array([])
-    closest_included_positions.shape = (0, 3)
-
-    min_distance = lowest_items[0][0]
-    for item in lowest_items:
-        if abs(item[0] - min_distance) <= pivot_properties.no_parent_max_axis_difference:
-            closest_included_positions = numpy.append(closest_included_positions, [[item[1], item[2], item[3]]], axis=0)
+def __create_shape_index(engine: TransformEngine, objects: list[bpy.types.Object]) -> tuple['ShapeIndex', dict[bpy.types.Object, int]]:
+    """ Shapes of objects current local coordinates, with position of every object in the index """
+    from ..kernels.ShapeIndex import ShapeIndex
+
+    coords = [engine.local_coords(obj) for obj in objects]
+    offsets = np.zeros(len(objects) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(obj_coords) for obj_coords in coords])
+    shape_index = ShapeIndex(np.concatenate(coords) if len(coords) > 0 else np.zeros((0, 3)), offsets, SHAPE_TOLERANCE)
+    return shape_index, {obj: idx for idx, obj in enumerate(objects)}
+
+
+def __shape_sources(shapes: tuple['ShapeIndex', dict[bpy.types.Object, int]], objects: list[bpy.types.Object], pivots: dict[bpy.types.Object, np.ndarray]) -> dict[bpy.types.Object, bpy.types.Object]:
+    """
+    Earlier object of the same shape for every object which pivot lands on the same spot of that shape,
+    their vertices relative to pivot then only differ by rotation, and so do their rotation searches.
+    """
+    shape_index, positions = shapes
+
+    sources: dict[bpy.types.Object, bpy.types.Object] = {}
+    searched: dict[int, list[bpy.types.Object]] = {}
+    for obj in objects:
+        candidates = searched.setdefault(int(shape_index.representatives[positions[obj]]), [])
+        for candidate in candidates:
+            transform = shape_index.relative_transform(positions[candidate], positions[obj])
+            if np.abs(transform[:3, :3] @ pivots[candidate] + transform[:3, 3] - pivots[obj]).max() <= SHAPE_TOLERANCE:
+                sources[obj] = candidate
+                break
         else:
-            break
+            candidates.append(obj)
+    return sources
 
-    return mathutils.Vector((closest_included_positions.mean(axis=0)))
 
+def __find_level_rotations(context, engine: TransformEngine, objects: list[bpy.types.Object], shapes: tuple['ShapeIndex', dict[bpy.types.Object, int]] = None, pivots: dict[bpy.types.Object, np.ndarray] = None) -> list[mathutils.Vector]:
+    """
+    Rotation directions of all objects, searched from their origin in a single batch.
+    With shapes, objects repeating shape and pivot of another object of the level take its direction rotated into their placement.
+    """
+    from .MeshArrays import matrix_to_array
+    from ..kernels.PivotSolver import find_directions, bound_box_coords
 
-def __set_rotation(obj: bpy.types.Object, axis=mathutils.Vector((0, 0, 1))):
-    axis = axis.normalized()
+    properties = get_calculate_rotation_settings(context)
 
-    current_rotation_mode = obj.rotation_mode
-    obj.rotation_mode = "QUATERNION"
+    # Bounding boxes are aligned to local axes, they do not rotate with the shape
+    sources: dict[bpy.types.Object, bpy.types.Object] = {}
+    if shapes is not None and properties.item_type == 'vertex':
+        sources = __shape_sources(shapes, objects, pivots)
+    to_search = [obj for obj in objects if obj not in sources]
 
-    quat = obj.matrix_world.to_quaternion().inverted() @ axis.to_track_quat('X', 'Z')
+    coords: list[np.ndarray] = []
+    offsets = np.zeros(len(to_search) + 1, dtype=np.int64)
+    matrices = np.zeros((len(to_search), 4, 4))
+    for idx, obj in enumerate(to_search):
+        obj_coords = engine.local_coords(obj)
+        coords.append(obj_coords)
+        offsets[idx + 1] = offsets[idx] + len(obj_coords)
+        matrices[idx] = matrix_to_array(engine.world_matrix(obj))
 
-    inverted_quat = quat.inverted()
-    obj.rotation_quaternion = inverted_quat
+    coords: np.ndarray = np.concatenate(coords) if len(coords) > 0 else np.zeros((0, 3))
 
-    with bpy.context.temp_override(selected_editable_objects=[obj]):
-        bpy.ops.object.transform_apply(location=False, rotation=True, scale=False)
+    if properties.item_type != 'vertex':
+        coords, offsets = bound_box_coords(coords, offsets, np.linalg.norm(matrices[:, :3, :3], axis=1))
 
-    obj.rotation_quaternion = quat
+    directions = find_directions(coords, offsets, np.zeros((len(to_search), 3)), matrices, properties.calculation_type, properties.max_distance)
+    obj_to_direction = dict(zip(to_search, directions))
 
-    obj.rotation_mode = current_rotation_mode
+    if len(sources) > 0:
+        shape_index, positions = shapes
+        for obj, source in sources.items():
+            source_rotation = matrix_to_array(engine.world_matrix(source))[:3, :3]
+            local_direction = np.linalg.pinv(source_rotation) @ obj_to_direction[source]
+            rotation = shape_index.relative_transform(positions[source], positions[obj])[:3, :3]
+            obj_to_direction[obj] = matrix_to_array(engine.world_matrix(obj))[:3, :3] @ rotation @ local_direction
 
+    return [mathutils.Vector(obj_to_direction[obj]) for obj in objects]
 
-def __find_rotation(context, obj, pivot):
-    properties = get_calculate_rotation_settings(context)
 
-    obj_data: bpy.types.Mesh = obj.data
+def __create_mesh_data(engine: TransformEngine, obj: bpy.types.Object) -> tuple[mathutils.bvhtree.BVHTree, np.ndarray, np.ndarray]:
+    from .MeshArrays import matrix_to_array, transform_coords, create_bvh_tree
 
-    if properties.item_type == 'vertex':
-        coords = np.zeros(len(obj_data.vertices) * 3, dtype=float)
-        obj_data.vertices.foreach_get('co', coords)
+    # Stored mesh data maps to the same world placement, whether or not engine changes are pending
+    matrix_world = matrix_to_array(engine.data_world_matrix(obj))
 
-    else:
-        coords = np.zeros(8 * 3)
-        scale = obj.matrix_world.to_scale()
-        for idx in range(8):
-            coords[idx * 3 + 0] = obj.bound_box[idx][0] * scale[0]
-            coords[idx * 3 + 1] = obj.bound_box[idx][1] * scale[1]
-            coords[idx * 3 + 2] = obj.bound_box[idx][2] * scale[2]
+    # Instances share mesh arrays, only their world placement differs
+    world_coords = transform_coords(engine.stored_coords(obj), matrix_world)
+    triangles, polygon_indices, polygon_centers = engine.stored_triangles(obj)
+    bvh = create_bvh_tree(world_coords, triangles)
 
-    coords = coords.reshape(int(len(coords) / 3), 3)
+    return bvh, polygon_indices, transform_coords(polygon_centers, matrix_world)
 
-    distances = np.sqrt(np.sum(np.power(np.subtract(coords, [pivot[0], pivot[1], pivot[2]]), 2), axis=1))
-    max_dist = np.max(distances)
-    distances = np.absolute(np.subtract(distances, max_dist))
-    furthest_location = coords[np.where(distances < properties.max_distance)].mean(axis=0)
-    furthest_location = mathutils.Vector((furthest_location[0], furthest_location[1], furthest_location[2]))
 
-    return (obj.matrix_world @ furthest_location) - (obj.matrix_world @ pivot)
+def __solver_settings(context) -> dict:
+    pivot_properties = get_calculate_pivot_settings(context)
+    rotation_properties = get_calculate_rotation_settings(context)
+    return {
+        'pivot_enabled': pivot_properties.enabled,
+        'pivot_calculation_type': pivot_properties.calculation_type,
+        'pivot_max_distance': pivot_properties.max_distance,
+        'no_parent_pivot_type': pivot_properties.no_parent_pivot_type,
+        'no_parent_axis': pivot_properties.no_parent_axis,
+        'no_parent_max_axis_difference': pivot_properties.no_parent_max_axis_difference,
+        'rotation_enabled': rotation_properties.enabled,
+        'rotation_item_type': rotation_properties.item_type,
+        'rotation_calculation_type': rotation_properties.calculation_type,
+        'rotation_max_distance': rotation_properties.max_distance,
+    }
+
+
+def __solve_level_parallel(context, engine: TransformEngine, pool, solver, level: list[bpy.types.Object]) -> dict[bpy.types.Object, tuple[mathutils.Vector, mathutils.Vector]]:
+    """ Extracts level into shared memory and solves pivots and rotations in worker processes """
+    from .MeshArrays import matrix_to_array, transform_coords
+    from ..kernels.WorkerPool import share_arrays, release_arrays, split_ranges, worker_count
 
+    pivot_properties = get_calculate_pivot_settings(context)
 
-def prepare_mesh(context, selection):
+    local_coords: list[np.ndarray] = []
+    offsets = [0]
+    matrices = np.zeros((len(level), 4, 4))
+    parent_coords: list[np.ndarray] = []
+    parent_offsets = [0]
+    parent_to_idx: dict[bpy.types.Object, int] = {}
+    parent_indices = np.full(len(level), -1, dtype=np.int64)
+    known_pivots = np.zeros((len(level), 3))
+    has_known_pivot = np.zeros(len(level), dtype=bool)
+
+    obj_to_data: dict[bpy.types.Object, tuple[mathutils.bvhtree.BVHTree, np.ndarray, np.ndarray]] = {}
+
+    for idx, obj in enumerate(level):
+        coords = engine.local_coords(obj)
+        local_coords.append(coords)
+        offsets.append(offsets[-1] + len(coords))
+        matrices[idx] = matrix_to_array(engine.world_matrix(obj))
+
+        if not pivot_properties.enabled or obj.parent is None or obj.parent.type != 'MESH':
+            continue
+
+        # BVH overlaps need mathutils, so they are resolved here and only the fallback search goes to workers
+        if pivot_properties.item_type == 'overlap':
+            if obj.parent not in obj_to_data:
+                obj_to_data[obj.parent] = __create_mesh_data(engine, obj.parent)
+            pivot = __find_overlap_pivot(__create_mesh_data(engine, obj), obj_to_data[obj.parent])
+            if pivot is not None:
+                known_pivots[idx] = pivot
+                has_known_pivot[idx] = True
+                continue
+
+        if obj.parent not in parent_to_idx:
+            parent_to_idx[obj.parent] = len(parent_coords)
+            coords = transform_coords(engine.local_coords(obj.parent), matrix_to_array(engine.world_matrix(obj.parent)))
+            parent_coords.append(coords)
+            parent_offsets.append(parent_offsets[-1] + len(coords))
+        parent_indices[idx] = parent_to_idx[obj.parent]
+
+    blocks, descriptors = share_arrays({
+        'local_coords': np.concatenate(local_coords) if len(local_coords) > 0 else np.zeros((0, 3)),
+        'offsets': np.array(offsets, dtype=np.int64),
+        'matrices': matrices,
+        'parent_coords': np.concatenate(parent_coords) if len(parent_coords) > 0 else np.zeros((0, 3)),
+        'parent_offsets': np.array(parent_offsets, dtype=np.int64),
+        'parent_indices': parent_indices,
+        'known_pivots': known_pivots,
+        'has_known_pivot': has_known_pivot,
+    })
+
+    try:
+        settings = __solver_settings(context)
+        ranges = split_ranges(len(level), worker_count(pivot_properties.num_workers) * 4)
+        futures = [(start, pool.submit(solver.solve_level, descriptors, settings, start, stop)) for start, stop in ranges]
+
+        result: dict[bpy.types.Object, tuple[mathutils.Vector, mathutils.Vector]] = {}
+        for start, future in futures:
+            pivots, directions = future.result()
+            for idx in range(len(pivots)):
+                result[level[start + idx]] = mathutils.Vector(pivots[idx]), mathutils.Vector(directions[idx])
+        return result
+    finally:
+        release_arrays(blocks, unlink=True)
+
+
+def __create_cache(context):
+    from .SolveCache import SolveCache
+
+    pivot_properties = get_calculate_pivot_settings(context)
+    if not pivot_properties.use_cache:
+        return None
+    return SolveCache(__solver_settings(context) | {'pivot_item_type': pivot_properties.item_type})
+
+
+def __analyze(context, engine: TransformEngine, selection, cache, hierarchy: ObjectHierarchy) -> tuple[dict[bpy.types.Object, tuple[mathutils.Vector, mathutils.Vector]], set[bpy.types.Object]]:
+    """
+    Solves pivots and rotations as engine changes, nothing is written while engine is deferred.
+    Returns world space pivot and direction of every object and objects which results came from cache.
+    """
     from math import ceil
     from ..Utils import ProgressBar
 
@@ -161,101 +271,228 @@ def prepare_mesh(context, selection):
 
     obj: bpy.types.Object
 
-    with bpy.context.temp_override(selected_editable_objects=selection):
-        bpy.ops.object.transform_apply(location=pivot_properties.enabled, rotation=rotation_properties.enabled, scale=True)
+    cached: dict[bpy.types.Object, tuple[mathutils.Vector, mathutils.Vector]] = {}
+    results: dict[bpy.types.Object, tuple[mathutils.Vector, mathutils.Vector]] = {}
+
+    to_process: list[bpy.types.Object] = selection
+    if cache is not None:
+        to_process = []
+        for obj in selection:
+            entry = cache.lookup(obj, cache.key(obj))
+            if entry is None:
+                to_process.append(obj)
+                continue
+
+            is_solved, pivot, direction = entry
+            results[obj] = pivot, direction
+            # Objects still in their solved state are left untouched
+            if not is_solved:
+                cached[obj] = pivot, direction
+                to_process.append(obj)
+
+    cache_hits = set(results.keys())
+
+    engine.apply(to_process, location=pivot_properties.enabled, rotation=rotation_properties.enabled, scale=True)
+
+    obj_by_levels = hierarchy.levels(to_process)
+
+    pool = None
+    solver = None
+    if pivot_properties.parallel and len(cached) < len(to_process):
+        from ..kernels.WorkerPool import kernel_module, create_pool
+        solver = kernel_module('PivotSolver')
+        pool = create_pool(pivot_properties.num_workers)
+
+    # Built before any origin moves, pivots below are kept in the same local coordinates
+    shapes = None
+    local_pivots: dict[bpy.types.Object, np.ndarray] = {}
+    if pivot_properties.reuse_shapes and rotation_properties.enabled and rotation_properties.item_type == 'vertex' and pool is None:
+        shapes = __create_shape_index(engine, [obj for obj in to_process if obj not in cached])
+
+    progress = ProgressBar('Processing meshes {1} of {0}', max(len(to_process), 1))
+    target_idx = len(obj_by_levels) - 1
+    try:
+        while target_idx >= 0:
+            obj_to_data: dict[bpy.types.Object, tuple[mathutils.bvhtree.BVHTree, np.ndarray, np.ndarray]] = {}
 
-    progress = ProgressBar('Arranging meshes {1} of {0}', len(selection))
+            level = obj_by_levels[target_idx]
+            level_to_solve = [obj for obj in level if obj not in cached]
 
-    obj_by_levels: list[list[bpy.types.Object]] = []
+            solved: dict[bpy.types.Object, tuple[mathutils.Vector, mathutils.Vector]] = {}
+            if pool is not None and len(level_to_solve) > 0:
+                solved = __solve_level_parallel(context, engine, pool, solver, level_to_solve)
 
-    def create_mesh_data(obj: bpy.types.Object):
-        kd = mathutils.kdtree.KDTree(len(obj.data.vertices))
-        for idx, vertex in enumerate(obj.data.vertices):
-            kd.insert(obj.matrix_world @ vertex.co, idx)
-        kd.balance()
+            step = ceil(len(level) / 100)
 
-        bm: bmesh.types.BMesh = bmesh.new()
-        bm.from_mesh(obj.data)
-        bm.transform(obj.matrix_world)
-        bm.faces.ensure_lookup_table()
-        bvh = mathutils.bvhtree.BVHTree.FromBMesh(bm)
+            idx = 0
+            for obj in level:
+                world_pivot = engine.world_matrix(obj).to_translation()
+                if pivot_properties.enabled:
+                    if obj in cached:
+                        pivot = engine.world_matrix(obj).inverted() @ cached[obj][0]
+                    elif obj in solved:
+                        pivot = solved[obj][0]
+                    elif obj.parent is not None and obj.parent.type == 'MESH':
+                        mesh_data = None
+                        parent_data = None
+                        if pivot_properties.item_type == 'overlap':
+                            mesh_data = __create_mesh_data(engine, obj)
+                            if obj.parent not in obj_to_data:
+                                obj_to_data[obj.parent] = __create_mesh_data(engine, obj.parent)
+                            parent_data = obj_to_data[obj.parent]
+
+                        pivot = __find_pivot(context, engine, obj, mesh_data, parent_data)
+                    else:
+                        pivot = __find_parentless_pivot(context, engine, obj)
+
+                    world_pivot = engine.world_matrix(obj) @ pivot
+                    __set_origin(engine, obj, pivot)
+                    local_pivots[obj] = np.array(pivot)
+                else:
+                    local_pivots[obj] = np.zeros(3)
 
-        return kd, bvh, bm
+                results[obj] = world_pivot, mathutils.Vector((0, 0, 0))
 
-    step = ceil(len(selection) / 100)
-    idx = 0
-    for obj in selection:
-        num_parents = 0
-        parent = obj.parent
-        while parent is not None:
-            parent = parent.parent
-            num_parents += 1
-        for i in range(len(obj_by_levels), num_parents + 1):
-            obj_by_levels.append([])
-        obj_by_levels[num_parents].append(obj)
+                idx += 1
+
+                if idx % step == step - 1:
+                    progress += step
+
+            if rotation_properties.enabled:
+                if len(solved) > 0:
+                    directions = [solved[obj][1] for obj in level_to_solve]
+                else:
+                    directions = __find_level_rotations(context, engine, level_to_solve, shapes, local_pivots)
+                obj_to_direction = dict(zip(level_to_solve, directions))
 
-        idx += 1
+                for obj in level:
+                    direction = cached[obj][1] if obj in cached else obj_to_direction[obj]
+                    __set_rotation(engine, obj, direction)
+                    results[obj] = results[obj][0], direction
 
-        if idx % step == step - 1:
-            progress += step
+            target_idx -= 1
+    finally:
+        if pool is not None:
+            pool.shutdown()
 
     progress.finish()
 
-    progress = ProgressBar('Processing meshes {1} of {0}', len(selection))
-    target_idx = len(obj_by_levels) - 1
-    while target_idx >= 0:
-        obj_to_data: dict[bpy.types.Object, tuple[mathutils.kdtree.KDTree, mathutils.bvhtree.BVHTree, bmesh.types.BMesh]] = {}
-        obj_to_rot_data: dict[bpy.types.Object, tuple[mathutils.Quaternion, str]] = {}
+    return results, cache_hits
 
-        step = ceil(len(obj_by_levels[target_idx]) / 100)
 
-        idx = 0
-        for obj in obj_by_levels[target_idx]:
-            if pivot_properties.enabled:
-                if obj.parent is not None and obj.parent.type == 'MESH':
-                    mesh_data = create_mesh_data(obj)
+def __store_cache(cache, selection, results: dict[bpy.types.Object, tuple[mathutils.Vector, mathutils.Vector]], cache_hits: set[bpy.types.Object], input_keys: dict[bpy.types.Object, str]):
+    cache.clear()
+    for obj in selection:
+        if obj in results:
+            # Earlier states only map to these results, when the results came from them
+            keys = cache.previous_keys(obj) if obj in cache_hits else []
+            keys += [input_keys[obj], cache.key(obj)]
+            cache.store(obj, keys, results[obj][0], results[obj][1])
 
-                    if obj.parent not in obj_to_data:
-                        obj_to_data[obj.parent] = create_mesh_data(obj.parent)
 
-                    parent_data = obj_to_data[obj.parent]
-                    pivot = __find_pivot(context, obj, mesh_data, parent_data)
-                else:
-                    pivot = __find_parentless_pivot(context, obj)
+def __skip_conflicts(operator: bpy.types.Operator | None, engine: TransformEngine, results: dict[bpy.types.Object, tuple[mathutils.Vector, mathutils.Vector]]):
+    """ Objects engine left unchanged have no results to store """
+    for obj in engine.conflicts:
+        results.pop(obj, None)
 
-                obj.data.transform(mathutils.Matrix.Translation(-pivot))
-                obj.location += pivot
-                for c in obj.children:
-                    c.matrix_parent_inverse.translation -= pivot
+    if operator is not None:
+        from .MeshInstances import report_conflicts
+        report_conflicts(operator, engine.conflicts, "%d objects share meshes which need different pivots or rotations, they were left unchanged", 'WARNING')
 
-            if rotation_properties.enabled:
-                rotation = __find_rotation(context, obj, mathutils.Vector((0, 0, 0))).normalized()
 
-                current_rotation_mode = obj.rotation_mode
-                obj.rotation_mode = "QUATERNION"
+def prepare_mesh(context, selection, hierarchy: ObjectHierarchy = None, operator: bpy.types.Operator = None) -> int:
+    """ Returns number of objects which results came from cache, objects sharing a mesh which needs different changes are reported """
+    if hierarchy is None:
+        hierarchy = ObjectHierarchy(selection)
+    cache = __create_cache(context)
+    input_keys: dict[bpy.types.Object, str] = {obj: cache.key(obj) for obj in selection} if cache is not None else {}
+
+    engine = TransformEngine(deferred=True, instance_aware=get_mesh_operations_settings(context).instance_aware)
+    results, cache_hits = __analyze(context, engine, selection, cache, hierarchy)
+    engine.commit()
+    __skip_conflicts(operator, engine, results)
+
+    # World matrices were tracked by the engine, scene only needs to be evaluated once at the end
+    bpy.context.view_layer.update()
 
-                quat = obj.matrix_world.to_quaternion().inverted() @ rotation.to_track_quat('X', 'Z')
+    if cache is not None:
+        __store_cache(cache, selection, results, cache_hits, input_keys)
 
-                obj.rotation_quaternion = quat.inverted()
-                obj_to_rot_data[obj] = quat, current_rotation_mode
+    return len(cache_hits)
 
-            idx += 1
 
-            if idx % step == step - 1:
-                progress += step
+def analyze_mesh(context, selection, hierarchy: ObjectHierarchy = None, operator: bpy.types.Operator = None) -> tuple[int, int]:
+    """
+    Solves pivots and rotations without changing meshes or transforms, world space results are stored
+    in ANALYSIS_PROPERTY of every object for review. Objects sharing a mesh which needs different changes
+    get no results and are reported. Returns number of analyzed objects and cache hits.
+    """
+    pivot_properties = get_calculate_pivot_settings(context)
+    rotation_properties = get_calculate_rotation_settings(context)
+
+    if hierarchy is None:
+        hierarchy = ObjectHierarchy(selection)
 
+    cache = __create_cache(context)
+    engine = TransformEngine(deferred=True, instance_aware=get_mesh_operations_settings(context).instance_aware)
+    results, cache_hits = __analyze(context, engine, selection, cache, hierarchy)
+    # Same objects commit would leave unchanged
+    engine.find_conflicts()
+    __skip_conflicts(operator, engine, results)
+
+    num_analyzed = 0
+    for obj in selection:
+        if ANALYSIS_PROPERTY in obj:
+            del obj[ANALYSIS_PROPERTY]
+        if obj not in results:
+            continue
+
+        analysis = {}
+        if pivot_properties.enabled:
+            analysis['pivot'] = list(results[obj][0])
         if rotation_properties.enabled:
-            idx = 0
-            with bpy.context.temp_override(selected_editable_objects=obj_by_levels[target_idx]):
-                bpy.ops.object.transform_apply(location=False, rotation=True, scale=False)
-            for obj, data in obj_to_rot_data.items():
-                obj.rotation_quaternion = data[0]
-                obj.rotation_mode = data[1]
-                idx += 1
+            analysis['direction'] = list(results[obj][1])
+        obj[ANALYSIS_PROPERTY] = analysis
+        num_analyzed += 1
 
-        if len(obj_by_levels[target_idx]) > 0:
-            bpy.context.view_layer.update()
+    return num_analyzed, len(cache_hits)
 
-        target_idx -= 1
 
-    progress.finish()
+def commit_mesh(context, selection, operator: bpy.types.Operator = None) -> int:
+    """ Applies results stored by analyze_mesh in one batch, returns number of committed objects """
+    cache = __create_cache(context)
+
+    objects = [obj for obj in selection if ANALYSIS_PROPERTY in obj]
+    input_keys: dict[bpy.types.Object, str] = {obj: cache.key(obj) for obj in objects} if cache is not None else {}
+
+    engine = TransformEngine(deferred=True, instance_aware=get_mesh_operations_settings(context).instance_aware)
+    results: dict[bpy.types.Object, tuple[mathutils.Vector, mathutils.Vector]] = {}
+    for obj in objects:
+        analysis = obj[ANALYSIS_PROPERTY]
+        has_pivot = 'pivot' in analysis
+        has_direction = 'direction' in analysis
+        engine.apply([obj], location=has_pivot, rotation=has_direction, scale=True)
+
+        # Pending changes keep children in place, so objects can be committed in any order
+        world_pivot = mathutils.Vector(analysis['pivot']) if has_pivot else engine.world_matrix(obj).to_translation()
+        if has_pivot:
+            __set_origin(engine, obj, engine.world_matrix(obj).inverted() @ world_pivot)
+
+        direction = mathutils.Vector(analysis['direction']) if has_direction else mathutils.Vector((0, 0, 0))
+        if has_direction:
+            __set_rotation(engine, obj, direction)
+
+        results[obj] = world_pivot, direction
+
+    num_committed = engine.commit()
+    __skip_conflicts(operator, engine, results)
+    bpy.context.view_layer.update()
+
+    for obj in objects:
+        if obj in results:
+            del obj[ANALYSIS_PROPERTY]
+
+    if cache is not None:
+        __store_cache(cache, objects, results, set(), input_keys)
+
+    return num_committed
@@ -0,0 +1,93 @@
+import hashlib
+
+import bpy
+import mathutils
+import numpy as np
+
+from .MeshArrays import mesh_hash
+
+CACHE_PROPERTY = 'PivotPainterSolve'
+
+# Input and output states of previous runs that map to the same result
+MAX_KEYS = 4
+
+
+class SolveCache:
+    """
+    Pivot and rotation results stored in object custom properties, keyed by a hash of object geometry,
+    transform chain, parent geometry and solver settings. Results are kept in world space, so they stay valid
+    for every state with the same world placement, both before and after they were applied.
+    """
+    __settings: bytes
+    __mesh_hashes: dict[bpy.types.Mesh, bytes]
+    __state_hashes: dict[bpy.types.Object, bytes]
+
+    def __init__(self, settings: dict):
+        self.__settings = repr(sorted(settings.items())).encode()
+        self.clear()
+
+    def clear(self):
+        """ Forget hashes, must be called after objects were changed """
+        self.__mesh_hashes = {}
+        self.__state_hashes = {}
+
+    def key(self, obj: bpy.types.Object) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(self.__settings)
+        digest.update(self.__state_hash(obj))
+        if obj.parent is not None and obj.parent.type == 'MESH':
+            digest.update(self.__mesh_hash(obj.parent.data))
+        return digest.hexdigest()
+
+    @staticmethod
+    def lookup(obj: bpy.types.Object, key: str) -> tuple[bool, mathutils.Vector, mathutils.Vector] | None:
+        """ Returns whether object is already in solved state, world pivot and world direction """
+        entry = obj.get(CACHE_PROPERTY)
+        if entry is None:
+            return None
+
+        keys = entry.get('keys', '').split(',')
+        if key not in keys:
+            return None
+
+        return key == keys[-1], mathutils.Vector(entry['pivot']), mathutils.Vector(entry['direction'])
+
+    @staticmethod
+    def store(obj: bpy.types.Object, keys: list[str], pivot: mathutils.Vector, direction: mathutils.Vector):
+        """ Last key must be the solved (output) state """
+        unique_keys: list[str] = []
+        for key in keys:
+            if key in unique_keys:
+                unique_keys.remove(key)
+            unique_keys.append(key)
+
+        obj[CACHE_PROPERTY] = {
+            'keys': ','.join(unique_keys[-MAX_KEYS:]),
+            'pivot': list(pivot),
+            'direction': list(direction),
+        }
+
+    @staticmethod
+    def previous_keys(obj: bpy.types.Object) -> list[str]:
+        entry = obj.get(CACHE_PROPERTY)
+        if entry is None:
+            return []
+        return [key for key in entry.get('keys', '').split(',') if len(key) > 0]
+
+    def __mesh_hash(self, mesh: bpy.types.Mesh) -> bytes:
+        if mesh not in self.__mesh_hashes:
+            self.__mesh_hashes[mesh] = mesh_hash(mesh)
+        return self.__mesh_hashes[mesh]
+
+    def __state_hash(self, obj: bpy.types.Object) -> bytes:
+        """ Geometry and whole transform chain, from properties only so it does not depend on depsgraph evaluation """
+        if obj not in self.__state_hashes:
+            digest = hashlib.blake2b(digest_size=16)
+            if obj.type == 'MESH':
+                digest.update(self.__mesh_hash(obj.data))
+            digest.update(np.array(obj.matrix_basis, dtype=np.float32).tobytes())
+            if obj.parent is not None:
+                digest.update(np.array(obj.matrix_parent_inverse, dtype=np.float32).tobytes())
+                digest.update(self.__state_hash(obj.parent))
+            self.__state_hashes[obj] = digest.digest()
+        return self.__state_hashes[obj]
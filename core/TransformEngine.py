@@ -0,0 +1,184 @@
+import bpy
+import mathutils
+import numpy as np
+
+from .MeshArrays import read_local_coords, write_local_coords, matrix_to_array, transform_coords
+
+
+class TransformEngine:
+    """
+    Applies object transform changes without operators, by writing mesh coordinates, object basis and
+    children parent inverse matrices directly. World matrices are tracked analytically from the first
+    read, so no view layer update is needed between changes.
+    When deferred, changes are only accumulated per object and nothing is written until commit.
+    When also instance aware, objects sharing a mesh are accepted, their mesh is written once if all of its users
+    need the same change, otherwise they are left unchanged and listed in conflicts.
+    """
+    __world: dict[bpy.types.Object, mathutils.Matrix]
+    __pending: dict[bpy.types.Object, mathutils.Matrix]
+    __mesh_coords: dict[bpy.types.Mesh, np.ndarray]
+    __mesh_triangles: dict[bpy.types.Mesh, tuple[np.ndarray, np.ndarray]]
+    __deferred: bool
+    __instance_aware: bool
+    conflicts: list[bpy.types.Object]
+
+    def __init__(self, deferred: bool = False, instance_aware: bool = False):
+        self.__world = {}
+        self.__pending = {}
+        self.__mesh_coords = {}
+        self.__mesh_triangles = {}
+        self.__deferred = deferred
+        self.__instance_aware = instance_aware
+        self.conflicts = []
+
+    def world_matrix(self, obj: bpy.types.Object) -> mathutils.Matrix:
+        if obj not in self.__world:
+            self.__world[obj] = obj.matrix_world.copy()
+        return self.__world[obj]
+
+    def data_world_matrix(self, obj: bpy.types.Object) -> mathutils.Matrix:
+        """ Maps coordinates currently stored in object mesh to world space """
+        if obj not in self.__pending:
+            return self.world_matrix(obj)
+        return self.world_matrix(obj) @ self.__pending[obj].inverted()
+
+    def basis_matrix(self, obj: bpy.types.Object) -> mathutils.Matrix:
+        if obj not in self.__pending:
+            return obj.matrix_basis.copy()
+        return obj.matrix_basis @ self.__pending[obj]
+
+    def stored_coords(self, obj: bpy.types.Object) -> np.ndarray:
+        """ Coordinates currently stored in object mesh """
+        if not self.__deferred:
+            return read_local_coords(obj.data)
+
+        # Meshes are not written until commit, instances read their shared mesh once
+        if obj.data not in self.__mesh_coords:
+            self.__mesh_coords[obj.data] = read_local_coords(obj.data)
+        return self.__mesh_coords[obj.data]
+
+    def stored_triangles(self, obj: bpy.types.Object) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """ Loop triangles of object mesh, polygon of every triangle and polygon centers, in stored coordinates """
+        from .MeshArrays import read_loop_triangles, polygon_centers
+
+        if obj.data in self.__mesh_triangles:
+            return self.__mesh_triangles[obj.data]
+
+        triangles, polygon_indices = read_loop_triangles(obj.data)
+        result = triangles, polygon_indices, polygon_centers(obj.data, self.stored_coords(obj))
+        if self.__deferred:
+            self.__mesh_triangles[obj.data] = result
+        return result
+
+    def local_coords(self, obj: bpy.types.Object) -> np.ndarray:
+        """ Mesh coordinates as they are, or would be after pending changes """
+        coords = self.stored_coords(obj)
+        if obj not in self.__pending:
+            return coords
+        return transform_coords(coords, matrix_to_array(self.__pending[obj].inverted()))
+
+    def transform(self, obj: bpy.types.Object, delta: mathutils.Matrix):
+        """ Right multiplies object basis by delta, while mesh and children keep their world placement """
+        if obj.data.users > 1 and not (self.__deferred and self.__instance_aware):
+            raise RuntimeError("Cannot apply to a multi user: Object \"" + obj.name + "\", Mesh \"" + obj.data.name + "\", aborting")
+
+        world = self.world_matrix(obj)
+
+        if self.__deferred:
+            self.__pending[obj] = self.__pending[obj] @ delta if obj in self.__pending else delta.copy()
+        else:
+            self.__write(obj, delta)
+
+        self.__world[obj] = world @ delta
+
+    def __pending_by_mesh(self) -> dict[bpy.types.Mesh, tuple[list[bpy.types.Object], bool]]:
+        """ Objects with pending changes of every mesh, and whether commit can write them """
+        from .MeshInstances import group_by_mesh, mesh_users
+
+        by_mesh = group_by_mesh(list(self.__pending.keys()))
+        users = mesh_users([mesh for mesh in by_mesh.keys() if mesh.users > 1])
+
+        result = {}
+        for mesh, objects in by_mesh.items():
+            deltas = [self.__pending[obj] for obj in objects]
+            writable = len(users.get(mesh, objects)) == len(objects) and all(self.__same_matrix(deltas[0], delta) for delta in deltas[1:])
+            result[mesh] = objects, writable
+        return result
+
+    def find_conflicts(self) -> list[bpy.types.Object]:
+        """ Objects commit would leave unchanged, nothing is written and pending changes are kept """
+        self.conflicts = [obj for objects, writable in self.__pending_by_mesh().values() if not writable for obj in objects]
+        return self.conflicts
+
+    def commit(self) -> int:
+        """ Writes all pending changes, every mesh, basis and parent inverse once. Returns number of changed objects """
+        num_objects = 0
+        self.conflicts = []
+        for mesh, (objects, writable) in self.__pending_by_mesh().items():
+            deltas = [self.__pending[obj] for obj in objects]
+            if not writable:
+                self.conflicts.extend(objects)
+                continue
+
+            self.__transform_mesh(mesh, deltas[0].inverted())
+            for obj, delta in zip(objects, deltas):
+                self.__write_object(obj, delta)
+            num_objects += len(objects)
+
+        self.__pending = {}
+        self.__mesh_coords = {}
+        self.__mesh_triangles = {}
+        return num_objects
+
+    def apply(self, objects: list[bpy.types.Object], location: bool = False, rotation: bool = False, scale: bool = False):
+        """ Same result as bpy.ops.object.transform_apply, children keep their world placement """
+        for obj in objects:
+            basis = self.basis_matrix(obj)
+            basis_location, basis_rotation, basis_scale = basis.decompose()
+
+            new_basis = mathutils.Matrix.Identity(4)
+            if not location:
+                new_basis = new_basis @ mathutils.Matrix.Translation(basis_location)
+            if not rotation:
+                new_basis = new_basis @ basis_rotation.to_matrix().to_4x4()
+            if not scale:
+                new_basis = new_basis @ mathutils.Matrix.Diagonal(basis_scale.to_4d())
+
+            self.transform(obj, basis.inverted() @ new_basis)
+
+    @staticmethod
+    def __same_matrix(first: mathutils.Matrix, second: mathutils.Matrix) -> bool:
+        return np.allclose(matrix_to_array(first), matrix_to_array(second), atol=1e-6)
+
+    @staticmethod
+    def __write(obj: bpy.types.Object, delta: mathutils.Matrix):
+        TransformEngine.__transform_mesh(obj.data, delta.inverted())
+        TransformEngine.__write_object(obj, delta)
+
+    @staticmethod
+    def __write_object(obj: bpy.types.Object, delta: mathutils.Matrix):
+        """ Basis and children of object, its mesh must already be transformed """
+        inverted_delta = delta.inverted()
+
+        obj.matrix_basis = obj.matrix_basis @ delta
+        for child in obj.children:
+            child.matrix_parent_inverse = inverted_delta @ child.matrix_parent_inverse
+
+    @staticmethod
+    def __transform_mesh(mesh: bpy.types.Mesh, matrix: mathutils.Matrix):
+        # Custom split normals need Blender to rotate them, coordinates alone are written in bulk
+        if mesh.has_custom_normals:
+            mesh.transform(matrix)
+            return
+
+        matrix_array = matrix_to_array(matrix)
+        write_local_coords(mesh, transform_coords(read_local_coords(mesh), matrix_array))
+
+        if mesh.shape_keys is not None:
+            for key_block in mesh.shape_keys.key_blocks:
+                coords = np.empty(len(key_block.data) * 3, dtype=np.float32)
+                key_block.data.foreach_get('co', coords)
+                coords = transform_coords(coords.reshape(-1, 3).astype(float), matrix_array)
+                key_block.data.foreach_set('co', coords.astype(np.float32).ravel())
+
+        mesh.update()
@@ -0,0 +1,189 @@
+import os
+
+import bpy
+import numpy as np
+
+from ..Properties import *
+from .CreateTextures import find_texture_dimensions, texel_order, texel_indices, selection_parents, channels_name, attribute_name, texture_max_index, validate_textures
+
+
+class SceneSnapshot:
+    """
+    Object data packers read, as arrays over selection, read from the scene once per verification.
+    Matrix based values are read up front, everything else only when a packer asks for it.
+    """
+    selection: list[bpy.types.Object]
+    translations: np.ndarray
+    scales: np.ndarray
+    rotations: np.ndarray
+    __context: bpy.types.Context
+    __hierarchy: 'ObjectHierarchy'
+    __cache: dict[str, np.ndarray]
+
+    def __init__(self, context: bpy.types.Context, selection: list[bpy.types.Object], hierarchy: 'ObjectHierarchy' = None):
+        self.selection = selection
+        self.__context = context
+        self.__hierarchy = hierarchy
+        self.__cache = {}
+
+        matrices = np.array([obj.matrix_world for obj in selection], dtype=float).reshape(-1, 4, 4)
+        self.translations = matrices[:, :3, 3]
+        self.scales = np.linalg.norm(matrices[:, :3, :3], axis=1)
+        self.rotations = matrices[:, :3, :3] / np.maximum(self.scales, 1e-12)[:, None, :]
+
+    def __cached(self, name: str, read) -> np.ndarray:
+        if name not in self.__cache:
+            self.__cache[name] = read()
+        return self.__cache[name]
+
+    def dimensions(self) -> np.ndarray:
+        return self.__cached('dimensions', lambda: np.array([obj.dimensions for obj in self.selection], dtype=float).reshape(-1, 3))
+
+    def bound_boxes(self) -> np.ndarray:
+        return self.__cached('bound_boxes', lambda: np.array([[tuple(corner) for corner in obj.bound_box] for obj in self.selection], dtype=float).reshape(-1, 8, 3))
+
+    def parent_indices(self) -> np.ndarray:
+        """ Selection index of every object parent, -1 when parent is not selected """
+        return self.__cached('parent_indices', lambda: selection_parents(self.selection))
+
+    def parent_translations(self) -> np.ndarray:
+        return self.__cached('parent_translations', lambda: np.array([obj.parent.matrix_world.to_translation() if obj.parent else (0, 0, 0) for obj in self.selection], dtype=float).reshape(-1, 3))
+
+    def mesh_depths(self) -> np.ndarray:
+        def read():
+            if self.__hierarchy is None:
+                from .ObjectHierarchy import ObjectHierarchy
+                self.__hierarchy = ObjectHierarchy(self.selection)
+            return self.__hierarchy.mesh_index.depths[[self.__hierarchy.index_of(obj) for obj in self.selection]]
+        return self.__cached('mesh_depths', read)
+
+    def selection_orders(self) -> np.ndarray:
+        return self.__cached('selection_orders', lambda: np.array([obj.get("SelectionOrder", -1) for obj in self.selection], dtype=np.int64))
+
+    def empty_axis_meshes(self) -> np.ndarray:
+        def read():
+            names = {item.name for item in get_mesh_operations_settings(self.__context).empty_axis_meshes}
+            return np.array([obj.name in names for obj in self.selection], dtype=bool)
+        return self.__cached('empty_axis_meshes', read)
+
+    def unreal_quaternions(self) -> np.ndarray:
+        """ Same conversion as PackQuaternion, Euler order remapping has no closed array form """
+        from ..Utils import convert_blender_to_unreal_rotation
+        return self.__cached('unreal_quaternions', lambda: np.array([tuple(convert_blender_to_unreal_rotation(obj.matrix_world.to_euler('XYZ')).to_quaternion()) for obj in self.selection], dtype=float).reshape(-1, 4))
+
+
+def channel_errors(decoded: np.ndarray, expected: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ Largest and mean absolute error of every channel, and whether channel had any known expected value """
+    known = ~np.isnan(expected)
+    differences = np.where(known, np.abs(decoded - np.where(known, expected, 0)), 0)
+    counts = np.count_nonzero(known, axis=0)
+    maxima = differences.max(axis=0, initial=0)
+    means = differences.sum(axis=0) / np.maximum(counts, 1)
+    return maxima, means, counts > 0
+
+
+def __read_image(context: bpy.types.Context, name: str, size: list[int], count: int) -> tuple[np.ndarray | None, str]:
+    """ Pixels of objects from saved texture when there is one, otherwise from image in memory, with where they came from """
+    properties = get_texture_settings(context)
+
+    path = ''
+    if properties.save_textures:
+        for extension in ('.exr', '.png'):
+            if os.path.exists(bpy.path.abspath(properties.folder_path) + name + extension):
+                path = bpy.path.abspath(properties.folder_path) + name + extension
+
+    image = bpy.data.images.load(path, check_existing=False) if path != '' else bpy.data.images.get(name)
+    if image is None:
+        return None, name
+    try:
+        image.colorspace_settings.is_data = True
+        if tuple(image.size) != tuple(size):
+            return None, name + ' (size ' + str(tuple(image.size)) + ', expected ' + str(tuple(size)) + ')'
+        pixels = np.empty(size[0] * size[1] * 4, dtype=np.float32)
+        image.pixels.foreach_get(pixels)
+    finally:
+        if path != '':
+            bpy.data.images.remove(image)
+
+    return pixels.reshape(-1, 4)[texel_indices(size, count)], path if path != '' else name
+
+
+def __read_attributes(selection: list[bpy.types.Object], name: str, attribute_type: str) -> tuple[np.ndarray | None, str]:
+    """ Values of first vertex of every object, attributes hold the same value on all of them """
+    values = np.full((len(selection), 4), np.nan, dtype=np.float32)
+    for idx, obj in enumerate(selection):
+        if attribute_type == 'color':
+            attribute = obj.data.color_attributes.get(name)
+            if attribute is None:
+                return None, name
+            if len(attribute.data) > 0:
+                values[idx] = attribute.data[0].color
+            continue
+
+        for offset, suffix in ((0, '_RG'), (2, '_BA')):
+            uv_layer = obj.data.uv_layers.get(name + suffix)
+            if uv_layer is None:
+                return None, name + suffix
+            if len(uv_layer.data) > 0:
+                values[idx, offset:offset + 2] = uv_layer.data[0].uv
+    return values, name
+
+
+def verify_textures(operator: bpy.types.Operator, context: bpy.types.Context, objects: list[bpy.types.Object] = None) -> list[tuple[str, float, float, bool]] | None:
+    """
+    Decodes every channel of exported textures, or vertex attributes, with the inverse of its packer and compares it with
+    the scene. Returns channel label, largest and mean error in scene units and whether channel must be exact,
+    channels which can not be known from the scene are left out. None when something could not be read.
+    """
+    from .ObjectHierarchy import ObjectHierarchy
+    from ..kernels.TextureEncoding import select_index_encoding
+
+    selection = validate_textures(operator, context, objects)
+    if selection is None:
+        return None
+
+    properties = get_texture_settings(context)
+    textures_list = get_textures_list_settings(context)
+    name_prefix = selection[0].name
+    selection = texel_order(context, selection)
+    hierarchy = ObjectHierarchy(selection)
+    snapshot = SceneSnapshot(context, selection, hierarchy)
+    size = find_texture_dimensions(selection)
+
+    rows: list[tuple[str, float, float, bool]] = []
+    for idx, texture in enumerate(textures_list):
+        if texture.rgb == 'none' and texture.alpha == 'none':
+            continue
+
+        is_hdr = texture.generate_hdr
+        rgb_option = texture.get_rgb_option()
+        alpha_option = texture.get_alpha_option()
+        rgb_packer = rgb_option.packer(context, selection, is_hdr, hierarchy)
+        alpha_packer = alpha_option.packer(context, selection, is_hdr, hierarchy)
+
+        index_encoding = select_index_encoding(texture.index_encoding, texture_max_index(rgb_packer, alpha_packer, rgb_option.rgba()))
+        rgb_packer.set_index_encoding(index_encoding)
+        alpha_packer.set_index_encoding(index_encoding)
+
+        if properties.output_mode == 'attributes':
+            values, source = __read_attributes(selection, attribute_name(rgb_option, alpha_option, is_hdr), properties.attribute_type)
+        else:
+            values, source = __read_image(context, name_prefix + '_' + channels_name(rgb_option, alpha_option, is_hdr), size, len(selection))
+        if values is None:
+            operator.report({'ERROR'}, "Texture " + str(idx + 1) + ": could not read " + source)
+            return None
+
+        channels = [(rgb_packer, rgb_option, 'RGBA' if rgb_option.rgba() else 'RGB')]
+        if not rgb_option.rgba():
+            channels.append((alpha_packer, alpha_option, 'A'))
+
+        offset = 0
+        for packer, option, letters in channels:
+            decoded = packer.decode(values[:, offset:offset + len(letters)].astype(float))
+            maxima, means, verified = channel_errors(decoded, packer.expected(snapshot))
+            for channel, letter in enumerate(letters):
+                if verified[channel]:
+                    rows.append(("Texture %d %s (%s)" % (idx + 1, letter, option.display_name()), float(maxima[channel]), float(means[channel]), packer.stores_indices))
+            offset += len(letters)
+
+    return rows
@@ -0,0 +1,67 @@
+from typing import Generator
+
+import bpy
+import numpy as np
+
+# Objects written between two progress updates
+CHUNK_SIZE = 256
+
+# Blender meshes can not hold more UV maps
+MAX_UV_LAYERS = 8
+
+
+def __color_attribute(mesh: bpy.types.Mesh, name: str, creation: 'TextureCreation') -> bpy.types.Attribute:
+    attribute = mesh.color_attributes.get(name)
+    if attribute is not None:
+        creation.keep_color_attribute(mesh, attribute)
+    # Byte colors would clamp values, such attribute is replaced
+    if attribute is not None and attribute.data_type != 'FLOAT_COLOR':
+        mesh.color_attributes.remove(attribute)
+        attribute = None
+
+    if attribute is None:
+        attribute = mesh.color_attributes.new(name=name, type='FLOAT_COLOR', domain='POINT')
+        creation.attributes.append((mesh, name))
+    return attribute
+
+
+def __uv_layer(mesh: bpy.types.Mesh, name: str, creation: 'TextureCreation') -> bpy.types.MeshUVLoopLayer | None:
+    uv_layer = mesh.uv_layers.get(name)
+    if uv_layer is not None:
+        creation.keep_uv_layer(mesh, uv_layer)
+    if uv_layer is None:
+        uv_layer = mesh.uv_layers.new(name=name, do_init=False)
+        if uv_layer is not None:
+            creation.uv_layers.append((mesh, name))
+    return uv_layer
+
+
+def write_attributes_steps(selection: list[bpy.types.Object], values: np.ndarray, name: str, attribute_type: str, creation: 'TextureCreation') -> Generator[int, None, None]:
+    """
+    Writes RGBA values of every object to all of its vertices, as one float color attribute or as two UV maps holding RG and BA.
+    Values are the same as texture pixels of the objects, yields number of processed objects after every chunk.
+    """
+    values = np.asarray(values, dtype=np.float32)
+
+    for idx, obj in enumerate(selection):
+        if idx % CHUNK_SIZE == CHUNK_SIZE - 1:
+            yield idx
+        mesh: bpy.types.Mesh = obj.data
+
+        if attribute_type == 'color':
+            attribute = __color_attribute(mesh, name, creation)
+            attribute.data.foreach_set('color', np.tile(values[idx], len(attribute.data)))
+            continue
+
+        for suffix, channels in (('_RG', values[idx, :2]), ('_BA', values[idx, 2:])):
+            uv_layer = __uv_layer(mesh, name + suffix, creation)
+            if uv_layer is None:
+                raise RuntimeError("Cannot add UV map \"" + name + suffix + "\" to \"" + obj.name + "\", it already has " + str(MAX_UV_LAYERS) + " UV maps")
+            uv_layer.data.foreach_set('uv', np.tile(channels, len(mesh.loops)))
+
+    yield len(selection)
+
+
+def objects_without_uv_room(selection: list[bpy.types.Object], names: list[str]) -> list[bpy.types.Object]:
+    """ Objects which do not have room for UV maps of names they are still missing """
+    return [obj for obj in selection if len(obj.data.uv_layers) + len([name for name in names if name not in obj.data.uv_layers]) > MAX_UV_LAYERS]
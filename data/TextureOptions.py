@@ -68,12 +68,18 @@ class PivotPainterTextureTypeData:
     def description(self) -> str:
         return self.__description
 
-    def packer(self, context: bpy.types.Context, selection: list[bpy.types.Object], is_hdr: bool) -> 'TexturePacking':
+    def packer(self, context: bpy.types.Context, selection: list[bpy.types.Object], is_hdr: bool, hierarchy: 'ObjectHierarchy' = None) -> 'TexturePacking':
         from ..data.TexturePackingFunctions import TexturePacking
         packer_object: TexturePacking = TexturePacking.__new__(self.__packer)
-        packer_object.__init__(context, selection, is_hdr)
+        packer_object.__init__(context, selection, is_hdr, hierarchy)
         return packer_object
 
+    def support_type(self, is_hdr: bool) -> bool:
+        """ Same as TexturePacking.support_type, read from packer class without creating it """
+        if is_hdr:
+            return self.__packer.support_hdr
+        return self.__packer.support_ldr
+
     def suffix(self):
         return self.__texture_suffix
 
@@ -8,6 +8,24 @@ import numpy as np
 from ..Utils import *
 
 
+def decode_length(values: np.ndarray, is_hdr: bool) -> np.ndarray:
+    """ Lengths in meters from Unreal centimeters, LDR stores them divided by 8 in 0-1 range """
+    if not is_hdr:
+        values = values * 256 * 8
+    return values / 100
+
+
+def expected_length(lengths: np.ndarray, is_hdr: bool, ldr_minimum: float) -> np.ndarray:
+    """ Lengths in meters as they survive packing, LDR clamps them to its range """
+    if is_hdr:
+        return lengths
+    return np.clip(lengths * 100 / 8, ldr_minimum, 256) * 8 / 100
+
+
+def decode_unreal_locations(values: np.ndarray) -> np.ndarray:
+    return values * [1, -1, 1] / 100
+
+
 ###########################################################
 ##################### ALPHA FUNCTIONS #####################
 ###########################################################
@@ -18,15 +36,56 @@ class TexturePacking:
     support_hdr: bool = True
     support_ldr: bool = True
     selection: list[bpy.types.Object] = []
+    hierarchy: 'ObjectHierarchy' = None
+    stores_indices: bool = False
+    index_encoding: str = 'half'
+    __packed_indices: dict[bpy.types.Object, float] = None
 
-    def __init__(self, context: 'bpy.types.Context', selection: list[bpy.types.Object], is_hdr: bool):
+    def __init__(self, context: 'bpy.types.Context', selection: list[bpy.types.Object], is_hdr: bool, hierarchy: 'ObjectHierarchy' = None):
         self.context = context
         self.selection = selection
         self.is_hdr = is_hdr
+        self.hierarchy = hierarchy
+
+    def get_hierarchy(self) -> 'ObjectHierarchy':
+        """ Hierarchy shared by the whole operation, built from selection when packer was created without one """
+        if self.hierarchy is None:
+            from ..core.ObjectHierarchy import ObjectHierarchy
+            self.hierarchy = ObjectHierarchy(self.selection)
+        return self.hierarchy
 
     def process_object(self, obj: bpy.types.Object) -> float | list[float]:
         pass
 
+    def max_index(self) -> int:
+        """ Largest integer index packed for selection, -1 when packer stores no indices """
+        return -1
+
+    def object_indices(self) -> dict[bpy.types.Object, int]:
+        """ Integer index packed for every selected object, empty when packer stores no indices """
+        return {}
+
+    def set_index_encoding(self, encoding: str):
+        self.index_encoding = encoding
+        self.__packed_indices = None
+
+    def packed_index(self, obj: bpy.types.Object) -> float:
+        """ Encoded index of object, indices of the whole selection are encoded at once on first use """
+        if self.__packed_indices is None:
+            from ..kernels.TextureEncoding import encode_indices
+            indices = self.object_indices()
+            values = encode_indices(np.fromiter(indices.values(), dtype=np.int64, count=len(indices)), self.index_encoding)
+            self.__packed_indices = dict(zip(indices.keys(), values.tolist()))
+        return self.__packed_indices[obj]
+
+    def decode(self, values: np.ndarray) -> np.ndarray:
+        """ Scene values from packed values of all objects, one row per object, inverse of process_object """
+        return values
+
+    def expected(self, snapshot: 'SceneSnapshot') -> np.ndarray:
+        """ Scene values every object of snapshot should decode to, NaN where they can not be known """
+        return np.full((len(snapshot.selection), 1), np.nan)
+
     def has_post_process(self) -> bool:
         return False
 
@@ -40,11 +99,16 @@ class TexturePacking:
 
 
 class TexturePackingGroup(TexturePacking):
-    __dependencies: list['TexturePacking'] = []
+    __dependencies: list['TexturePacking']
+
+    def __init__(self, context: 'bpy.types.Context', selection: list[bpy.types.Object], is_hdr: bool, hierarchy: 'ObjectHierarchy' = None):
+        super().__init__(context, selection, is_hdr, hierarchy)
+        # Every group packs its own dependencies, packers are created again for every texture and verification
+        self.__dependencies = []
 
     def add_dependency(self, dependency_type: Type['TexturePacking']):
         dep = TexturePacking.__new__(dependency_type)
-        dep.__init__(self.context, [], self.is_hdr)
+        dep.__init__(self.context, self.selection, self.is_hdr, self.hierarchy)
         self.__dependencies.append(dep)
 
     def process_object(self, obj: bpy.types.Object) -> float | list[float]:
@@ -53,6 +117,20 @@ class TexturePackingGroup(TexturePacking):
             result.append(dep.process_object(obj))
         return result
 
+    def max_index(self) -> int:
+        return max([dep.max_index() for dep in self.__dependencies], default=-1)
+
+    def decode(self, values: np.ndarray) -> np.ndarray:
+        return np.concatenate([dep.decode(values[:, idx:idx + 1]) for idx, dep in enumerate(self.__dependencies)], axis=1)
+
+    def expected(self, snapshot: 'SceneSnapshot') -> np.ndarray:
+        return np.concatenate([dep.expected(snapshot) for dep in self.__dependencies], axis=1)
+
+    def set_index_encoding(self, encoding: str):
+        super().set_index_encoding(encoding)
+        for dep in self.__dependencies:
+            dep.set_index_encoding(encoding)
+
     def has_post_process(self) -> bool:
         for dep in self.__dependencies:
             if dep.has_post_process():
@@ -70,31 +148,50 @@ class TexturePackingGroup(TexturePacking):
 
 class PackObjectParentIndex(TexturePacking):
     support_ldr = False
+    stores_indices = True
+
+    def max_index(self) -> int:
+        return len(self.selection) - 1
+
+    def object_indices(self) -> dict[bpy.types.Object, int]:
+        selection_indices: dict[bpy.types.Object, int] = {}
+        for idx, selected in enumerate(self.selection):
+            selection_indices.setdefault(selected, idx)
+
+        indices: dict[bpy.types.Object, int] = {}
+        for obj in self.selection:
+            if obj.parent and obj.parent in selection_indices:
+                indices[obj] = selection_indices[obj.parent]
+            else:
+                indices[obj] = selection_indices[obj]
+        return indices
 
     def process_object(self, obj: bpy.types.Object) -> float | list[float]:
-        if obj.parent and obj.parent in self.selection:
-            index: int = int(self.selection.index(obj.parent))
-        else:
-            index: int = int(self.selection.index(obj))
-        # return index
-        return pack_texture_bits(index)
+        return self.packed_index(obj)
+
+    def decode(self, values: np.ndarray) -> np.ndarray:
+        from ..kernels.TextureEncoding import decode_indices
+        return decode_indices(values, self.index_encoding).astype(float)
+
+    def expected(self, snapshot: 'SceneSnapshot') -> np.ndarray:
+        indices = np.arange(len(snapshot.selection))
+        return np.where(snapshot.parent_indices() >= 0, snapshot.parent_indices(), indices)[:, None].astype(float)
 
 
 class PackObjectParentsNum(TexturePacking):
     num_max_parent: int = 0
 
     def process_object(self, obj: bpy.types.Object) -> float | list[float]:
-        num_parents = 0
-        parent = obj.parent
-        while parent is not None and parent.type == 'MESH':
-            num_parents += 1
-            parent = parent.parent
+        num_parents = self.get_hierarchy().mesh_depth(obj)
 
         if num_parents > self.num_max_parent:
             self.num_max_parent = num_parents
 
         return num_parents
 
+    def expected(self, snapshot: 'SceneSnapshot') -> np.ndarray:
+        return snapshot.mesh_depths()[:, None].astype(float)
+
     def post_process(self, current_value: float) -> float | list[float]:
         return current_value / self.num_max_parent
 
@@ -129,26 +226,57 @@ class PackDiagonalBoundBoxLength(TexturePacking):
             length = length / 256
         return length
 
+    def decode(self, values: np.ndarray) -> np.ndarray:
+        return decode_length(values, self.is_hdr)
+
+    def expected(self, snapshot: 'SceneSnapshot') -> np.ndarray:
+        bound_boxes = snapshot.bound_boxes()
+        lengths = np.linalg.norm((bound_boxes[:, 0] - bound_boxes[:, 6]) * self.get_scales(snapshot), axis=1)
+        return expected_length(lengths, self.is_hdr, 1)[:, None]
+
     def get_scale(self, obj: bpy.types.Object) -> mathutils.Vector:
         return mathutils.Vector((1.0, 1.0, 1.0))
 
+    def get_scales(self, snapshot: 'SceneSnapshot') -> np.ndarray:
+        return np.ones((len(snapshot.selection), 3))
+
 
 class PackDiagonalBoundBoxScaledLength(PackDiagonalBoundBoxLength):
     def get_scale(self, obj: bpy.types.Object) -> mathutils.Vector:
         return obj.matrix_world.to_scale()
 
+    def get_scales(self, snapshot: 'SceneSnapshot') -> np.ndarray:
+        return snapshot.scales
+
 
 class PackSelectionOrder(TexturePacking):
     support_ldr = False
+    stores_indices = True
+
+    def max_index(self) -> int:
+        return max([int(obj["SelectionOrder"]) for obj in self.selection if "SelectionOrder" in obj], default=-1)
+
+    def object_indices(self) -> dict[bpy.types.Object, int]:
+        return {obj: int(obj["SelectionOrder"]) for obj in self.selection if "SelectionOrder" in obj}
 
     def process_object(self, obj: bpy.types.Object) -> float | list[float]:
-        return pack_texture_bits(obj["SelectionOrder"])
+        return self.packed_index(obj)
+
+    def decode(self, values: np.ndarray) -> np.ndarray:
+        from ..kernels.TextureEncoding import decode_indices
+        return decode_indices(values, self.index_encoding).astype(float)
+
+    def expected(self, snapshot: 'SceneSnapshot') -> np.ndarray:
+        return snapshot.selection_orders()[:, None].astype(float)
 
 
 class PackEmptyAlpha(TexturePacking):
     def process_object(self, obj: bpy.types.Object) -> float | list[float]:
         return 0
 
+    def expected(self, snapshot: 'SceneSnapshot') -> np.ndarray:
+        return np.zeros((len(snapshot.selection), 1))
+
 
 class PackExtent(TexturePacking):
     def process_object(self, obj: bpy.types.Object) -> float | list[float]:
@@ -170,24 +298,44 @@ class PackExtent(TexturePacking):
                 extent = np.clip(extent, 1, 256) / 256
         return extent
 
+    def decode(self, values: np.ndarray) -> np.ndarray:
+        return decode_length(values, self.is_hdr)
+
+    def expected(self, snapshot: 'SceneSnapshot') -> np.ndarray:
+        empty_axis = snapshot.empty_axis_meshes()
+        extents = np.where(empty_axis, 0, self.get_extents(snapshot))
+        return np.where(empty_axis, expected_length(extents, self.is_hdr, 0), expected_length(extents, self.is_hdr, 1))[:, None]
+
     def get_extent(self, obj: bpy.types.Object) -> float:
         return 1
 
+    def get_extents(self, snapshot: 'SceneSnapshot') -> np.ndarray:
+        return np.ones(len(snapshot.selection))
+
 
 class PackXExtent(PackExtent):
     def get_extent(self, obj: bpy.types.Object) -> float:
         return obj.dimensions.x
 
+    def get_extents(self, snapshot: 'SceneSnapshot') -> np.ndarray:
+        return snapshot.dimensions()[:, 0]
+
 
 class PackYExtent(PackExtent):
     def get_extent(self, obj: bpy.types.Object) -> float:
         return obj.dimensions.y
 
+    def get_extents(self, snapshot: 'SceneSnapshot') -> np.ndarray:
+        return snapshot.dimensions()[:, 1]
+
 
 class PackZExtent(PackExtent):
     def get_extent(self, obj: bpy.types.Object) -> float:
         return obj.dimensions.z
 
+    def get_extents(self, snapshot: 'SceneSnapshot') -> np.ndarray:
+        return snapshot.dimensions()[:, 2]
+
 
 ###########################################################
 ###########################################################
@@ -201,6 +349,12 @@ class PackPivot(TexturePacking):
         pivot = obj.matrix_world.to_translation()
         return convert_blender_to_unreal_location(pivot)
 
+    def decode(self, values: np.ndarray) -> np.ndarray:
+        return decode_unreal_locations(values)
+
+    def expected(self, snapshot: 'SceneSnapshot') -> np.ndarray:
+        return snapshot.translations
+
 
 class PackRelativeParentPivot(TexturePacking):
     support_ldr = False
@@ -212,6 +366,12 @@ class PackRelativeParentPivot(TexturePacking):
             pivot -= parent_pivot
         return convert_blender_to_unreal_location(pivot)
 
+    def decode(self, values: np.ndarray) -> np.ndarray:
+        return decode_unreal_locations(values)
+
+    def expected(self, snapshot: 'SceneSnapshot') -> np.ndarray:
+        return snapshot.translations - snapshot.parent_translations()
+
 
 class PackAxis(TexturePacking):
     def process_object(self, obj: bpy.types.Object) -> float | list[float]:
@@ -225,24 +385,47 @@ class PackAxis(TexturePacking):
 
         return compact_normalized_direction(axis)
 
+    def decode(self, values: np.ndarray) -> np.ndarray:
+        if not self.is_hdr:
+            values = values * 2 - 1
+        return values * [1, -1, 1]
+
+    def expected(self, snapshot: 'SceneSnapshot') -> np.ndarray:
+        axis = self.get_axis_index()
+        if axis is None:
+            return np.zeros((len(snapshot.selection), 3))
+        return snapshot.rotations[:, :, axis]
+
     def get_axis(self, obj: bpy.types.Object) -> mathutils.Vector:
         return mathutils.Vector((0.0, 0.0, 0.0))
 
+    def get_axis_index(self) -> int | None:
+        return None
+
 
 class PackXAxis(PackAxis):
     def get_axis(self, obj: bpy.types.Object) -> mathutils.Vector:
         return mathutils.Vector((1.0, 0.0, 0.0))
 
+    def get_axis_index(self) -> int | None:
+        return 0
+
 
 class PackYAxis(PackAxis):
     def get_axis(self, obj: bpy.types.Object) -> mathutils.Vector:
         return mathutils.Vector((0.0, 1.0, 0.0))
 
+    def get_axis_index(self) -> int | None:
+        return 1
+
 
 class PackZAxis(PackAxis):
     def get_axis(self, obj: bpy.types.Object) -> mathutils.Vector:
         return mathutils.Vector((0.0, 0.0, 1.0))
 
+    def get_axis_index(self) -> int | None:
+        return 2
+
 
 class PackOrigin(TexturePacking):
     support_ldr = False
@@ -264,6 +447,11 @@ class PackOrigin(TexturePacking):
 
         return [center.x, center.y, center.z]
 
+    def expected(self, snapshot: 'SceneSnapshot') -> np.ndarray:
+        bound_boxes = snapshot.bound_boxes()
+        centers = (bound_boxes[:, 0] + bound_boxes[:, 6]) / 2 * snapshot.scales
+        return np.einsum('nij,nj->ni', snapshot.rotations, centers) + snapshot.translations
+
 
 class PackExtents(TexturePacking):
     def process_object(self, obj: bpy.types.Object) -> float | list[float]:
@@ -280,11 +468,20 @@ class PackExtents(TexturePacking):
 
         return [extents.x, extents.y, extents.z]
 
+    def decode(self, values: np.ndarray) -> np.ndarray:
+        return decode_length(values, self.is_hdr)
+
+    def expected(self, snapshot: 'SceneSnapshot') -> np.ndarray:
+        return expected_length(snapshot.dimensions(), self.is_hdr, 1)
+
 
 class PackEmptyRGB(TexturePacking):
     def process_object(self, obj: bpy.types.Object) -> float | list[float]:
         return [0, 0, 0]
 
+    def expected(self, snapshot: 'SceneSnapshot') -> np.ndarray:
+        return np.zeros((len(snapshot.selection), 3))
+
 
 class PackQuaternion(TexturePacking):
     def process_object(self, obj: bpy.types.Object) -> float | list[float]:
@@ -297,10 +494,18 @@ class PackQuaternion(TexturePacking):
 
         return compact_normalized_rgba(quaternion)
 
+    def decode(self, values: np.ndarray) -> np.ndarray:
+        if not self.is_hdr:
+            values = values * 2 - 1
+        return values
+
+    def expected(self, snapshot: 'SceneSnapshot') -> np.ndarray:
+        return snapshot.unreal_quaternions()
+
 
 class PackParentsNumRandomDiameter(TexturePackingGroup):
-    def __init__(self, context: 'bpy.types.Context', is_hdr: bool):
-        super().__init__(context, [], is_hdr)
+    def __init__(self, context: 'bpy.types.Context', selection: list[bpy.types.Object], is_hdr: bool, hierarchy: 'ObjectHierarchy' = None):
+        super().__init__(context, selection, is_hdr, hierarchy)
         self.add_dependency(PackNormalizedObjectParentsNum)
         self.add_dependency(PackRandomFloat)
         self.add_dependency(PackDiagonalBoundBoxScaledLength)
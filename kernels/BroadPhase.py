@@ -0,0 +1,124 @@
+import numpy as np
+
+# Upper limit of candidate pairs evaluated at once
+CHUNK_SIZE = 1 << 22
+
+
+def bounding_boxes(coords: np.ndarray, offsets: np.ndarray, margin: float = 0.0) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Axis aligned bounding box of every object, object i owns coords[offsets[i]:offsets[i + 1]].
+    Boxes are grown by margin, objects without coordinates get inverted boxes which never overlap.
+    """
+    num_objects = len(offsets) - 1
+    minimum = np.full((num_objects, 3), np.inf)
+    maximum = np.full((num_objects, 3), -np.inf)
+
+    non_empty = np.diff(offsets) > 0
+    if np.any(non_empty):
+        starts = offsets[:-1][non_empty]
+        minimum[non_empty] = np.minimum.reduceat(coords, starts, axis=0) - margin
+        maximum[non_empty] = np.maximum.reduceat(coords, starts, axis=0) + margin
+    return minimum, maximum
+
+
+def range_pairs(lo: np.ndarray, hi: np.ndarray):
+    """ Yields chunks of (owner, other) index pairs, for every owner i and other in [lo[i], hi[i]) """
+    counts = np.maximum(hi - lo, 0)
+    total_counts = np.cumsum(counts)
+
+    start = 0
+    while start < len(lo):
+        done = total_counts[start - 1] if start > 0 else 0
+        stop = min(len(lo), max(start + 1, int(np.searchsorted(total_counts, done + CHUNK_SIZE, side='right'))))
+
+        chunk_counts = counts[start:stop]
+        owners = np.repeat(np.arange(start, stop), chunk_counts)
+        ranks = np.arange(len(owners)) - np.repeat(np.cumsum(chunk_counts) - chunk_counts, chunk_counts)
+        yield owners, np.repeat(lo[start:stop], chunk_counts) + ranks
+        start = stop
+
+
+def __boxes_intersect(first_minimum: np.ndarray, first_maximum: np.ndarray, second_minimum: np.ndarray, second_maximum: np.ndarray) -> np.ndarray:
+    return np.all((first_minimum <= second_maximum) & (second_minimum <= first_maximum), axis=1)
+
+
+def sweep_and_prune(minimum: np.ndarray, maximum: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    All pairs of intersecting boxes, touching boxes count as intersecting.
+    Boxes are swept along the axis which gives the fewest candidates, every box is only compared with boxes
+    starting before its end on that axis. Returns index pairs with first < second, sorted by first then second.
+    """
+    num_boxes = len(minimum)
+    if num_boxes < 2:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    valid = np.all(minimum <= maximum, axis=1)
+
+    order = np.zeros(0, dtype=np.int64)
+    ends = np.zeros(0, dtype=np.int64)
+    for axis in range(3):
+        axis_order = np.argsort(minimum[:, axis], kind='stable')
+        # Box i can only intersect boxes after it in sorted order, until the first one starting after its end
+        axis_ends = np.searchsorted(minimum[axis_order, axis], maximum[axis_order, axis], side='right')
+        axis_ends[~valid[axis_order]] = 0
+        if axis == 0 or np.maximum(axis_ends - np.arange(num_boxes) - 1, 0).sum() < np.maximum(ends - np.arange(num_boxes) - 1, 0).sum():
+            order = axis_order
+            ends = axis_ends
+
+    sorted_minimum = minimum[order]
+    sorted_maximum = maximum[order]
+
+    firsts: list[np.ndarray] = []
+    seconds: list[np.ndarray] = []
+    for first, second in range_pairs(np.arange(1, num_boxes + 1), ends):
+        intersecting = __boxes_intersect(sorted_minimum[first], sorted_maximum[first], sorted_minimum[second], sorted_maximum[second])
+        firsts.append(order[first[intersecting]])
+        seconds.append(order[second[intersecting]])
+
+    first = np.concatenate(firsts)
+    second = np.concatenate(seconds)
+    first, second = np.minimum(first, second), np.maximum(first, second)
+
+    pair_order = np.lexsort((second, first))
+    return first[pair_order], second[pair_order]
+
+
+def sweep_and_prune_between(first_minimum: np.ndarray, first_maximum: np.ndarray, second_minimum: np.ndarray, second_maximum: np.ndarray, axis: int = 0):
+    """
+    Yields chunks of intersecting (first, second) box pairs between two box sets, swept along given axis.
+    Pairs where second box starts inside first box on that axis come from first boxes, the others from second boxes.
+    """
+    first_order = np.argsort(first_minimum[:, axis], kind='stable')
+    second_order = np.argsort(second_minimum[:, axis], kind='stable')
+    first_starts = first_minimum[first_order, axis]
+    second_starts = second_minimum[second_order, axis]
+
+    lo = np.searchsorted(second_starts, first_minimum[first_order, axis], side='left')
+    hi = np.searchsorted(second_starts, first_maximum[first_order, axis], side='right')
+    for owners, others in range_pairs(lo, hi):
+        first, second = first_order[owners], second_order[others]
+        intersecting = __boxes_intersect(first_minimum[first], first_maximum[first], second_minimum[second], second_maximum[second])
+        yield first[intersecting], second[intersecting]
+
+    lo = np.searchsorted(first_starts, second_minimum[second_order, axis], side='right')
+    hi = np.searchsorted(first_starts, second_maximum[second_order, axis], side='right')
+    for owners, others in range_pairs(lo, hi):
+        first, second = first_order[others], second_order[owners]
+        intersecting = __boxes_intersect(first_minimum[first], first_maximum[first], second_minimum[second], second_maximum[second])
+        yield first[intersecting], second[intersecting]
+
+
+def spatial_pair_order(firsts: np.ndarray, seconds: np.ndarray, minimum: np.ndarray, maximum: np.ndarray) -> np.ndarray:
+    """
+    Order visiting pairs in spatially coherent blocks, sorted by Morton code of the box center lower on the curve,
+    then of the other one. Consecutive pairs share boxes or have near ones, so per box data is reused while still cached.
+    """
+    from .TexelOrder import morton_codes
+
+    used = np.unique(np.concatenate([firsts, seconds]))
+    codes = np.zeros(len(minimum), dtype=np.uint64)
+    codes[used] = morton_codes((minimum[used] + maximum[used]) / 2)
+
+    first_codes = codes[firsts]
+    second_codes = codes[seconds]
+    return np.lexsort((np.maximum(first_codes, second_codes), np.minimum(first_codes, second_codes)))
@@ -0,0 +1,58 @@
+import numpy as np
+
+
+def hierarchy_depths(parents: np.ndarray) -> np.ndarray:
+    """
+    Number of ancestors of every node, parents[i] is parent index of node i or -1 for roots.
+    Vectorized pointer jumping: every round adds depth of the node pointed at and jumps twice as far,
+    so it takes log2(max depth) rounds.
+    """
+    depths = (parents >= 0).astype(np.int64)
+    jumps = parents.astype(np.int64)
+    while True:
+        jumping = np.nonzero(jumps >= 0)[0]
+        if len(jumping) == 0:
+            return depths
+        targets = jumps[jumping]
+        new_depths = depths.copy()
+        new_depths[jumping] += depths[targets]
+        jumps[jumping] = jumps[targets]
+        depths = new_depths
+
+
+class HierarchyIndex:
+    """
+    Flat hierarchy arrays: parent of every node, its depth, children in CSR layout (children of node i are
+    children[child_offsets[i]:child_offsets[i + 1]]) and nodes ordered by level (nodes of level d are
+    level_order[level_offsets[d]:level_offsets[d + 1]], in index order).
+    """
+    parents: np.ndarray
+    depths: np.ndarray
+    child_offsets: np.ndarray
+    children: np.ndarray
+    level_order: np.ndarray
+    level_offsets: np.ndarray
+
+    def __init__(self, parents: np.ndarray):
+        self.parents = np.asarray(parents, dtype=np.int64)
+        self.depths = hierarchy_depths(self.parents)
+
+        num_nodes = len(self.parents)
+        has_parent = np.nonzero(self.parents >= 0)[0]
+        self.children = has_parent[np.argsort(self.parents[has_parent], kind='stable')]
+        self.child_offsets = np.zeros(num_nodes + 1, dtype=np.int64)
+        self.child_offsets[1:] = np.cumsum(np.bincount(self.parents[has_parent], minlength=num_nodes))
+
+        self.level_order = np.argsort(self.depths, kind='stable')
+        self.level_offsets = np.zeros((self.depths.max() + 2) if num_nodes > 0 else 1, dtype=np.int64)
+        self.level_offsets[1:] = np.cumsum(np.bincount(self.depths, minlength=len(self.level_offsets) - 1))
+
+    @property
+    def num_levels(self) -> int:
+        return len(self.level_offsets) - 1
+
+    def level(self, depth: int) -> np.ndarray:
+        return self.level_order[self.level_offsets[depth]:self.level_offsets[depth + 1]]
+
+    def children_of(self, node: int) -> np.ndarray:
+        return self.children[self.child_offsets[node]:self.child_offsets[node + 1]]
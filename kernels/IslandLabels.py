@@ -0,0 +1,47 @@
+import numpy as np
+
+
+def island_labels(num_vertices: int, edges: np.ndarray) -> tuple[np.ndarray, int]:
+    """
+    Connected component of every vertex, edges is an (m, 2) array of vertex indices.
+    Vectorized union-find: every round hooks the higher root of each edge to the lower one, then compresses paths
+    by pointer jumping until every vertex points at its root. Islands are numbered in order of their lowest vertex.
+    Returns labels and number of islands.
+    """
+    roots = np.arange(num_vertices, dtype=np.int64)
+    if len(edges) > 0:
+        first = edges[:, 0].astype(np.int64)
+        second = edges[:, 1].astype(np.int64)
+        while True:
+            first_roots = roots[first]
+            second_roots = roots[second]
+            different = first_roots != second_roots
+            if not np.any(different):
+                break
+            first, second = first[different], second[different]
+            lower = np.minimum(first_roots[different], second_roots[different])
+            higher = np.maximum(first_roots[different], second_roots[different])
+            np.minimum.at(roots, higher, lower)
+
+            while True:
+                jumped = roots[roots]
+                if np.array_equal(jumped, roots):
+                    break
+                roots = jumped
+
+    unique_roots, labels = np.unique(roots, return_inverse=True)
+    return labels.astype(np.int64), len(unique_roots)
+
+
+def island_order(labels: np.ndarray, num_islands: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Stable order which groups elements by island, island offsets into that order
+    and index of every element inside its island.
+    """
+    order = np.argsort(labels, kind='stable')
+    offsets = np.zeros(num_islands + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(np.bincount(labels, minlength=num_islands))
+
+    local_indices = np.empty(len(labels), dtype=np.int64)
+    local_indices[order] = np.arange(len(labels)) - offsets[labels[order]]
+    return order, offsets, local_indices
@@ -0,0 +1,92 @@
+import numpy as np
+
+from .SpatialHash import SpatialHashGrid
+
+
+def bounding_spheres(coords: np.ndarray, offsets: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Bounding sphere of every object around its bound box center, object i owns coords[offsets[i]:offsets[i + 1]].
+    Objects without coordinates get a sphere with negative radius.
+    """
+    num_objects = len(offsets) - 1
+    counts = np.diff(offsets)
+    non_empty = counts > 0
+    starts = offsets[:-1][non_empty]
+
+    centers = np.zeros((num_objects, 3))
+    radii = np.full(num_objects, -1.0)
+    if len(starts) == 0:
+        return centers, radii
+
+    centers[non_empty] = (np.minimum.reduceat(coords, starts, axis=0) + np.maximum.reduceat(coords, starts, axis=0)) * 0.5
+    relative = coords - np.repeat(centers, counts, axis=0)
+    radii[non_empty] = np.sqrt(np.maximum.reduceat(np.einsum('ij,ij->i', relative, relative), starts))
+    return centers, radii
+
+
+def trivially_closest(centers: np.ndarray, radii: np.ndarray, label_centers: np.ndarray, label_radii: np.ndarray) -> np.ndarray:
+    """
+    Label which is certainly closest to every sphere, or -1 when it needs a real search.
+    A label is certain when the farthest its sphere can be is nearer than the nearest any other label sphere can be.
+    """
+    distances = np.linalg.norm(centers[:, None, :] - label_centers[None, :, :], axis=2)
+    lower = np.maximum(distances - radii[:, None] - label_radii[None, :], 0)
+    upper = distances + radii[:, None] + label_radii[None, :]
+    lower[:, label_radii < 0] = np.inf
+    upper[:, label_radii < 0] = np.inf
+
+    labels = np.argmin(upper, axis=1)
+    rows = np.arange(len(centers))
+    others_lower = lower.copy()
+    others_lower[rows, labels] = np.inf
+    certain = (upper[rows, labels] < others_lower.min(axis=1)) & np.isfinite(upper[rows, labels]) & (radii >= 0)
+    return np.where(certain, labels, -1)
+
+
+class LabeledPointIndex:
+    """
+    Spatial hashes over points of many objects, every point labeled by its owner.
+    Answers which owner is closest to a whole query cloud with a growing radius search, one bulk query per step.
+    Every step uses a grid with cell size of its radius, so a query only visits neighbouring cells.
+    """
+    __points: np.ndarray
+    __labels: np.ndarray
+    __grids: dict[int, SpatialHashGrid]
+    __cell_size: float
+    __minimum: np.ndarray
+    __maximum: np.ndarray
+
+    def __init__(self, points: np.ndarray, labels: np.ndarray):
+        self.__points = points
+        self.__labels = labels
+        self.__grids = {}
+        self.__minimum = points.min(axis=0) if len(points) > 0 else np.zeros(3)
+        self.__maximum = points.max(axis=0) if len(points) > 0 else np.zeros(3)
+
+        # Finest cell fits about one point, for evenly spread points
+        extent = np.maximum(self.__maximum - self.__minimum, 1e-6)
+        self.__cell_size = max(float(np.cbrt(np.prod(extent) / max(len(points), 1))), float(extent.max()) * 1e-6)
+
+    def closest(self, queries: np.ndarray) -> tuple[float, int]:
+        """ Smallest distance from any query to any point and label of that point, label is -1 without points or queries """
+        if len(self.__points) == 0 or len(queries) == 0:
+            return np.inf, -1
+
+        # Distance between bound boxes is a lower bound, start searching from there
+        gap = float(np.linalg.norm(np.maximum(np.maximum(self.__minimum - queries.max(axis=0), queries.min(axis=0) - self.__maximum), 0)))
+        level = max(0, int(np.ceil(np.log2(max(gap / self.__cell_size, 1.0)))))
+        while True:
+            grid = self.__grid(level)
+            query_indices, point_indices = grid.query_radius(queries, grid.cell_size)
+            if len(point_indices) > 0:
+                # Any closer point would have been found within the same radius
+                relative = queries[query_indices] - self.__points[point_indices]
+                distances = np.einsum('ij,ij->i', relative, relative)
+                closest_idx = int(np.argmin(distances))
+                return float(np.sqrt(distances[closest_idx])), int(self.__labels[point_indices[closest_idx]])
+            level += 1
+
+    def __grid(self, level: int) -> SpatialHashGrid:
+        if level not in self.__grids:
+            self.__grids[level] = SpatialHashGrid(self.__cell_size * (1 << level), self.__points)
+        return self.__grids[level]
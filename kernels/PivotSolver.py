@@ -0,0 +1,239 @@
+import numpy as np
+
+from .SpatialHash import SpatialHashGrid
+
+# Upper limit of distances evaluated at once by brute force searches
+CHUNK_SIZE = 1 << 22
+
+AXIS_TO_COMPONENT = {
+    'x_pos': (0, -1.0),
+    'x_neg': (0, 1.0),
+    'y_pos': (1, -1.0),
+    'y_neg': (1, 1.0),
+    'z_pos': (2, -1.0),
+    'z_neg': (2, 1.0),
+}
+
+
+def transform_points(points: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+    return points @ matrix[:3, :3].T + matrix[:3, 3]
+
+
+def __chunk_rows(num_rows: int, num_columns: int) -> int:
+    return max(1, CHUNK_SIZE // max(num_columns, 1))
+
+
+def closest_distance(points: np.ndarray, targets: np.ndarray) -> tuple[float, int]:
+    """ Smallest distance between points and targets, and index of the first point reaching it """
+    closest = np.inf
+    closest_idx = 0
+    rows = __chunk_rows(len(points), len(targets))
+    for start in range(0, len(points), rows):
+        difference = points[start:start + rows, None, :] - targets[None, :, :]
+        distances = np.einsum('ijk,ijk->ij', difference, difference)
+        minimum = distances.min(axis=1)
+        chunk_idx = int(np.argmin(minimum))
+        if minimum[chunk_idx] < closest:
+            closest = float(minimum[chunk_idx])
+            closest_idx = start + chunk_idx
+    return float(np.sqrt(closest)), closest_idx
+
+
+def mean_in_range(points: np.ndarray, queries: np.ndarray, radius: float) -> np.ndarray | None:
+    """ Mean of points within radius of any query, points are counted once per query reaching them """
+    _, point_indices = SpatialHashGrid(radius, points).query_radius(queries, radius)
+    if len(point_indices) == 0:
+        return None
+    return points[point_indices].mean(axis=0)
+
+
+def overlap_pivot(triangle_pairs: np.ndarray, polygon_indices: np.ndarray, parent_polygon_indices: np.ndarray, polygon_centers: np.ndarray) -> np.ndarray | None:
+    """
+    Mean center of object polygons overlapping parent, from pairs of overlapping loop triangles. Every overlapping pair
+    of polygons is counted once, same as BVH trees built from BMesh faces, so polygons split into more triangles get no more weight.
+    """
+    if len(triangle_pairs) == 0:
+        return None
+    polygon_pairs = np.unique(np.stack([polygon_indices[triangle_pairs[:, 0]], parent_polygon_indices[triangle_pairs[:, 1]]], axis=1), axis=0)
+    return polygon_centers[polygon_pairs[:, 0]].mean(axis=0)
+
+
+def find_pivot(local_coords: np.ndarray, world_coords: np.ndarray, parent_world_coords: np.ndarray, calculation_type: str, max_distance: float) -> np.ndarray:
+    """ Same search as vertex based pivot in PivotAndRotation, without mathutils trees """
+    distance, closest_idx = closest_distance(world_coords, parent_world_coords)
+    if calculation_type != 'mean':
+        return local_coords[closest_idx].copy()
+
+    # Same as kd.find_range from each parent vertex over object vertices
+    mean = mean_in_range(world_coords, parent_world_coords, distance + max_distance)
+    if mean is None:
+        return local_coords[closest_idx].copy()
+    return mean
+
+
+def find_parentless_pivot(local_coords: np.ndarray, world_coords: np.ndarray, pivot_type: str, axis: str, max_axis_difference: float) -> np.ndarray:
+    if pivot_type == 'origin' or len(local_coords) == 0:
+        return np.zeros(3)
+
+    component, sign = AXIS_TO_COMPONENT[axis]
+    axis_values = world_coords[:, component] * sign
+    included = np.abs(axis_values - axis_values.min()) <= max_axis_difference
+    return local_coords[included].mean(axis=0)
+
+
+def segment_ids(offsets: np.ndarray) -> np.ndarray:
+    """ Owner segment of every element of concatenated arrays """
+    return np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+
+
+def find_rotations(coords: np.ndarray, offsets: np.ndarray, pivots: np.ndarray, matrices: np.ndarray, max_distance: float) -> np.ndarray:
+    """
+    Direction from pivot to the mean of furthest coordinates, for every object in one pass.
+    Coordinates of all objects are concatenated, object i owns coords[offsets[i]:offsets[i + 1]].
+    Directions are in world orientation and not normalized, objects without coordinates get zero direction.
+    """
+    num_objects = len(offsets) - 1
+    counts = np.diff(offsets)
+    segments = segment_ids(offsets)
+
+    relative = coords - pivots[segments]
+    distances = np.sqrt(np.einsum('ij,ij->i', relative, relative))
+
+    # reduceat can not handle empty segments, they are left with zero maximum
+    maxima = np.zeros(num_objects)
+    non_empty = counts > 0
+    if np.any(non_empty):
+        maxima[non_empty] = np.maximum.reduceat(distances, offsets[:-1][non_empty])
+
+    furthest = np.abs(distances - maxima[segments]) < max_distance
+    furthest_segments = segments[furthest]
+    num_furthest = np.bincount(furthest_segments, minlength=num_objects)
+    furthest_sums = np.stack([np.bincount(furthest_segments, weights=relative[furthest, axis], minlength=num_objects) for axis in range(3)], axis=1)
+    furthest_locations = furthest_sums / np.maximum(num_furthest, 1)[:, None]
+
+    return np.einsum('nij,nj->ni', matrices[:, :3, :3], furthest_locations)
+
+
+def find_principal_axes(coords: np.ndarray, offsets: np.ndarray, pivots: np.ndarray, matrices: np.ndarray) -> np.ndarray:
+    """
+    Principal axis of every object coordinates, from stacked covariance matrices, in one pass.
+    Axes point from pivot to the furthest extent along them and have the length of that extent,
+    objects without spread fall back to find_rotations direction. Directions are in world orientation.
+    """
+    num_objects = len(offsets) - 1
+    counts = np.diff(offsets)
+    segments = segment_ids(offsets)
+    divisors = np.maximum(counts, 1)
+
+    means = np.stack([np.bincount(segments, weights=coords[:, axis], minlength=num_objects) for axis in range(3)], axis=1) / divisors[:, None]
+    centered = coords - means[segments]
+
+    covariances = np.empty((num_objects, 3, 3))
+    for row in range(3):
+        for column in range(row, 3):
+            values = np.bincount(segments, weights=centered[:, row] * centered[:, column], minlength=num_objects) / divisors
+            covariances[:, row, column] = values
+            covariances[:, column, row] = values
+
+    # Eigenvalues are ascending, last eigenvector is the principal axis
+    eigenvalues, eigenvectors = np.linalg.eigh(covariances)
+    axes = eigenvectors[:, :, 2]
+
+    projections = np.einsum('ij,ij->i', coords - pivots[segments], axes[segments])
+    highest = np.zeros(num_objects)
+    lowest = np.zeros(num_objects)
+    non_empty = counts > 0
+    if np.any(non_empty):
+        highest[non_empty] = np.maximum.reduceat(projections, offsets[:-1][non_empty])
+        lowest[non_empty] = np.minimum.reduceat(projections, offsets[:-1][non_empty])
+    extents = np.where(highest >= -lowest, highest, lowest)
+    directions = axes * extents[:, None]
+
+    degenerate = eigenvalues[:, 2] <= 1e-12
+    if np.any(degenerate):
+        degenerate_offsets = np.zeros(np.count_nonzero(degenerate) + 1, dtype=np.int64)
+        degenerate_offsets[1:] = np.cumsum(counts[degenerate])
+        directions[degenerate] = find_rotations(coords[degenerate[segments]], degenerate_offsets, pivots[degenerate], np.tile(np.identity(4), (len(degenerate_offsets) - 1, 1, 1)), 1e-6)
+
+    return np.einsum('nij,nj->ni', matrices[:, :3, :3], directions)
+
+
+def find_directions(coords: np.ndarray, offsets: np.ndarray, pivots: np.ndarray, matrices: np.ndarray, calculation_type: str, max_distance: float) -> np.ndarray:
+    if calculation_type == 'principal_axis':
+        return find_principal_axes(coords, offsets, pivots, matrices)
+    return find_rotations(coords, offsets, pivots, matrices, max_distance)
+
+
+def bound_box_coords(coords: np.ndarray, offsets: np.ndarray, scales: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Corners of every object local bound box, in the same order as Object.bound_box, multiplied by object scale.
+    Returns concatenated corners with their offsets, objects without coordinates get no corners.
+    """
+    counts = np.diff(offsets)
+    non_empty = counts > 0
+    starts = offsets[:-1][non_empty]
+    minimum = np.minimum.reduceat(coords, starts, axis=0) if len(starts) > 0 else np.zeros((0, 3))
+    maximum = np.maximum.reduceat(coords, starts, axis=0) if len(starts) > 0 else np.zeros((0, 3))
+
+    # Which corners take the maximum of each axis, in Object.bound_box order
+    corner_x = np.array([0, 0, 0, 0, 1, 1, 1, 1], dtype=bool)
+    corner_y = np.array([0, 0, 1, 1, 0, 0, 1, 1], dtype=bool)
+    corner_z = np.array([0, 1, 1, 0, 0, 1, 1, 0], dtype=bool)
+    corners = np.empty((len(starts), 8, 3))
+    corners[:, :, 0] = np.where(corner_x, maximum[:, None, 0], minimum[:, None, 0])
+    corners[:, :, 1] = np.where(corner_y, maximum[:, None, 1], minimum[:, None, 1])
+    corners[:, :, 2] = np.where(corner_z, maximum[:, None, 2], minimum[:, None, 2])
+    corners *= scales[non_empty][:, None, :]
+
+    corner_offsets = np.zeros(len(offsets), dtype=np.int64)
+    corner_offsets[1:] = np.cumsum(non_empty * 8)
+    return corners.reshape(-1, 3), corner_offsets
+
+
+def solve_level(descriptors: dict, settings: dict, start: int, stop: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Worker entry, solves pivots and rotations of objects [start, stop) of a hierarchy level.
+    Arrays are concatenated vertex arrays of all objects with offsets, see PivotAndRotation.__solve_level_parallel.
+    Returned pivots are in object space, directions in world orientation (not normalized).
+    """
+    from .WorkerPool import attach_arrays, release_arrays
+
+    blocks, arrays = attach_arrays(descriptors)
+    try:
+        local_coords = arrays['local_coords']
+        offsets = arrays['offsets']
+        matrices = arrays['matrices']
+        parent_coords = arrays['parent_coords']
+        parent_offsets = arrays['parent_offsets']
+        parent_indices = arrays['parent_indices']
+        known_pivots = arrays['known_pivots']
+        has_known_pivot = arrays['has_known_pivot']
+
+        pivots = np.zeros((stop - start, 3))
+        if settings['pivot_enabled']:
+            for idx in range(start, stop):
+                local = local_coords[offsets[idx]:offsets[idx + 1]]
+                if len(local) == 0:
+                    continue
+                if has_known_pivot[idx]:
+                    pivots[idx - start] = known_pivots[idx]
+                elif parent_indices[idx] >= 0:
+                    parent_idx = parent_indices[idx]
+                    parent = parent_coords[parent_offsets[parent_idx]:parent_offsets[parent_idx + 1]]
+                    pivots[idx - start] = find_pivot(local, transform_points(local, matrices[idx]), parent, settings['pivot_calculation_type'], settings['pivot_max_distance'])
+                else:
+                    pivots[idx - start] = find_parentless_pivot(local, transform_points(local, matrices[idx]), settings['no_parent_pivot_type'], settings['no_parent_axis'], settings['no_parent_max_axis_difference'])
+
+        directions = np.zeros((stop - start, 3))
+        if settings['rotation_enabled']:
+            # Pivot gets applied before rotation search, so coordinates are relative to new origin
+            range_offsets = offsets[start:stop + 1] - offsets[start]
+            coords = local_coords[offsets[start]:offsets[stop]] - pivots[segment_ids(range_offsets)]
+            range_matrices = matrices[start:stop]
+            if settings['rotation_item_type'] != 'vertex':
+                coords, range_offsets = bound_box_coords(coords, range_offsets, np.linalg.norm(range_matrices[:, :3, :3], axis=1))
+            directions = find_directions(coords, range_offsets, np.zeros((stop - start, 3)), range_matrices, settings['rotation_calculation_type'], settings['rotation_max_distance'])
+
+        return pivots, directions
+    finally:
+        release_arrays(blocks)
@@ -0,0 +1,89 @@
+import hashlib
+
+import numpy as np
+
+from .PivotSolver import segment_ids
+
+
+def canonical_frames(coords: np.ndarray, offsets: np.ndarray, tolerance: float) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Centroid and principal axes of every piece, axes are columns ordered from the longest spread.
+    Axis signs follow the first vertex with a clear projection on them and the last axis completes
+    a right handed frame, so pieces with the same vertex order get the same frame under any rotation.
+    """
+    num_pieces = len(offsets) - 1
+    segments = segment_ids(offsets)
+    divisors = np.maximum(np.diff(offsets), 1)
+
+    centroids = np.stack([np.bincount(segments, weights=coords[:, axis], minlength=num_pieces) for axis in range(3)], axis=1) / divisors[:, None]
+    centered = coords - centroids[segments]
+
+    covariances = np.empty((num_pieces, 3, 3))
+    for row in range(3):
+        for column in range(row, 3):
+            values = np.bincount(segments, weights=centered[:, row] * centered[:, column], minlength=num_pieces) / divisors
+            covariances[:, row, column] = values
+            covariances[:, column, row] = values
+
+    # Eigenvectors are ascending, reversed so the longest spread comes first
+    axes = np.linalg.eigh(covariances)[1][:, :, ::-1].copy()
+
+    for axis in range(2):
+        projections = np.einsum('ij,ij->i', centered, axes[segments, :, axis])
+        clear = np.nonzero(np.abs(projections) > tolerance)[0]
+        owners, first = np.unique(segments[clear], return_index=True)
+        flipped = owners[projections[clear[first]] < 0]
+        axes[flipped, :, axis] *= -1
+    axes[:, :, 2] = np.cross(axes[:, :, 0], axes[:, :, 1])
+
+    return centroids, axes
+
+
+class ShapeIndex:
+    """
+    Groups pieces which are the same shape under a rigid transform, with the same vertex order and, when given, the same
+    topology. Piece i is representatives[i] moved by transforms[i], a 4x4 matrix mapping representative coordinates to
+    piece coordinates. Candidates are found by hashing quantized coordinates in their canonical frame and every match is
+    verified against tolerance, so pieces are never grouped wrongly, at worst a near identical piece gets its own shape.
+    """
+    representatives: np.ndarray
+    transforms: np.ndarray
+    num_shapes: int
+
+    def __init__(self, coords: np.ndarray, offsets: np.ndarray, tolerance: float = 1e-5, topology: np.ndarray = None, topology_offsets: np.ndarray = None):
+        num_pieces = len(offsets) - 1
+        centroids, axes = canonical_frames(coords, offsets, tolerance)
+        canonical = np.einsum('ij,ijk->ik', coords - centroids[segment_ids(offsets)], axes[segment_ids(offsets)])
+        quantized = np.round(canonical / tolerance).astype(np.int64)
+
+        self.representatives = np.arange(num_pieces)
+        candidates: dict[bytes, list[int]] = {}
+        for piece in range(num_pieces):
+            start, end = offsets[piece], offsets[piece + 1]
+            digest = hashlib.blake2b(digest_size=16)
+            digest.update(np.int64(end - start).tobytes())
+            digest.update(quantized[start:end].tobytes())
+            if topology is not None:
+                digest.update(np.ascontiguousarray(topology[topology_offsets[piece]:topology_offsets[piece + 1]], dtype=np.int64).tobytes())
+
+            shapes = candidates.setdefault(digest.digest(), [])
+            for shape in shapes:
+                shape_start = offsets[shape]
+                if np.abs(canonical[start:end] - canonical[shape_start:shape_start + end - start]).max(initial=0) <= tolerance:
+                    self.representatives[piece] = shape
+                    break
+            else:
+                shapes.append(piece)
+
+        self.num_shapes = int(np.count_nonzero(self.representatives == np.arange(num_pieces)))
+
+        # Representative frame back to canonical, then out through the piece frame
+        rotations = np.einsum('nij,nkj->nik', axes, axes[self.representatives])
+        self.transforms = np.tile(np.identity(4), (num_pieces, 1, 1))
+        self.transforms[:, :3, :3] = rotations
+        self.transforms[:, :3, 3] = centroids - np.einsum('nij,nj->ni', rotations, centroids[self.representatives])
+        self.transforms[self.representatives == np.arange(num_pieces)] = np.identity(4)
+
+    def relative_transform(self, source: int, target: int) -> np.ndarray:
+        """ Matrix mapping coordinates of source piece to target piece, both must share a representative """
+        return self.transforms[target] @ np.linalg.inv(self.transforms[source])
@@ -0,0 +1,156 @@
+import numpy as np
+
+# Cells per axis are limited so packed cell keys fit into int64
+MAX_CELLS_PER_AXIS = 1 << 20
+
+# Upper limit of candidate pairs evaluated at once
+CHUNK_SIZE = 1 << 22
+
+
+class SpatialHashGrid:
+    """
+    Uniform voxel grid over a point cloud, points are sorted by packed cell key so every occupied cell is a contiguous range.
+    Answers bulk radius queries for many points at once, without per point Python calls.
+    """
+    __cell_size: float
+    __points: np.ndarray
+    __origin: np.ndarray
+    __dimensions: np.ndarray
+    __order: np.ndarray
+    __sorted_points: np.ndarray
+    __cell_keys: np.ndarray
+    __cell_starts: np.ndarray
+    __cell_counts: np.ndarray
+
+    def __init__(self, cell_size: float, points: np.ndarray | None = None):
+        self.__cell_size = float(cell_size)
+        self.__points = np.zeros((0, 3))
+        if points is not None:
+            self.insert(points)
+
+    @property
+    def points(self) -> np.ndarray:
+        return self.__points
+
+    @property
+    def cell_size(self) -> float:
+        return self.__cell_size
+
+    def insert(self, points: np.ndarray):
+        """ Adds points in bulk, their indices continue after already inserted points """
+        self.__points = np.concatenate([self.__points, np.asarray(points, dtype=float).reshape(-1, 3)])
+
+        if len(self.__points) == 0:
+            self.__origin = np.zeros(3)
+            self.__dimensions = np.ones(3, dtype=np.int64)
+            self.__order = np.zeros(0, dtype=np.int64)
+            self.__sorted_points = np.zeros((0, 3))
+            self.__cell_keys = np.zeros(0, dtype=np.int64)
+            self.__cell_starts = np.zeros(0, dtype=np.int64)
+            self.__cell_counts = np.zeros(0, dtype=np.int64)
+            return
+
+        minimum = self.__points.min(axis=0)
+        maximum = self.__points.max(axis=0)
+
+        # Too small cells for the extent would overflow the keys, bigger cells only add candidates
+        self.__cell_size = max(self.__cell_size, float((maximum - minimum).max()) / (MAX_CELLS_PER_AXIS - 1), 1e-12)
+
+        self.__origin = minimum
+        self.__dimensions = np.floor((maximum - minimum) / self.__cell_size).astype(np.int64) + 1
+
+        keys = self.__pack(self.__cells(self.__points))
+        self.__order = np.argsort(keys, kind='stable')
+        self.__sorted_points = self.__points[self.__order]
+        self.__cell_keys, self.__cell_starts, self.__cell_counts = np.unique(keys[self.__order], return_index=True, return_counts=True)
+
+    def query_radius(self, points: np.ndarray, radius: float) -> tuple[np.ndarray, np.ndarray]:
+        """
+        All pairs of query point and inserted point within radius (inclusive).
+        Returns query indices and point indices, sorted by query index and then by point index.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        query_result: list[np.ndarray] = []
+        point_result: list[np.ndarray] = []
+
+        if len(points) == 0 or len(self.__points) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+        reach = int(np.ceil(radius / self.__cell_size))
+        steps = np.arange(-reach, reach + 1)
+        neighbour_offsets = np.stack(np.meshgrid(steps, steps, steps, indexing='ij'), axis=-1).reshape(-1, 3)
+
+        # Queries sharing a cell share lookups, sorted cell keys keep the searches cache friendly
+        query_keys, query_cells, query_inverse = self.__query_cells(points)
+        query_order = np.argsort(query_inverse, kind='stable')
+        query_cell_counts = np.bincount(query_inverse, minlength=len(query_keys))
+        query_cell_starts = np.cumsum(query_cell_counts) - query_cell_counts
+        sorted_queries = points[query_order]
+
+        radius_squared = radius * radius
+
+        for offset in neighbour_offsets:
+            neighbour_cells = query_cells + offset
+            inside = np.all((neighbour_cells >= 0) & (neighbour_cells < self.__dimensions), axis=1)
+            cell_indices = np.nonzero(inside)[0]
+            if len(cell_indices) == 0:
+                continue
+
+            keys = query_keys[cell_indices] + self.__pack(offset[None, :])[0]
+            found = np.searchsorted(self.__cell_keys, keys)
+            found = np.minimum(found, len(self.__cell_keys) - 1)
+            matched = self.__cell_keys[found] == keys
+            cell_indices = cell_indices[matched]
+            found = found[matched]
+            if len(cell_indices) == 0:
+                continue
+
+            # Every query in the cell pairs with every point in the neighbour cell
+            num_queries = query_cell_counts[cell_indices]
+            num_points = self.__cell_counts[found]
+            pair_counts = num_queries * num_points
+
+            chunk_start = 0
+            cumulative = np.cumsum(pair_counts)
+            while chunk_start < len(pair_counts):
+                base = cumulative[chunk_start - 1] if chunk_start > 0 else 0
+                chunk_end = int(np.searchsorted(cumulative, base + CHUNK_SIZE, side='right'))
+                chunk_end = max(chunk_end, chunk_start + 1)
+
+                chunk = slice(chunk_start, chunk_end)
+                chunk_pairs = pair_counts[chunk]
+                total = int(chunk_pairs.sum())
+                pair_cell = np.repeat(np.arange(chunk_end - chunk_start), chunk_pairs)
+                pair_local = np.arange(total) - np.repeat(np.cumsum(chunk_pairs) - chunk_pairs, chunk_pairs)
+                pair_num_points = num_points[chunk][pair_cell]
+
+                # Positions in cell sorted arrays, neighbouring pairs read neighbouring memory
+                pair_queries = query_cell_starts[cell_indices[chunk]][pair_cell] + pair_local // pair_num_points
+                pair_points = self.__cell_starts[found[chunk]][pair_cell] + pair_local % pair_num_points
+
+                difference = self.__sorted_points[pair_points] - sorted_queries[pair_queries]
+                within = np.einsum('ij,ij->i', difference, difference) <= radius_squared
+                query_result.append(query_order[pair_queries[within]])
+                point_result.append(self.__order[pair_points[within]])
+
+                chunk_start = chunk_end
+
+        if len(query_result) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+        query_indices = np.concatenate(query_result)
+        point_indices = np.concatenate(point_result)
+        order = np.lexsort((point_indices, query_indices))
+        return query_indices[order], point_indices[order]
+
+    def __query_cells(self, points: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """ Unique cells of query points, as packed keys (valid inside the grid only), cell coordinates and inverse """
+        cells = self.__cells(points)
+        unique_cells, inverse = np.unique(cells, axis=0, return_inverse=True)
+        return self.__pack(unique_cells), unique_cells, inverse.reshape(-1)
+
+    def __cells(self, points: np.ndarray) -> np.ndarray:
+        return np.floor((points - self.__origin) / self.__cell_size).astype(np.int64)
+
+    def __pack(self, cells: np.ndarray) -> np.ndarray:
+        return (cells[:, 0] * self.__dimensions[1] + cells[:, 1]) * self.__dimensions[2] + cells[:, 2]
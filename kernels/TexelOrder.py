@@ -0,0 +1,65 @@
+import numpy as np
+
+from .HierarchyIndex import HierarchyIndex
+
+# Bits per axis, three axes interleaved fit in 63 bits
+MORTON_BITS = 21
+
+
+def __spread_bits(values: np.ndarray) -> np.ndarray:
+    """ Moves every bit of 21 bit values to every third bit """
+    values = values & np.uint64(0x1fffff)
+    values = (values | values << np.uint64(32)) & np.uint64(0x1f00000000ffff)
+    values = (values | values << np.uint64(16)) & np.uint64(0x1f0000ff0000ff)
+    values = (values | values << np.uint64(8)) & np.uint64(0x100f00f00f00f00f)
+    values = (values | values << np.uint64(4)) & np.uint64(0x10c30c30c30c30c3)
+    values = (values | values << np.uint64(2)) & np.uint64(0x1249249249249249)
+    return values
+
+
+def morton_codes(points: np.ndarray) -> np.ndarray:
+    """ Z-order curve position of every point, on a grid spanning the largest extent of points on every axis """
+    points = np.asarray(points, dtype=float).reshape(-1, 3)
+    if len(points) == 0:
+        return np.zeros(0, dtype=np.uint64)
+
+    lowest = points.min(axis=0)
+    extent = max(float((points.max(axis=0) - lowest).max()), 1e-12)
+    cells = np.clip((points - lowest) / extent * ((1 << MORTON_BITS) - 1), 0, (1 << MORTON_BITS) - 1).astype(np.uint64)
+    return __spread_bits(cells[:, 0]) | __spread_bits(cells[:, 1]) << np.uint64(1) | __spread_bits(cells[:, 2]) << np.uint64(2)
+
+
+def morton_order(points: np.ndarray) -> np.ndarray:
+    return np.argsort(morton_codes(points), kind='stable')
+
+
+def hierarchy_order(parents: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """
+    Depth first order of the hierarchy, every parent comes right before its subtree so chains stay together.
+    Roots and children of a parent are visited in Morton order of their points.
+    """
+    index = HierarchyIndex(parents)
+    ranks = np.empty(len(index.parents), dtype=np.int64)
+    ranks[morton_order(points)] = np.arange(len(index.parents))
+
+    # Children are already grouped by parent, only order inside a group changes
+    children = index.children[np.lexsort((ranks[index.children], index.parents[index.children]))]
+    roots = np.nonzero(index.parents < 0)[0]
+    stack = list(roots[np.argsort(ranks[roots])][::-1])
+
+    order = np.empty(len(index.parents), dtype=np.int64)
+    num_ordered = 0
+    while len(stack) > 0:
+        node = stack.pop()
+        order[num_ordered] = node
+        num_ordered += 1
+        stack.extend(children[index.child_offsets[node]:index.child_offsets[node + 1]][::-1])
+    return order
+
+
+def parent_texel_distances(parents: np.ndarray, slots: np.ndarray, width: int) -> np.ndarray:
+    """ Distance in texels between texel of every object with a parent and texel of its parent, slots[i] is texel of object i """
+    has_parent = np.nonzero(parents >= 0)[0]
+    columns = slots % width
+    rows = slots // width
+    return np.hypot(columns[has_parent] - columns[parents[has_parent]], rows[has_parent] - rows[parents[has_parent]])
@@ -0,0 +1,59 @@
+import numpy as np
+
+# Half float encoding stores index + offset as the bit pattern of a half float, same as Utils.pack_texture_bits
+HALF_INDEX_OFFSET = 1024
+# Patterns from 0x7c00 up have the highest exponent, which half floats use for infinities and NaNs
+HALF_INDEX_LIMIT = 0x7bff - HALF_INDEX_OFFSET
+# Every integer up to 2^24 is exact in a 32-bit float, the value is stored as it is
+FLOAT_INDEX_LIMIT = 1 << 24
+
+INDEX_LIMITS = {
+    'half': HALF_INDEX_LIMIT,
+    'float': FLOAT_INDEX_LIMIT,
+}
+
+
+def select_index_encoding(mode: str, max_index: int) -> str | None:
+    """ Encoding for indices up to max_index, auto picks half floats while they can hold it. None when mode can not hold it """
+    if mode == 'auto':
+        mode = 'half' if max_index <= HALF_INDEX_LIMIT else 'float'
+    if max_index > INDEX_LIMITS[mode]:
+        return None
+    return mode
+
+
+def encode_half_indices(indices: np.ndarray) -> np.ndarray:
+    """ 32-bit floats with the same bits as pack_texture_bits, exact after conversion to half floats """
+    index = np.asarray(indices, dtype=np.int64) + HALF_INDEX_OFFSET
+
+    sign = (index & 0x8000) << 16
+    exponent = np.where((index & 0x7fff) == 0, 0, (((index >> 10) & 0x1f) - 15 + 127) << 23)
+    mantissa = (index & 0x3ff) << 13
+    return ((sign | exponent | mantissa) & 0xffffffff).astype(np.uint32).view(np.float32)
+
+
+def decode_half_indices(values: np.ndarray) -> np.ndarray:
+    # Values which were never valid patterns overflow to infinity, they decode to wrong indices instead of warning
+    with np.errstate(over='ignore', invalid='ignore'):
+        halves = np.asarray(values, dtype=np.float32).astype(np.float16)
+    return halves.view(np.uint16).astype(np.int64) - HALF_INDEX_OFFSET
+
+
+def encode_float_indices(indices: np.ndarray) -> np.ndarray:
+    return np.asarray(indices, dtype=np.int64).astype(np.float32)
+
+
+def decode_float_indices(values: np.ndarray) -> np.ndarray:
+    return np.rint(np.asarray(values, dtype=np.float64)).astype(np.int64)
+
+
+def encode_indices(indices: np.ndarray, encoding: str) -> np.ndarray:
+    if encoding == 'float':
+        return encode_float_indices(indices)
+    return encode_half_indices(indices)
+
+
+def decode_indices(values: np.ndarray, encoding: str) -> np.ndarray:
+    if encoding == 'float':
+        return decode_float_indices(values)
+    return decode_half_indices(values)
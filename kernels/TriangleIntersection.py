@@ -0,0 +1,98 @@
+import numpy as np
+
+from .BroadPhase import sweep_and_prune_between
+
+# Edges of a triangle, as (start, end) vertex indices
+EDGE_STARTS = np.array([0, 1, 2])
+EDGE_ENDS = np.array([1, 2, 0])
+
+
+def __plane_intervals(projections: np.ndarray, distances: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """ Interval of every triangle on the planes intersection line, from its vertex projections and distances to the other plane """
+    start_distances = distances[:, EDGE_STARTS]
+    end_distances = distances[:, EDGE_ENDS]
+    crossing = start_distances * end_distances < 0
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        factors = start_distances / (start_distances - end_distances)
+    start_projections = projections[:, EDGE_STARTS]
+    crossings = start_projections + (projections[:, EDGE_ENDS] - start_projections) * np.where(crossing, factors, 0)
+
+    # Edges crossing the plane and vertices lying on it bound the interval
+    values = np.concatenate([crossings, projections], axis=1)
+    valid = np.concatenate([crossing, distances == 0], axis=1)
+    return np.where(valid, values, np.inf).min(axis=1), np.where(valid, values, -np.inf).max(axis=1)
+
+
+def triangles_intersect(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    """
+    Whether first[i] and second[i] triangles (arrays of shape (n, 3, 3)) intersect or touch.
+    Same rules as isect_tri_tri_v3 used by BVHTree.overlap: coplanar and degenerate triangles never intersect.
+    """
+    first_normals = np.cross(first[:, 1] - first[:, 0], first[:, 2] - first[:, 0])
+    second_normals = np.cross(second[:, 1] - second[:, 0], second[:, 2] - second[:, 0])
+
+    # Signed distances of every vertex to the plane of the other triangle
+    first_distances = np.einsum('nij,nj->ni', first - second[:, 0:1], second_normals)
+    second_distances = np.einsum('nij,nj->ni', second - first[:, 0:1], first_normals)
+
+    crossing_planes = ~(np.all(first_distances > 0, axis=1) | np.all(first_distances < 0, axis=1))
+    crossing_planes &= ~(np.all(second_distances > 0, axis=1) | np.all(second_distances < 0, axis=1))
+    crossing_planes &= ~np.all(first_distances == 0, axis=1) & ~np.all(second_distances == 0, axis=1)
+
+    # Both triangles cross the line where their planes meet, they intersect when their intervals on it overlap
+    directions = np.cross(first_normals, second_normals)
+    first_lo, first_hi = __plane_intervals(np.einsum('nij,nj->ni', first, directions), first_distances)
+    second_lo, second_hi = __plane_intervals(np.einsum('nij,nj->ni', second, directions), second_distances)
+
+    return crossing_planes & (first_lo <= second_hi) & (second_lo <= first_hi)
+
+
+def meshes_intersect(first: np.ndarray, second: np.ndarray) -> bool:
+    """
+    Whether any triangle of first mesh intersects any triangle of second mesh, both are arrays of world triangles.
+    Triangle pairs come from a sweep over triangle bounding boxes and are tested in chunks, stopping at the first hit.
+    """
+    if len(first) == 0 or len(second) == 0:
+        return False
+
+    first_minimum, first_maximum = first.min(axis=1), first.max(axis=1)
+    second_minimum, second_maximum = second.min(axis=1), second.max(axis=1)
+
+    # Only triangles inside the other mesh bounding box can intersect it
+    first_inside = np.nonzero(np.all((first_minimum <= second_maximum.max(axis=0)) & (first_maximum >= second_minimum.min(axis=0)), axis=1))[0]
+    second_inside = np.nonzero(np.all((second_minimum <= first_maximum.max(axis=0)) & (second_maximum >= first_minimum.min(axis=0)), axis=1))[0]
+    if len(first_inside) == 0 or len(second_inside) == 0:
+        return False
+
+    extent = np.maximum(first_maximum[first_inside].max(axis=0), second_maximum[second_inside].max(axis=0)) - np.minimum(first_minimum[first_inside].min(axis=0), second_minimum[second_inside].min(axis=0))
+    pairs = sweep_and_prune_between(first_minimum[first_inside], first_maximum[first_inside], second_minimum[second_inside], second_maximum[second_inside], int(np.argmax(extent)))
+    for first_indices, second_indices in pairs:
+        if len(first_indices) > 0 and np.any(triangles_intersect(first[first_inside[first_indices]], second[second_inside[second_indices]])):
+            return True
+    return False
+
+
+def overlapping_pairs(descriptors: dict, start: int, stop: int) -> np.ndarray:
+    """
+    Worker entry, tests candidate object pairs [start, stop) and returns which of them overlap.
+    Arrays are concatenated world coordinates and triangles of all objects with offsets, see MeshOperations.create_overlaps_dict.
+    """
+    from .WorkerPool import attach_arrays, release_arrays
+
+    blocks, arrays = attach_arrays(descriptors)
+    try:
+        coords = arrays['coords']
+        triangles = arrays['triangles']
+        triangle_offsets = arrays['triangle_offsets']
+        firsts = arrays['firsts']
+        seconds = arrays['seconds']
+
+        overlaps = np.zeros(stop - start, dtype=bool)
+        for idx in range(start, stop):
+            first = coords[triangles[triangle_offsets[firsts[idx]]:triangle_offsets[firsts[idx] + 1]]]
+            second = coords[triangles[triangle_offsets[seconds[idx]]:triangle_offsets[seconds[idx] + 1]]]
+            overlaps[idx - start] = meshes_intersect(first, second)
+        return overlaps
+    finally:
+        release_arrays(blocks)
@@ -0,0 +1,50 @@
+import numpy as np
+
+from .SpatialHash import SpatialHashGrid
+
+
+def quantize(points: np.ndarray, tolerance: float) -> np.ndarray:
+    return np.round(points / tolerance).astype(np.int64)
+
+
+def quantized_matches(sources: np.ndarray, targets: np.ndarray, tolerance: float) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Pairs of source and target points which round to the same position at given tolerance.
+    Quantized positions of both sets are joined by sorting them together. Returns pairs sorted by source, then target.
+    """
+    if len(sources) == 0 or len(targets) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    # Same id for the same quantized position, in both sets
+    _, ids = np.unique(np.concatenate([quantize(sources, tolerance), quantize(targets, tolerance)]), axis=0, return_inverse=True)
+    ids = ids.ravel()
+    source_ids = ids[:len(sources)]
+    target_ids = ids[len(sources):]
+
+    target_order = np.argsort(target_ids, kind='stable')
+    sorted_target_ids = target_ids[target_order]
+    starts = np.searchsorted(sorted_target_ids, source_ids, side='left')
+    counts = np.searchsorted(sorted_target_ids, source_ids, side='right') - starts
+
+    source_indices = np.repeat(np.arange(len(sources)), counts)
+    ranks = np.arange(len(source_indices)) - np.repeat(np.cumsum(counts) - counts, counts)
+    return source_indices, target_order[np.repeat(starts, counts) + ranks]
+
+
+def match_vertices(sources: np.ndarray, targets: np.ndarray, tolerance: float, fallback_tolerance: float) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Target points matching every source point: same quantized position at tolerance, or for sources without
+    such match, every target within fallback tolerance. Returns pairs sorted by source, then target.
+    """
+    source_indices, target_indices = quantized_matches(sources, targets, tolerance)
+
+    unmatched = np.ones(len(sources), dtype=bool)
+    unmatched[source_indices] = False
+    if np.any(unmatched) and len(targets) > 0:
+        unmatched_indices = np.nonzero(unmatched)[0]
+        query_indices, fallback_targets = SpatialHashGrid(fallback_tolerance, targets).query_radius(sources[unmatched_indices], fallback_tolerance)
+        source_indices = np.concatenate([source_indices, unmatched_indices[query_indices]])
+        target_indices = np.concatenate([target_indices, fallback_targets])
+
+    order = np.lexsort((target_indices, source_indices))
+    return source_indices[order], target_indices[order]
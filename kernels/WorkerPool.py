@@ -0,0 +1,88 @@
+import os
+import importlib
+from multiprocessing import get_context, shared_memory
+
+import numpy as np
+
+
+def share_arrays(arrays: dict[str, np.ndarray]) -> tuple[list[shared_memory.SharedMemory], dict[str, tuple[str, tuple[int, ...], str]]]:
+    """ Copy arrays into shared memory blocks, returns blocks (to keep alive and release) and descriptors for workers """
+    blocks: list[shared_memory.SharedMemory] = []
+    descriptors: dict[str, tuple[str, tuple[int, ...], str]] = {}
+
+    for key, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        shared = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+        shared[...] = array
+        blocks.append(block)
+        descriptors[key] = (block.name, array.shape, array.dtype.str)
+
+    return blocks, descriptors
+
+
+def attach_arrays(descriptors: dict[str, tuple[str, tuple[int, ...], str]]) -> tuple[list[shared_memory.SharedMemory], dict[str, np.ndarray]]:
+    """ Map shared memory blocks created by share_arrays, blocks must be closed after arrays are no longer used """
+    blocks: list[shared_memory.SharedMemory] = []
+    arrays: dict[str, np.ndarray] = {}
+
+    for key, (name, shape, dtype) in descriptors.items():
+        try:
+            block = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Before Python 3.13 attaching registers the block again, spawned workers share parent resource tracker so it stays owned by parent
+            block = shared_memory.SharedMemory(name=name)
+        blocks.append(block)
+        arrays[key] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+
+    return blocks, arrays
+
+
+def release_arrays(blocks: list[shared_memory.SharedMemory], unlink: bool = False):
+    for block in blocks:
+        block.close()
+        if unlink:
+            block.unlink()
+
+
+# Kernels are imported under this name in the addon process and in workers, nothing of the addon is added to sys.path
+KERNELS_PACKAGE = 'pivot_painter_kernels'
+
+# Executed by exec, so workers can load the package before unpickling any kernel function, without importing the addon
+LOAD_PACKAGE = """
+import importlib.util, os, sys
+if name not in sys.modules:
+    spec = importlib.util.spec_from_file_location(name, os.path.join(directory, '__init__.py'), submodule_search_locations=[directory])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+"""
+
+
+def __package_globals() -> dict:
+    return {'name': KERNELS_PACKAGE, 'directory': os.path.dirname(os.path.abspath(__file__))}
+
+
+def kernel_module(name: str):
+    """ Import kernels module as a standalone package, so worker processes can unpickle its functions without the addon (and bpy) """
+    exec(LOAD_PACKAGE, __package_globals())
+    return importlib.import_module(KERNELS_PACKAGE + '.' + name)
+
+
+def create_pool(num_workers: int = 0):
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Fork is not safe inside Blender, workers are always spawned
+    return ProcessPoolExecutor(max_workers=worker_count(num_workers), mp_context=get_context('spawn'), initializer=exec, initargs=(LOAD_PACKAGE, __package_globals()))
+
+
+def split_ranges(count: int, num_chunks: int) -> list[tuple[int, int]]:
+    num_chunks = max(1, min(count, num_chunks))
+    bounds = np.linspace(0, count, num_chunks + 1).astype(int)
+    return [(int(bounds[idx]), int(bounds[idx + 1])) for idx in range(num_chunks) if bounds[idx] < bounds[idx + 1]]
+
+
+def worker_count(num_workers: int = 0) -> int:
+    if num_workers <= 0:
+        return os.cpu_count() or 1
+    return num_workers
@@ -0,0 +1,2 @@
+# Modules in this package must stay importable without bpy or mathutils,
+# because worker processes load them as a standalone package, see WorkerPool.kernel_module.
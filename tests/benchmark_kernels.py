@@ -0,0 +1,220 @@
+"""
+Measurements of the bpy-free kernels, every timed result is checked against brute force or the serial path first.
+Run from repository root, sections can be picked one by one:
+
+    python tests/benchmark_kernels.py
+    python tests/benchmark_kernels.py broad_phase --sizes 1000 10000 100000
+    python tests/benchmark_kernels.py spatial_hash --sizes 10000 100000 1000000 10000000
+    python tests/benchmark_kernels.py workers --workers 8
+
+KD tree timings use scipy.spatial.cKDTree, or mathutils.kdtree when running in Blender's Python, and are left
+out when neither is installed.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kernels.BroadPhase import sweep_and_prune
+from kernels.SpatialHash import SpatialHashGrid
+from kernels.WorkerPool import share_arrays, release_arrays, kernel_module, create_pool, split_ranges
+
+
+def timed(function, *args):
+    start_time = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start_time
+
+
+###########################################################
+###################### BROAD PHASE ########################
+###########################################################
+
+# Largest box count brute force is run for, it compares every pair
+BRUTE_BOX_LIMIT = 4000
+
+
+def leaf_boxes(rng: np.random.Generator, count: int) -> tuple[np.ndarray, np.ndarray]:
+    """ Small boxes at constant density, like leaf cards spread over a growing canopy """
+    minimum = rng.random((count, 3)) * np.cbrt(count) * 0.5
+    return minimum, minimum + rng.random((count, 3)) * 0.5 + 0.05
+
+
+def brute_box_pairs(minimum: np.ndarray, maximum: np.ndarray) -> int:
+    num_pairs = 0
+    for start in range(0, len(minimum), 256):
+        intersecting = np.all((minimum[start:start + 256, None] <= maximum[None, :]) & (minimum[None, :] <= maximum[start:start + 256, None]), axis=2)
+        rows, columns = np.nonzero(intersecting)
+        num_pairs += int(np.count_nonzero(rows + start < columns))
+    return num_pairs
+
+
+def broad_phase(sizes: list[int]):
+    print("Broad phase: sweep and prune against all pairs")
+    print("%10s %14s %12s %10s %10s" % ("boxes", "all pairs", "candidates", "time", "brute"))
+    rng = np.random.default_rng(0)
+    for size in sizes:
+        minimum, maximum = leaf_boxes(rng, size)
+        (firsts, seconds), sweep_time = timed(sweep_and_prune, minimum, maximum)
+
+        brute = "-"
+        if size <= BRUTE_BOX_LIMIT:
+            num_pairs, brute_time = timed(brute_box_pairs, minimum, maximum)
+            assert num_pairs == len(firsts), "sweep and prune found %d pairs, brute force %d" % (len(firsts), num_pairs)
+            brute = "%.3fs" % brute_time
+        print("%10d %14d %12d %9.3fs %10s" % (size, size * (size - 1) // 2, len(firsts), sweep_time, brute))
+
+
+###########################################################
+###################### SPATIAL HASH #######################
+###########################################################
+
+# Expected number of points around every query
+NEIGHBOURS = 8
+NUM_QUERIES = 10000
+NUM_CHECKED_QUERIES = 50
+
+
+def kd_tree_query(points: np.ndarray, queries: np.ndarray, radius: float) -> tuple[int, float, float] | None:
+    """ Number of found pairs, build and query time of a KD tree, None without a KD tree module """
+    try:
+        from scipy.spatial import cKDTree
+
+        tree, build_time = timed(cKDTree, points)
+        found, query_time = timed(tree.query_ball_point, queries, radius)
+        return sum(len(indices) for indices in found), build_time, query_time
+    except ImportError:
+        pass
+
+    try:
+        from mathutils.kdtree import KDTree
+    except ImportError:
+        return None
+
+    start_time = time.perf_counter()
+    tree = KDTree(len(points))
+    for idx, point in enumerate(points):
+        tree.insert(point, idx)
+    tree.balance()
+    build_time = time.perf_counter() - start_time
+    found, query_time = timed(lambda: sum(len(tree.find_range(query, radius)) for query in queries))
+    return found, build_time, query_time
+
+
+def spatial_hash(sizes: list[int]):
+    print("Spatial hash radius queries, %d queries with about %d points around each" % (NUM_QUERIES, NEIGHBOURS))
+    print("%10s %10s %10s %10s %10s %10s" % ("points", "pairs", "build", "query", "kd build", "kd query"))
+    rng = np.random.default_rng(1)
+    for size in sizes:
+        points = rng.random((size, 3))
+        queries = rng.random((NUM_QUERIES, 3))
+        radius = float(np.cbrt(NEIGHBOURS * 3 / (4 * np.pi * size)))
+
+        grid, build_time = timed(SpatialHashGrid, radius, points)
+        (query_indices, point_indices), query_time = timed(grid.query_radius, queries, radius)
+
+        for query in range(NUM_CHECKED_QUERIES):
+            expected = np.nonzero(np.linalg.norm(points - queries[query], axis=1) <= radius)[0]
+            assert np.array_equal(point_indices[query_indices == query], expected), "query %d differs from brute force" % query
+
+        kd_build, kd_query = "-", "-"
+        kd_result = kd_tree_query(points, queries, radius)
+        if kd_result is not None:
+            assert kd_result[0] == len(query_indices), "KD tree found %d pairs, spatial hash %d" % (kd_result[0], len(query_indices))
+            kd_build, kd_query = "%.3fs" % kd_result[1], "%.3fs" % kd_result[2]
+        print("%10d %10d %9.3fs %9.3fs %10s %10s" % (size, len(query_indices), build_time, query_time, kd_build, kd_query))
+
+
+###########################################################
+######################### WORKERS #########################
+###########################################################
+
+# Same settings PivotAndRotation passes to workers, with the addon defaults
+SOLVER_SETTINGS = {
+    'pivot_enabled': True,
+    'pivot_calculation_type': 'mean',
+    'pivot_max_distance': 0.01,
+    'no_parent_pivot_type': 'origin',
+    'no_parent_axis': 'z_neg',
+    'no_parent_max_axis_difference': 0.01,
+    'rotation_enabled': True,
+    'rotation_item_type': 'vertex',
+    'rotation_calculation_type': 'mean',
+    'rotation_max_distance': 0.01,
+}
+
+
+def tree_level(rng: np.random.Generator, num_branches: int, num_vertices: int, num_limbs: int) -> dict[str, np.ndarray]:
+    """ Arrays as __solve_level_parallel shares them, branches of one hierarchy level growing from their limbs """
+    limb_coords = rng.random((num_limbs, num_vertices * 8, 3)) * [0.2, 0.2, 4] + rng.random((num_limbs, 1, 3)) * 10
+    limbs = rng.integers(0, num_limbs, num_branches)
+    roots = limb_coords[limbs, rng.integers(0, num_vertices * 8, num_branches)]
+
+    local_coords = rng.random((num_branches, num_vertices, 3)) * [0.1, 0.1, 1]
+    matrices = np.tile(np.identity(4), (num_branches, 1, 1))
+    matrices[:, :3, 3] = roots
+    return {
+        'local_coords': local_coords.reshape(-1, 3),
+        'offsets': np.arange(0, num_branches * num_vertices + 1, num_vertices),
+        'matrices': matrices,
+        'parent_coords': limb_coords.reshape(-1, 3),
+        'parent_offsets': np.arange(0, num_limbs * num_vertices * 8 + 1, num_vertices * 8),
+        'parent_indices': limbs,
+        'known_pivots': np.zeros((num_branches, 3)),
+        'has_known_pivot': np.zeros(num_branches, dtype=bool),
+    }
+
+
+def workers(max_workers: int, num_branches: int):
+    solver = kernel_module('PivotSolver')
+    blocks, descriptors = share_arrays(tree_level(np.random.default_rng(2), num_branches, 24, 64))
+    try:
+        (expected_pivots, expected_directions), serial_time = timed(solver.solve_level, descriptors, SOLVER_SETTINGS, 0, num_branches)
+        print("Pivot and rotation solver, one level of %d branches, %d CPU cores" % (num_branches, os.cpu_count() or 1))
+        print("%10s %10s %10s" % ("workers", "time", "speedup"))
+        print("%10s %9.3fs %10s" % ("serial", serial_time, "1.00x"))
+
+        for num_workers in [1 << power for power in range(max_workers.bit_length()) if 1 << power < max_workers] + [max_workers]:
+            pool = create_pool(num_workers)
+            try:
+                # Workers are spawned and import kernels before timing starts
+                for future in [pool.submit(solver.solve_level, descriptors, SOLVER_SETTINGS, 0, 0) for _ in range(num_workers)]:
+                    future.result()
+                start_time = time.perf_counter()
+                futures = [pool.submit(solver.solve_level, descriptors, SOLVER_SETTINGS, start, stop) for start, stop in split_ranges(num_branches, num_workers * 4)]
+                results = [future.result() for future in futures]
+                parallel_time = time.perf_counter() - start_time
+            finally:
+                pool.shutdown()
+
+            assert np.allclose(np.concatenate([pivots for pivots, _ in results]), expected_pivots), "%d workers differ from serial pivots" % num_workers
+            assert np.allclose(np.concatenate([directions for _, directions in results]), expected_directions), "%d workers differ from serial directions" % num_workers
+            print("%10d %9.3fs %9.2fx" % (num_workers, parallel_time, serial_time / parallel_time))
+    finally:
+        release_arrays(blocks, unlink=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('section', nargs='?', default='all', choices=['all', 'broad_phase', 'spatial_hash', 'workers'])
+    parser.add_argument('--sizes', type=int, nargs='+', help="Box counts of broad phase or point counts of spatial hash")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Largest worker count, counts double from 1")
+    parser.add_argument('--branches', type=int, default=20000, help="Branches of the worker scaling run")
+    args = parser.parse_args()
+
+    if args.section in ('all', 'broad_phase'):
+        broad_phase(args.sizes or [1000, 4000, 10000, 30000])
+        print()
+    if args.section in ('all', 'spatial_hash'):
+        spatial_hash(args.sizes or [10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7])
+        print()
+    if args.section in ('all', 'workers'):
+        workers(args.workers, args.branches)
+
+
+if __name__ == '__main__':
+    main()
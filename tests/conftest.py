@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# Kernels need neither bpy nor the addon package, they are imported as a top level package from the repository root
+ROOT = str(Path(__file__).resolve().parents[1])
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
@@ -0,0 +1,464 @@
+import numpy as np
+import pytest
+
+from kernels.BroadPhase import bounding_boxes, sweep_and_prune, sweep_and_prune_between, spatial_pair_order
+from kernels.HierarchyIndex import HierarchyIndex, hierarchy_depths
+from kernels.IslandLabels import island_labels, island_order
+from kernels.NearestLabel import LabeledPointIndex, bounding_spheres, trivially_closest
+from kernels.PivotSolver import closest_distance, mean_in_range, find_pivot, overlap_pivot
+from kernels.ShapeIndex import ShapeIndex
+from kernels.SpatialHash import SpatialHashGrid
+from kernels.TexelOrder import morton_codes, morton_order, hierarchy_order, parent_texel_distances
+from kernels.TextureEncoding import HALF_INDEX_LIMIT, FLOAT_INDEX_LIMIT, select_index_encoding, encode_indices, decode_indices
+from kernels.TriangleIntersection import triangles_intersect, meshes_intersect
+from kernels.VertexMatch import match_vertices
+
+
+def brute_radius_pairs(queries: np.ndarray, points: np.ndarray, radius: float) -> set[tuple[int, int]]:
+    distances = np.linalg.norm(queries[:, None, :] - points[None, :, :], axis=2)
+    return set(zip(*np.nonzero(distances <= radius)))
+
+
+def brute_box_pairs(minimum: np.ndarray, maximum: np.ndarray) -> set[tuple[int, int]]:
+    intersecting = np.all((minimum[:, None] <= maximum[None, :]) & (minimum[None, :] <= maximum[:, None]), axis=2)
+    return {(first, second) for first, second in zip(*np.nonzero(intersecting)) if first < second}
+
+
+def random_boxes(rng: np.random.Generator, count: int, size: float) -> tuple[np.ndarray, np.ndarray]:
+    minimum = rng.random((count, 3)) * 10
+    return minimum, minimum + rng.random((count, 3)) * size
+
+
+def brute_islands(num_vertices: int, edges: np.ndarray) -> np.ndarray:
+    labels = np.full(num_vertices, -1)
+    neighbours = [[] for _ in range(num_vertices)]
+    for first, second in edges:
+        neighbours[first].append(second)
+        neighbours[second].append(first)
+
+    num_islands = 0
+    for start in range(num_vertices):
+        if labels[start] >= 0:
+            continue
+        stack = [start]
+        labels[start] = num_islands
+        while len(stack) > 0:
+            for neighbour in neighbours[stack.pop()]:
+                if labels[neighbour] < 0:
+                    labels[neighbour] = num_islands
+                    stack.append(neighbour)
+        num_islands += 1
+    return labels
+
+
+def rotation_matrix(rng: np.random.Generator) -> np.ndarray:
+    q, r = np.linalg.qr(rng.normal(size=(3, 3)))
+    q *= np.sign(np.diag(r))
+    if np.linalg.det(q) < 0:
+        q[:, 0] *= -1
+    return q
+
+
+###########################################################
+###################### SPATIAL HASH #######################
+###########################################################
+
+@pytest.mark.parametrize('radius', [0.05, 0.2, 1.5])
+def test_spatial_hash_matches_brute_force(radius):
+    rng = np.random.default_rng(1)
+    points = rng.random((400, 3))
+    queries = rng.random((150, 3)) * 1.2 - 0.1
+
+    query_indices, point_indices = SpatialHashGrid(radius, points).query_radius(queries, radius)
+
+    assert set(zip(query_indices, point_indices)) == brute_radius_pairs(queries, points, radius)
+    assert len(query_indices) == len(set(zip(query_indices, point_indices)))
+    assert np.all(np.diff(query_indices) >= 0)
+
+
+def test_spatial_hash_radius_larger_than_cells():
+    rng = np.random.default_rng(2)
+    points = rng.random((300, 3))
+    queries = rng.random((50, 3))
+
+    query_indices, point_indices = SpatialHashGrid(0.05, points).query_radius(queries, 0.3)
+    assert set(zip(query_indices, point_indices)) == brute_radius_pairs(queries, points, 0.3)
+
+
+def test_spatial_hash_insert_continues_indices():
+    rng = np.random.default_rng(3)
+    first = rng.random((100, 3))
+    second = rng.random((100, 3))
+    grid = SpatialHashGrid(0.1, first)
+    grid.insert(second)
+
+    query_indices, point_indices = grid.query_radius(first[:10], 0.1)
+    assert set(zip(query_indices, point_indices)) == brute_radius_pairs(first[:10], np.concatenate([first, second]), 0.1)
+
+
+def test_spatial_hash_empty():
+    query_indices, point_indices = SpatialHashGrid(0.1).query_radius(np.zeros((3, 3)), 1.0)
+    assert len(query_indices) == 0 and len(point_indices) == 0
+
+    query_indices, _ = SpatialHashGrid(0.1, np.zeros((3, 3))).query_radius(np.zeros((0, 3)), 1.0)
+    assert len(query_indices) == 0
+
+
+###########################################################
+###################### BROAD PHASE ########################
+###########################################################
+
+@pytest.mark.parametrize('size', [0.1, 1.0, 4.0])
+def test_sweep_and_prune_matches_brute_force(size):
+    minimum, maximum = random_boxes(np.random.default_rng(4), 300, size)
+
+    firsts, seconds = sweep_and_prune(minimum, maximum)
+
+    assert set(zip(firsts, seconds)) == brute_box_pairs(minimum, maximum)
+    assert len(firsts) == len(set(zip(firsts, seconds)))
+    assert np.all(firsts < seconds)
+
+
+def test_sweep_and_prune_touching_and_empty_boxes():
+    minimum = np.array([[0, 0, 0], [1, 0, 0], [np.inf] * 3, [0.5, 0.5, 0.5]], dtype=float)
+    maximum = np.array([[1, 1, 1], [2, 1, 1], [-np.inf] * 3, [0.6, 0.6, 0.6]], dtype=float)
+
+    firsts, seconds = sweep_and_prune(minimum, maximum)
+    assert set(zip(firsts, seconds)) == {(0, 1), (0, 3)}
+
+
+def test_sweep_and_prune_between_matches_brute_force():
+    rng = np.random.default_rng(5)
+    first_minimum, first_maximum = random_boxes(rng, 120, 1.0)
+    second_minimum, second_maximum = random_boxes(rng, 90, 1.0)
+
+    pairs = set()
+    for axis in range(3):
+        axis_pairs = [pair for firsts, seconds in sweep_and_prune_between(first_minimum, first_maximum, second_minimum, second_maximum, axis) for pair in zip(firsts, seconds)]
+        assert len(axis_pairs) == len(set(axis_pairs))
+        pairs = set(axis_pairs)
+
+        intersecting = np.all((first_minimum[:, None] <= second_maximum[None, :]) & (second_minimum[None, :] <= first_maximum[:, None]), axis=2)
+        assert pairs == set(zip(*np.nonzero(intersecting)))
+
+
+def test_bounding_boxes():
+    coords = np.array([[0, 0, 0], [1, 2, 3], [5, 5, 5], [-1, 4, 2], [3, 0, 1]], dtype=float)
+    offsets = np.array([0, 2, 2, 5])
+
+    minimum, maximum = bounding_boxes(coords, offsets, 0.5)
+
+    assert np.allclose(minimum[[0, 2]], [[-0.5, -0.5, -0.5], [-1.5, -0.5, 0.5]])
+    assert np.allclose(maximum[[0, 2]], [[1.5, 2.5, 3.5], [5.5, 5.5, 5.5]])
+    assert np.all(minimum[1] > maximum[1])
+
+
+def test_spatial_pair_order_is_permutation():
+    minimum, maximum = random_boxes(np.random.default_rng(6), 200, 1.0)
+    firsts, seconds = sweep_and_prune(minimum, maximum)
+
+    order = spatial_pair_order(firsts, seconds, minimum, maximum)
+    assert np.array_equal(np.sort(order), np.arange(len(firsts)))
+
+
+###########################################################
+###################### ISLAND LABELS ######################
+###########################################################
+
+@pytest.mark.parametrize('num_edges', [0, 50, 300, 2000])
+def test_island_labels_match_brute_force(num_edges):
+    rng = np.random.default_rng(7)
+    num_vertices = 500
+    edges = rng.integers(0, num_vertices, size=(num_edges, 2))
+
+    labels, num_islands = island_labels(num_vertices, edges)
+    expected = brute_islands(num_vertices, edges)
+
+    # Both number islands in order of their lowest vertex
+    assert np.array_equal(labels, expected)
+    assert num_islands == expected.max() + 1
+
+
+def test_island_labels_long_shuffled_chain():
+    rng = np.random.default_rng(8)
+    vertices = rng.permutation(5000)
+    edges = np.stack([vertices[:-1], vertices[1:]], axis=1)
+
+    labels, num_islands = island_labels(len(vertices), edges)
+    assert num_islands == 1 and np.all(labels == 0)
+
+
+def test_island_order_groups_islands():
+    labels = np.array([2, 0, 1, 0, 2, 2])
+    order, offsets, local = island_order(labels, 3)
+
+    assert np.array_equal(offsets, [0, 2, 3, 6])
+    assert np.array_equal(labels[order], [0, 0, 1, 2, 2, 2])
+    assert np.array_equal(local, [0, 0, 0, 1, 1, 2])
+
+
+###########################################################
+###################### NEAREST LABEL ######################
+###########################################################
+
+def test_labeled_point_index_matches_brute_force():
+    rng = np.random.default_rng(9)
+    points = rng.random((2000, 3)) * 10
+    labels = rng.integers(0, 20, len(points))
+    index = LabeledPointIndex(points, labels)
+
+    for offset in (0.0, 3.0, 40.0):
+        queries = rng.random((30, 3)) + offset
+        distance, label = index.closest(queries)
+        distances = np.linalg.norm(queries[:, None, :] - points[None, :, :], axis=2)
+        assert distance == pytest.approx(distances.min())
+        assert np.isclose(distances[:, labels == label].min(), distances.min())
+
+
+def test_labeled_point_index_empty():
+    assert LabeledPointIndex(np.zeros((0, 3)), np.zeros(0, dtype=np.int64)).closest(np.zeros((2, 3))) == (np.inf, -1)
+
+
+def test_trivially_closest_agrees_with_brute_force():
+    rng = np.random.default_rng(10)
+    label_points = [rng.random((20, 3)) + rng.random(3) * 20 for _ in range(8)]
+    objects = [rng.random((10, 3)) * 0.5 + rng.random(3) * 20 for _ in range(60)]
+
+    label_centers, label_radii = bounding_spheres(np.concatenate(label_points), np.cumsum([0] + [len(points) for points in label_points]))
+    centers, radii = bounding_spheres(np.concatenate(objects), np.cumsum([0] + [len(points) for points in objects]))
+    certain = trivially_closest(centers, radii, label_centers, label_radii)
+
+    assert np.any(certain >= 0)
+    for obj, label in zip(objects, certain):
+        if label >= 0:
+            distances = [np.linalg.norm(obj[:, None] - points[None], axis=2).min() for points in label_points]
+            assert label == int(np.argmin(distances))
+
+
+def test_bounding_spheres_contain_points():
+    rng = np.random.default_rng(11)
+    coords = rng.random((50, 3))
+    offsets = np.array([0, 20, 20, 50])
+
+    centers, radii = bounding_spheres(coords, offsets)
+
+    assert radii[1] < 0
+    for idx in (0, 2):
+        assert np.all(np.linalg.norm(coords[offsets[idx]:offsets[idx + 1]] - centers[idx], axis=1) <= radii[idx] + 1e-12)
+
+
+###########################################################
+###################### PIVOT SOLVER #######################
+###########################################################
+
+def test_closest_distance_and_mean_in_range():
+    rng = np.random.default_rng(12)
+    points = rng.random((300, 3))
+    targets = rng.random((40, 3)) + 0.5
+
+    distance, closest_idx = closest_distance(points, targets)
+    distances = np.linalg.norm(points[:, None] - targets[None], axis=2)
+    assert distance == pytest.approx(distances.min())
+    assert closest_idx == int(np.argmin(distances.min(axis=1)))
+
+    query_indices, point_indices = np.nonzero(distances.T <= 0.2)
+    assert np.allclose(mean_in_range(points, targets, 0.2), points[point_indices].mean(axis=0))
+    assert mean_in_range(points, targets + 10, 0.2) is None
+
+
+def test_find_pivot_returns_local_coordinates():
+    local_coords = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0]], dtype=float)
+    world_coords = local_coords + [10, 0, 0]
+    parent_world_coords = np.array([[11, 0, 0.5]])
+
+    assert np.allclose(find_pivot(local_coords, world_coords, parent_world_coords, 'closest', 0.0), [1, 0, 0])
+    # Nothing within range of parent, same fallback as the serial search
+    assert np.allclose(find_pivot(local_coords, world_coords, parent_world_coords, 'mean', -1.0), [1, 0, 0])
+
+
+def test_overlap_pivot_weights_polygons_not_triangles():
+    # Polygon 0 is an n-gon split into 4 triangles, polygon 1 a single triangle, parent has 2 triangles of one quad
+    polygon_indices = np.array([0, 0, 0, 0, 1])
+    parent_polygon_indices = np.array([0, 0])
+    polygon_centers = np.array([[0, 0, 0], [3, 0, 0]], dtype=float)
+    triangle_pairs = np.array([[0, 0], [1, 0], [2, 1], [3, 1], [4, 0], [4, 1]])
+
+    # Triangle pairs would give (0 * 4 + 3 * 2) / 6, polygon pairs give the mean of both centers
+    assert np.allclose(overlap_pivot(triangle_pairs, polygon_indices, parent_polygon_indices, polygon_centers), [1.5, 0, 0])
+    assert overlap_pivot(np.zeros((0, 2), dtype=np.int64), polygon_indices, parent_polygon_indices, polygon_centers) is None
+
+
+###########################################################
+##################### HIERARCHY INDEX #####################
+###########################################################
+
+def test_hierarchy_index():
+    parents = np.array([-1, 0, 0, 1, 3, -1, 5])
+    index = HierarchyIndex(parents)
+
+    assert np.array_equal(hierarchy_depths(parents), [0, 1, 1, 2, 3, 0, 1])
+    assert index.num_levels == 4
+    assert np.array_equal(index.level(1), [1, 2, 6])
+    assert np.array_equal(index.children_of(0), [1, 2])
+    assert len(index.children_of(4)) == 0
+
+
+###########################################################
+####################### SHAPE INDEX #######################
+###########################################################
+
+def test_shape_index_groups_rigid_copies():
+    rng = np.random.default_rng(13)
+    shapes = [rng.random((12, 3)) * [3, 2, 1], rng.random((12, 3)) * [1, 2, 3]]
+
+    pieces = []
+    for idx in range(8):
+        rotation = rotation_matrix(rng)
+        pieces.append(shapes[idx % 2] @ rotation.T + rng.random(3) * 10)
+    coords = np.concatenate(pieces)
+    offsets = np.arange(0, len(coords) + 1, 12)
+
+    index = ShapeIndex(coords, offsets)
+
+    assert index.num_shapes == 2
+    assert np.array_equal(index.representatives, [0, 1, 0, 1, 0, 1, 0, 1])
+    for piece in range(8):
+        representative = pieces[index.representatives[piece]]
+        transform = index.transforms[piece]
+        assert np.allclose(representative @ transform[:3, :3].T + transform[:3, 3], pieces[piece], atol=1e-6)
+
+    relative = index.relative_transform(2, 4)
+    assert np.allclose(pieces[2] @ relative[:3, :3].T + relative[:3, 3], pieces[4], atol=1e-6)
+
+
+def test_shape_index_keeps_different_pieces_apart():
+    rng = np.random.default_rng(14)
+    piece = rng.random((10, 3))
+    changed = piece.copy()
+    changed[3] += 1e-3
+
+    index = ShapeIndex(np.concatenate([piece, changed, piece]), np.array([0, 10, 20, 30]))
+    assert np.array_equal(index.representatives, [0, 1, 0])
+
+    topology = np.array([0, 1, 2, 0, 2, 1, 0, 1, 2])
+    index = ShapeIndex(np.concatenate([piece, piece, piece]), np.array([0, 10, 20, 30]), topology=topology, topology_offsets=np.array([0, 3, 6, 9]))
+    assert np.array_equal(index.representatives, [0, 1, 0])
+
+
+###########################################################
+#################### TEXTURE ENCODING #####################
+###########################################################
+
+def test_half_indices_round_trip_through_half_floats():
+    indices = np.arange(HALF_INDEX_LIMIT + 1)
+    values = encode_indices(indices, 'half').astype(np.float16)
+
+    assert np.all(np.isfinite(values))
+    assert np.array_equal(decode_indices(values.astype(np.float32), 'half'), indices)
+
+
+def test_float_indices_round_trip():
+    indices = np.concatenate([np.arange(1000), np.arange(FLOAT_INDEX_LIMIT - 1000, FLOAT_INDEX_LIMIT + 1)])
+    assert np.array_equal(decode_indices(encode_indices(indices, 'float'), 'float'), indices)
+
+
+def test_select_index_encoding():
+    assert select_index_encoding('auto', HALF_INDEX_LIMIT) == 'half'
+    assert select_index_encoding('auto', HALF_INDEX_LIMIT + 1) == 'float'
+    assert select_index_encoding('half', HALF_INDEX_LIMIT + 1) is None
+    assert select_index_encoding('float', FLOAT_INDEX_LIMIT + 1) is None
+
+
+###########################################################
+################## TRIANGLE INTERSECTION ##################
+###########################################################
+
+def test_triangles_intersect_cases():
+    base = np.array([[0, 0, 0], [2, 0, 0], [0, 2, 0]], dtype=float)
+    crossing = np.array([[0.5, 0.5, -1], [0.5, 0.5, 1], [1.5, 0.2, 0]], dtype=float)
+    above = crossing + [0, 0, 5]
+    coplanar = base + [0.5, 0.5, 0]
+    touching = np.array([[1, 1, 0], [1, 1, 1], [3, 3, 1]], dtype=float)
+
+    first = np.stack([base] * 4)
+    second = np.stack([crossing, above, coplanar, touching])
+    assert list(triangles_intersect(first, second)) == [True, False, False, True]
+    assert list(triangles_intersect(second, first)) == [True, False, False, True]
+
+
+def test_meshes_intersect_matches_all_triangle_pairs():
+    rng = np.random.default_rng(15)
+    for _ in range(30):
+        first = rng.random((40, 3, 3)) * 0.3 + rng.random((40, 1, 3)) * 2
+        second = rng.random((40, 3, 3)) * 0.3 + rng.random((40, 1, 3)) * 2 + rng.random(3)
+
+        first_indices, second_indices = np.meshgrid(np.arange(len(first)), np.arange(len(second)), indexing='ij')
+        expected = np.any(triangles_intersect(first[first_indices.ravel()], second[second_indices.ravel()]))
+        assert meshes_intersect(first, second) == expected
+
+
+###########################################################
+####################### TEXEL ORDER #######################
+###########################################################
+
+def test_morton_codes_interleave_bits():
+    rng = np.random.default_rng(16)
+    points = rng.random((100, 3))
+    codes = morton_codes(points)
+
+    cells = np.clip((points - points.min(axis=0)) / (points.max(axis=0) - points.min(axis=0)).max() * ((1 << 21) - 1), 0, (1 << 21) - 1).astype(np.int64)
+    for cell, code in zip(cells, codes):
+        expected = 0
+        for bit in range(21):
+            for axis in range(3):
+                expected |= ((int(cell[axis]) >> bit) & 1) << (3 * bit + axis)
+        assert int(code) == expected
+
+    assert np.array_equal(np.sort(morton_order(points)), np.arange(len(points)))
+
+
+def test_hierarchy_order_keeps_subtrees_together():
+    rng = np.random.default_rng(17)
+    parents = np.full(200, -1)
+    for node in range(1, 200):
+        if rng.random() < 0.9:
+            parents[node] = rng.integers(0, node)
+
+    order = hierarchy_order(parents, rng.random((200, 3)))
+    positions = np.empty(200, dtype=np.int64)
+    positions[order] = np.arange(200)
+
+    assert np.array_equal(np.sort(order), np.arange(200))
+    sizes = np.ones(200, dtype=np.int64)
+    for node in range(199, 0, -1):
+        if parents[node] >= 0:
+            sizes[parents[node]] += sizes[node]
+    for node in range(200):
+        subtree = [node]
+        for child in range(200):
+            ancestor = child
+            while parents[ancestor] >= 0 and ancestor != node:
+                ancestor = parents[ancestor]
+            if ancestor == node and child != node:
+                subtree.append(child)
+        # Parent comes right before its subtree, which takes consecutive texels
+        assert sorted(positions[subtree]) == list(range(positions[node], positions[node] + sizes[node]))
+
+
+def test_parent_texel_distances():
+    parents = np.array([-1, 0, 0, 1])
+    slots = np.array([0, 1, 5, 6])
+
+    assert np.allclose(parent_texel_distances(parents, slots, 4), [1, np.hypot(1, 1), np.hypot(1, 1)])
+
+
+###########################################################
+###################### VERTEX MATCH #######################
+###########################################################
+
+def test_match_vertices_quantized_and_fallback():
+    sources = np.array([[0, 0, 0], [1, 1, 1], [5, 5, 5]], dtype=float)
+    targets = np.array([[0, 0, 0], [1.0004, 1, 1], [0, 0, 0], [9, 9, 9]], dtype=float)
+
+    source_indices, target_indices = match_vertices(sources, targets, 1e-4, 1e-3)
+    assert list(zip(source_indices, target_indices)) == [(0, 0), (0, 2), (1, 1)]
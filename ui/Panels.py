@@ -52,7 +52,15 @@ class PIVOTPAINTER_PT_Texture(bpy.types.Panel):
                 alpha_packer = alpha_option.packer(context, [], textures_list_properties[idx].generate_hdr)
 
                 if textures_list_properties[idx].generate_hdr:
-                    col.label(text="OpenEXR, RGBA, Color Depth: Float(Half)", icon="INFO")
+                    stores_indices = rgb_packer.stores_indices or (not rgb_option.rgba() and alpha_packer.stores_indices)
+                    if stores_indices:
+                        col.prop(textures_list_properties[idx], "index_encoding")
+                    if stores_indices and textures_list_properties[idx].index_encoding == 'float':
+                        col.label(text="OpenEXR, RGBA, Color Depth: Float(Full)", icon="INFO")
+                    elif stores_indices and textures_list_properties[idx].index_encoding == 'auto':
+                        col.label(text="OpenEXR, RGBA, Color Depth: Float(Half), Float(Full) above 30719 indices", icon="INFO")
+                    else:
+                        col.label(text="OpenEXR, RGBA, Color Depth: Float(Half)", icon="INFO")
                     if not rgb_packer.support_hdr:
                         col.label(text="RGB - " + rgb_option.display_name() + " does not support HDR", icon="ERROR")
                     if not rgb_option.rgba() and not alpha_packer.support_hdr:
@@ -85,19 +93,30 @@ class PIVOTPAINTER_PT_Texture(bpy.types.Panel):
 
         self.layout.separator()
 
+        row = self.layout.row(align=True)
+        row.prop(properties, "texel_layout")
+        row.operator("pivot_painter.measure_texel_layout", text="", icon='INFO')
+
+        row = self.layout.row()
+        row.prop(properties, "output_mode", expand=True)
+        if properties.output_mode == 'attributes':
+            self.layout.prop(properties, "attribute_type")
+
         # File options
         col = self.layout.column()
+        col.enabled = properties.output_mode == 'texture'
         rows = col.row()
         rows.prop(properties, "create_new")
         rows.prop(properties, "save_textures")
 
         sub2 = self.layout.column()
-        sub2.enabled = properties.save_textures
+        sub2.enabled = properties.save_textures and properties.output_mode == 'texture'
         sub2.prop(properties, "folder_path")
 
         row = self.layout.row()
         row.scale_y = 2
         row.operator("pivot_painter.create_textures")
+        self.layout.operator("pivot_painter.verify_textures")
 
 
 # noinspection PyPep8Naming
@@ -166,11 +185,33 @@ class PIVOTPAINTER_PT_PivotAndRotations(bpy.types.Panel):
             per.enabled = rotation_properties.calculation_type == 'mean' and rotation_properties.enabled
             per.prop(rotation_properties, "max_distance", slider=True)
 
+        self.layout.separator()
+
+        row = self.layout.row()
+        row.enabled = pivot_properties.enabled or rotation_properties.enabled
+        row.prop(pivot_properties, "use_cache")
+
+        row = self.layout.row()
+        row.enabled = rotation_properties.enabled and rotation_properties.item_type == 'vertex' and not pivot_properties.parallel
+        row.prop(pivot_properties, "reuse_shapes")
+
+        row = self.layout.row()
+        row.enabled = pivot_properties.enabled or rotation_properties.enabled
+        row.prop(pivot_properties, "parallel")
+        sub = row.row()
+        sub.enabled = pivot_properties.parallel
+        sub.prop(pivot_properties, "num_workers")
+
         row = self.layout.row()
         row.enabled = pivot_properties.enabled or rotation_properties.enabled
         row.scale_y = 2
         row.operator("pivot_painter.generate_pivots_and_rotations")
 
+        row = self.layout.row(align=True)
+        row.enabled = pivot_properties.enabled or rotation_properties.enabled
+        row.operator("pivot_painter.analyze_pivots_and_rotations")
+        row.operator("pivot_painter.commit_pivots_and_rotations")
+
 
 # noinspection PyPep8Naming
 class PIVOTPAINTER_UL_BaseMeshesList(bpy.types.UIList):
@@ -200,11 +241,16 @@ class PIVOTPAINTER_PT_MeshOperations(bpy.types.Panel):
     def draw(self, context):
         properties = get_mesh_operations_settings(context)
 
+        self.layout.prop(properties, "instance_aware")
+
         if expand_menu(self.layout, properties, 'show_split_mesh', 'Split Mesh'):
             row = self.layout.row()
             row.scale_y = 2
             row.operator("pivot_painter.split_mesh")
 
+            row = self.layout.row()
+            row.operator("pivot_painter.create_island_uvs")
+
         if expand_menu(self.layout, properties, 'show_copy_uvs', 'Copy UVs'):
             box = self.layout.box()
 
@@ -235,6 +281,19 @@ class PIVOTPAINTER_PT_MeshOperations(bpy.types.Panel):
 
             box.separator()
 
+            row = box.row()
+            row.prop(properties, "hierarchy_use_cache")
+
+            row = box.row()
+            row.prop(properties, "hierarchy_parallel")
+            sub = row.row()
+            sub.enabled = properties.hierarchy_parallel
+            sub.prop(properties, "hierarchy_num_workers")
+
+            row = box.row()
+            row.enabled = not properties.hierarchy_parallel
+            row.prop(properties, "hierarchy_bvh_budget")
+
             row = box.row()
             row.scale_y = 2
             row.operator("pivot_painter.generate_hierarchy")
@@ -259,6 +318,19 @@ class PIVOTPAINTER_PT_MeshOperations(bpy.types.Panel):
 
             box.operator("pivot_painter.fill_empty_axis_meshes")
 
+        if expand_menu(self.layout, properties, 'show_pipeline', 'Pipeline'):
+            box = self.layout.box()
+
+            box.prop(properties, "pipeline_split")
+            box.prop(properties, "pipeline_hierarchy")
+            box.prop(properties, "pipeline_pivots")
+            box.prop(properties, "pipeline_textures")
+            box.prop(properties, "pipeline_copy_uvs")
+
+            row = box.row()
+            row.scale_y = 2
+            row.operator("pivot_painter.run_pipeline")
+
 
 panels = [
     PIVOTPAINTER_PT_Texture,